@@ -1,2 +1,2 @@
 python3 src/main.py "/static-site-generator/"
-cd docs && touch .nojekyll && python3 -m http.server 8888
+touch docs/.nojekyll && python3 src/preview.py docs --port 8888 --base-path "/static-site-generator/"
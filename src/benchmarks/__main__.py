@@ -0,0 +1,96 @@
+"""
+Runs the benchmark suite on a synthetic corpus.
+
+    cd src && python3 -m benchmarks --pages 500 --output results.json
+    cd src && python3 -m benchmarks --baseline results.json --threshold 0.1
+
+Exits with status 1 when a stage is slower than the baseline by more
+than the threshold.
+"""
+
+import argparse
+import sys
+
+from benchmarks.corpus import CorpusSettings
+from benchmarks.suite import (
+    compare,
+    load_results,
+    print_comparison,
+    print_results,
+    run_suite,
+    save_results,
+)
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="python3 -m benchmarks", description="Benchmark the site generator."
+    )
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--blocks", type=int, default=40, help="blocks per page")
+    parser.add_argument(
+        "--inline-density",
+        type=float,
+        default=0.2,
+        help="share of words with emphasis or code",
+    )
+    parser.add_argument("--links", type=int, default=2, help="links per paragraph")
+    parser.add_argument(
+        "--block-mix",
+        help="block weights, e.g. paragraph=6,heading=2,code=1",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "-j", "--jobs", type=int, help="also time a build on N worker processes"
+    )
+    parser.add_argument(
+        "--stage", action="append", help="only run this stage, may be repeated"
+    )
+    parser.add_argument("--output", help="write the results to this json file")
+    parser.add_argument("--baseline", help="compare against this results file")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="allowed slowdown against the baseline (default: 0.1)",
+    )
+    return parser.parse_args(argv)
+
+
+def parse_block_mix(text):
+    if not text:
+        return None
+    mix = {}
+    for item in text.split(","):
+        block_type, weight = item.split("=")
+        mix[block_type.strip()] = float(weight)
+    return mix
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    settings = CorpusSettings(
+        pages=args.pages,
+        blocks_per_page=args.blocks,
+        block_mix=parse_block_mix(args.block_mix),
+        inline_density=args.inline_density,
+        links_per_paragraph=args.links,
+        seed=args.seed,
+    )
+    results = run_suite(settings, args.repeat, args.jobs, args.stage)
+    print_results(results)
+    if args.output:
+        save_results(results, args.output)
+
+    if args.baseline:
+        rows = compare(results, load_results(args.baseline), args.threshold)
+        print()
+        print_comparison(rows, args.threshold)
+        if any(regressed for *_, regressed in rows):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""
+Generates reproducible synthetic content trees to benchmark builds on.
+The same settings and seed always produce the same files.
+"""
+
+import os
+import random
+
+words = (
+    "the ring of power was forged in secret by the dark lord in the fires "
+    "of mount doom and the elves of eregion never knew until too late that "
+    "three rings were given to the elven kings under the sky"
+).split()
+
+template = """<!doctype html>
+<html>
+  <head>
+    <meta charset="utf-8" />
+    <title>{{ Title }}</title>
+    <link href="/index.css" rel="stylesheet" />
+  </head>
+
+  <body>
+    <article>{{ Content }}</article>
+  </body>
+</html>
+"""
+
+default_block_mix = {
+    "paragraph": 6,
+    "heading": 2,
+    "unordered_list": 2,
+    "ordered_list": 1,
+    "quote": 1,
+    "code": 1,
+}
+
+
+class CorpusSettings:
+    def __init__(
+        self,
+        pages=100,
+        blocks_per_page=40,
+        block_mix=None,
+        inline_density=0.2,
+        links_per_paragraph=2,
+        seed=0,
+    ):
+        self.pages = pages
+        self.blocks_per_page = blocks_per_page
+        self.block_mix = block_mix or dict(default_block_mix)
+        # the share of words that carry emphasis or code
+        self.inline_density = inline_density
+        self.links_per_paragraph = links_per_paragraph
+        self.seed = seed
+
+    def to_dict(self):
+        return dict(vars(self))
+
+
+def sentence(rng, settings, length):
+    parts = []
+    for _ in range(length):
+        word = rng.choice(words)
+        if rng.random() < settings.inline_density:
+            style = rng.randrange(3)
+            if style == 0:
+                word = f"**{word}**"
+            elif style == 1:
+                word = f"_{word}_"
+            else:
+                word = f"`{word}`"
+        parts.append(word)
+    return " ".join(parts)
+
+
+def paragraph(rng, settings):
+    parts = [sentence(rng, settings, rng.randint(8, 30))]
+    for _ in range(settings.links_per_paragraph):
+        target = rng.randrange(max(settings.pages, 1))
+        parts.append(f"see [page {target}](/pages/{target}) and")
+        parts.append(sentence(rng, settings, rng.randint(3, 12)))
+    return " ".join(parts) + "."
+
+
+def block(rng, settings, block_type):
+    if block_type == "heading":
+        return "#" * rng.randint(2, 4) + " " + sentence(rng, settings, 4)
+    if block_type == "unordered_list":
+        items = [sentence(rng, settings, 6) for _ in range(rng.randint(2, 8))]
+        return "\n".join(f"- {item}" for item in items)
+    if block_type == "ordered_list":
+        items = [sentence(rng, settings, 6) for _ in range(rng.randint(2, 8))]
+        return "\n".join(f"{n}. {item}" for n, item in enumerate(items, 1))
+    if block_type == "quote":
+        lines = [sentence(rng, settings, 10) for _ in range(rng.randint(1, 4))]
+        return "\n".join(f"> {line}" for line in lines)
+    if block_type == "code":
+        lines = [" ".join(rng.choices(words, k=5)) for _ in range(rng.randint(2, 10))]
+        return "```\n" + "\n".join(lines) + "\n```"
+    return paragraph(rng, settings)
+
+
+def generate_markdown(rng, settings, title):
+    block_types = list(settings.block_mix)
+    weights = [settings.block_mix[block_type] for block_type in block_types]
+    blocks = [f"# {title}"]
+    for block_type in rng.choices(block_types, weights, k=settings.blocks_per_page):
+        blocks.append(block(rng, settings, block_type))
+    return "\n\n".join(blocks) + "\n"
+
+
+def generate_corpus(root, settings):
+    """
+    Writes settings.pages markdown files below root/content, spread over
+    nested directories like a real site, plus root/template.html.
+    Returns the paths of the content directory and the template.
+    """
+    rng = random.Random(settings.seed)
+    content = os.path.join(root, "content")
+    for n in range(settings.pages):
+        directory = os.path.join(content, "pages", f"{n // 100:03d}", str(n))
+        if n == 0:
+            directory = content
+        os.makedirs(directory, exist_ok=True)
+        markdown = generate_markdown(rng, settings, f"Page {n}")
+        with open(os.path.join(directory, "index.md"), "w") as file:
+            file.write(markdown)
+
+    template_path = os.path.join(root, "template.html")
+    with open(template_path, "w") as file:
+        file.write(template)
+    return content, template_path
@@ -0,0 +1,116 @@
+"""
+Times the single pass inline scanner against the chained split passes
+it replaced, on paragraphs of growing length, and checks that link
+extraction scales linearly with the number of links in a paragraph.
+
+The scanner is not faster: each str.split pass runs in C, so one loop
+in python only reaches parity, within the noise of a run. What it buys
+is nested emphasis, shown last, which the split passes get wrong.
+
+    cd src && python3 -m benchmarks.inline
+"""
+
+import timeit
+
+from inline_markdown import (
+    extract_markdown_links,
+    split_nodes_delimiter,
+    split_nodes_image,
+    split_nodes_link,
+    text_to_textnodes,
+)
+from textnode import TextNode, TextType
+
+nested = [
+    "**bold with *italic* inside**",
+    "*italic with **bold** inside*",
+]
+sentence = (
+    "Some **bold words**, an *italic phrase*, a bit of `inline code`, "
+    "a [link](https://example.com/page) and an ![image](/images/a.png). "
+)
+
+
+def chained_split(text):
+    nodes = [TextNode(text, TextType.TEXT)]
+    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+    nodes = split_nodes_delimiter(nodes, "*", TextType.ITALIC)
+    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
+    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+    nodes = split_nodes_image(nodes)
+    nodes = split_nodes_link(nodes)
+    return nodes
+
+
+def split_links_by_str_split(text):
+    # the previous split_nodes_link: one str.split of the remaining
+    # text per link, quadratic in the number of links
+    nodes = []
+    for alt, url in extract_markdown_links(text):
+        sections = text.split(f"[{alt}]({url})", 1)
+        if sections[0] != "":
+            nodes.append(TextNode(sections[0], TextType.TEXT))
+        nodes.append(TextNode(alt, TextType.LINK, url))
+        text = sections[1]
+    if text != "":
+        nodes.append(TextNode(text, TextType.TEXT))
+    return nodes
+
+
+def split_links_by_finditer(text):
+    return split_nodes_link([TextNode(text, TextType.TEXT)])
+
+
+def link_paragraph(links):
+    return "".join(f"see [reference {n}](/reference/{n}/) then " for n in range(links))
+
+
+def best_time(function, text, repeat=5):
+    timer = timeit.Timer(lambda: function(text))
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def main():
+    print(f"{'sentences':>10} {'chained split':>15} {'single pass':>15} {'ratio':>8}")
+    for sentences in (10, 100, 1000, 5000):
+        text = sentence * sentences
+        if chained_split(text) != text_to_textnodes(text):
+            raise AssertionError("implementations disagree")
+        chained = best_time(chained_split, text)
+        single = best_time(text_to_textnodes, text)
+        print(
+            f"{sentences:>10} {chained * 1000:>12.3f} ms {single * 1000:>12.3f} ms"
+            f" {chained / single:>7.2f}x"
+        )
+
+    print()
+    print(f"{'links':>10} {'str.split':>15} {'finditer':>15} {'scanner':>15}")
+    for links in (250, 1000, 4000, 16000):
+        text = link_paragraph(links)
+        if split_links_by_str_split(text) != split_links_by_finditer(text):
+            raise AssertionError("implementations disagree")
+        times = [
+            best_time(split_links_by_str_split, text, repeat=3),
+            best_time(split_links_by_finditer, text),
+            best_time(text_to_textnodes, text),
+        ]
+        # time per link stays flat when scaling is linear
+        print(
+            f"{links:>10}"
+            + "".join(f" {seconds / links * 1e6:>9.3f} us/link" for seconds in times)
+        )
+
+    print()
+    for text in nested:
+        try:
+            chained = chained_split(text)
+        except ValueError as error:
+            chained = error
+        print(text)
+        print(f"  chained split: {chained}")
+        print(f"  single pass:   {text_to_textnodes(text)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Measures the bytes allocated per node by the slotted node classes,
+against dict backed classes like the ones they replaced, and per node
+of a whole parsed document as html nodes and as an html arena.
+
+    cd src && python3 -m benchmarks.memory
+"""
+
+import gc
+import tracemalloc
+
+from block_markdown import markdown_to_html_arena, markdown_to_html_node
+from html_arena import HTMLArena
+from htmlnode import LeafNode, ParentNode
+from textnode import TextNode, TextType
+
+
+class DictLeafNode:
+    # the previous LeafNode: a dict per instance and a __setattr__ hook
+    def __init__(self, tag, value, props=None):
+        self.tag = tag
+        self.value = value
+        self.children = None
+        self.props = props
+
+    def __setattr__(self, name, value):
+        if name == "children" and hasattr(self, "children"):
+            raise AttributeError("LeafNode cannot have a children")
+        super().__setattr__(name, value)
+
+
+class DictParentNode:
+    def __init__(self, tag, children, props=None):
+        self.tag = tag
+        self.value = None
+        self.children = children
+        self.props = props
+
+    def __setattr__(self, name, value):
+        if name == "value" and hasattr(self, "value"):
+            raise AttributeError("ParentNode cannot have a value")
+        super().__setattr__(name, value)
+
+
+class DictTextNode:
+    def __init__(self, text, text_type, url=None):
+        self.text = text
+        self.text_type = text_type
+        self.url = url
+
+
+def bytes_per_object(factory, count=100_000):
+    gc.collect()
+    tracemalloc.start()
+    objects = [factory() for _ in range(count)]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # subtract the list holding the objects
+    size -= tracemalloc_list_size(count)
+    del objects
+    return size / count
+
+
+def tracemalloc_list_size(count):
+    tracemalloc.start()
+    placeholders = [None] * count
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del placeholders
+    return size
+
+
+def count_nodes(node):
+    count = 0
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        count += 1
+        if isinstance(node, ParentNode):
+            stack.extend(node.children)
+    return count
+
+
+def document(sections):
+    section = (
+        "## Section\n\n"
+        "A paragraph with **bold**, *italic* and a [link](https://example.com).\n\n"
+        "- first item\n- second `item`\n- third item\n\n"
+        "> a quoted line\n\n"
+    )
+    return section * sections
+
+
+def main():
+    children = [LeafNode("b", "x")]
+    cases = [
+        ("leaf node", lambda: DictLeafNode("b", "x"), lambda: LeafNode("b", "x")),
+        (
+            "parent node",
+            lambda: DictParentNode("p", children),
+            lambda: ParentNode("p", children),
+        ),
+        (
+            "text node",
+            lambda: DictTextNode("x", TextType.BOLD),
+            lambda: TextNode("x", TextType.BOLD),
+        ),
+    ]
+    print(f"{'':<12} {'dict backed':>12} {'slotted':>12}")
+    for name, before, after in cases:
+        print(
+            f"{name:<12} {bytes_per_object(before):>8.0f} B/n"
+            f" {bytes_per_object(after):>8.0f} B/n"
+        )
+
+    markdown = document(2000)
+    print()
+    for name, parse in [
+        ("html nodes", markdown_to_html_node),
+        ("html arena", markdown_to_html_arena),
+    ]:
+        gc.collect()
+        tracemalloc.start()
+        tree = parse(markdown)
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        nodes = len(tree) if isinstance(tree, HTMLArena) else count_nodes(tree)
+        print(f"document of {nodes} nodes as {name}: {size / nodes:.0f} B/node")
+
+
+if __name__ == "__main__":
+    main()
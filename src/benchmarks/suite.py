@@ -0,0 +1,145 @@
+"""
+Times each stage of the build on a synthetic corpus, writes the
+results as json and compares them against a stored baseline.
+"""
+
+import contextlib
+import io
+import json
+import os
+import platform
+import tempfile
+import time
+
+from benchmarks.corpus import generate_corpus
+from block_markdown import lex_blocks, markdown_to_blocks, markdown_to_html_node
+from generate_content import generate_pages_parallel, generate_pages_recursive
+from inline_markdown import text_to_textnodes
+
+
+def best_of(function, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def inline_texts(markdowns):
+    texts = []
+    for markdown in markdowns:
+        pending = lex_blocks(markdown)
+        while pending:
+            block = pending.pop()
+            if block.block_type != "code":
+                texts.extend(
+                    child for child in block.children if isinstance(child, str)
+                )
+                if block.text:
+                    texts.append(block.text)
+            pending.extend(
+                child for child in block.children if not isinstance(child, str)
+            )
+    return texts
+
+
+def quiet_build(build, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        build(*args, **kwargs)
+
+
+def run_suite(settings, repeat=3, workers=None, stages=None):
+    """
+    Returns a dict of results, with the best time of each stage over
+    repeat runs, in seconds for the whole corpus.
+    """
+    with tempfile.TemporaryDirectory() as root:
+        content, template_path = generate_corpus(root, settings)
+        markdowns = []
+        for directory, _, files in sorted(os.walk(content)):
+            for name in sorted(files):
+                with open(os.path.join(directory, name)) as file:
+                    markdowns.append(file.read())
+        texts = inline_texts(markdowns)
+        nodes = [markdown_to_html_node(markdown) for markdown in markdowns]
+        public = os.path.join(root, "public")
+
+        benchmarks = {
+            "markdown_to_blocks": lambda: [markdown_to_blocks(m) for m in markdowns],
+            "lex_blocks": lambda: [lex_blocks(m) for m in markdowns],
+            "text_to_textnodes": lambda: [text_to_textnodes(t) for t in texts],
+            "markdown_to_html_node": lambda: [
+                markdown_to_html_node(m) for m in markdowns
+            ],
+            "to_html": lambda: [node.to_html() for node in nodes],
+            "build": lambda: quiet_build(
+                generate_pages_recursive, content, public, template_path
+            ),
+        }
+        if workers:
+            benchmarks["parallel_build"] = lambda: quiet_build(
+                generate_pages_parallel,
+                content,
+                public,
+                template_path,
+                workers=workers,
+            )
+
+        results = {}
+        for name, function in benchmarks.items():
+            if stages and name not in stages:
+                continue
+            seconds = best_of(function, repeat)
+            results[name] = {
+                "seconds": seconds,
+                "ms_per_page": seconds * 1000 / max(settings.pages, 1),
+            }
+
+    return {
+        "settings": settings.to_dict(),
+        "repeat": repeat,
+        "workers": workers,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "stages": results,
+    }
+
+
+def compare(results, baseline, threshold):
+    """
+    Returns (stage, baseline seconds, seconds, ratio, regressed) for every
+    stage found in both runs; a stage regressed when it got slower by more
+    than threshold, e.g. 0.1 for 10%.
+    """
+    rows = []
+    for name, stage in results["stages"].items():
+        if name not in baseline.get("stages", {}):
+            continue
+        before = baseline["stages"][name]["seconds"]
+        ratio = stage["seconds"] / before if before else float("inf")
+        rows.append((name, before, stage["seconds"], ratio, ratio > 1 + threshold))
+    return rows
+
+
+def print_results(results):
+    print(f"{'stage':<24} {'seconds':>10} {'ms/page':>10}")
+    for name, stage in results["stages"].items():
+        print(f"{name:<24} {stage['seconds']:>10.4f} {stage['ms_per_page']:>10.3f}")
+
+
+def print_comparison(rows, threshold):
+    print(f"{'stage':<24} {'baseline':>10} {'current':>10} {'ratio':>8}")
+    for name, before, after, ratio, regressed in rows:
+        flag = f"  slower than +{threshold:.0%}" if regressed else ""
+        print(f"{name:<24} {before:>10.4f} {after:>10.4f} {ratio:>7.2f}x{flag}")
+
+
+def save_results(results, path):
+    with open(path, "w") as file:
+        json.dump(results, file, indent=2, sort_keys=True)
+
+
+def load_results(path):
+    with open(path, "r") as file:
+        return json.load(file)
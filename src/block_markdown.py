@@ -1,7 +1,11 @@
+import hashlib
 import re
 
-from htmlnode import ParentNode
+import buildstats
+from html_arena import HTMLArena
+from htmlnode import LeafNode, ParentNode
 from inline_markdown import text_to_textnodes
+from lru import LRUCache
 from textnode import TextNode, TextType, text_node_to_html_node
 
 block_type_heading = "heading"
@@ -137,16 +141,335 @@ def is_olist(block):
     return True
 
 
+class Block:
+    """
+    A block found by lex_blocks.
+
+    Headings and paragraphs keep their inline text in text, code blocks
+    their body. Quotes hold text runs (strings) and nested quotes in
+    children, lists hold list items, and list items hold nested lists.
+    source is the block's markdown as markdown_to_blocks would return it.
+    """
+
+    def __init__(self, block_type, text="", level=0, children=None, source=""):
+        self.block_type = block_type
+        self.text = text
+        self.level = level
+        self.children = children if children is not None else []
+        self.source = source
+
+    def __repr__(self):
+        return f"Block({self.block_type}, {self.text}, {self.level}, {self.children})"
+
+
+block_type_list_item = "list_item"
+
+heading_pattern = re.compile(r"(\#{1,6})\s")
+code_pattern = re.compile(r"(?s)\`{3}(?:\w+\s*)?(.*?)\`{3}$")
+list_item_pattern = re.compile(r"([ \t]*)(?:([\*\-])|(\d+)\.)\s+(.*)$")
+
+
+def lex_blocks(markdown):
+    """
+    Walks the lines of a document once, grouping them into blocks,
+    deciding each block's type and extracting its contents as it goes.
+    Blocks are separated by empty lines, except inside fenced code.
+    """
+    return [lex_block(lines) for lines in split_block_lines(markdown)]
+
+
+def split_block_lines(markdown):
+    # yields the stripped lines of each block of the document
+    lines = markdown.replace("\r\n", "\n").split("\n")
+    index = 0
+    while index < len(lines):
+        if lines[index] == "":
+            index += 1
+            continue
+        start = index
+        while index < len(lines) and lines[index] != "":
+            index += 1
+
+        # let a fenced code block run on over empty lines
+        # up to the line that closes it
+        if lines[start].lstrip().startswith("```") and not is_closed_fence(
+            lines[start:index]
+        ):
+            for end in range(index, len(lines)):
+                if lines[end].rstrip().endswith("```"):
+                    index = end + 1
+                    break
+
+        block_lines = strip_block_lines(lines[start:index])
+        if block_lines:
+            yield block_lines
+
+
+def is_closed_fence(lines):
+    first = lines[0].strip()
+    last = lines[-1].rstrip()
+    if len(lines) == 1:
+        return len(first) >= 6 and first.endswith("```")
+    return last.endswith("```")
+
+
+def strip_block_lines(lines):
+    # the line based equivalent of str.strip() on the joined block
+    start, end = 0, len(lines)
+    while start < end and lines[start].strip() == "":
+        start += 1
+    while end > start and lines[end - 1].strip() == "":
+        end -= 1
+    if start == end:
+        return []
+    lines = lines[start:end]
+    lines[0] = lines[0].lstrip()
+    lines[-1] = lines[-1].rstrip()
+    return lines
+
+
+def lex_block(lines):
+    source = "\n".join(lines)
+    first = lines[0]
+
+    heading = heading_pattern.match(source)
+    if heading:
+        level = len(heading.group(1))
+        return Block(
+            block_type_heading, source[level + 1 :].strip(), level, source=source
+        )
+
+    if first.startswith("```") and is_closed_fence(lines):
+        code = code_pattern.search(source).group(1)
+        return Block(block_type_code, code, source=source)
+
+    block = None
+    if first.startswith(">"):
+        block = lex_quote(lines)
+    elif first[:1].isdigit() or first[:1] in ("*", "-"):
+        block = lex_list(lines)
+    if block is None:
+        block = Block(block_type_paragraph, " ".join(lines))
+    block.source = source
+    return block
+
+
+def lex_quote(lines):
+    # the number of leading ">" is the nesting depth of a line,
+    # consecutive lines at the same depth form one run of text
+    root = Block(block_type_quote)
+    stack = [root]
+    for line in lines:
+        depth = len(line) - len(line.lstrip(">"))
+        if depth == 0:
+            return None
+        while len(stack) > depth:
+            stack.pop()
+        while len(stack) < depth:
+            nested = Block(block_type_quote)
+            stack[-1].children.append(nested)
+            stack.append(nested)
+        children = stack[-1].children
+        if children and isinstance(children[-1], list):
+            children[-1].append(line[depth:].strip())
+        else:
+            children.append([line[depth:].strip()])
+    join_quote_runs(root)
+    return root
+
+
+def join_quote_runs(block):
+    for n, child in enumerate(block.children):
+        if isinstance(child, list):
+            block.children[n] = " ".join(child)
+        else:
+            join_quote_runs(child)
+
+
+def lex_list(lines):
+    # every line is an item; an item indented further than the one
+    # before it starts a nested list inside that item
+    root = None
+    stack = []
+    for line in lines:
+        match = list_item_pattern.match(line)
+        if not match:
+            return None
+        indent = len(match.group(1).expandtabs(4))
+        number = match.group(3)
+        block_type = block_type_olist if number is not None else block_type_ulist
+
+        if root is None:
+            root = Block(block_type)
+            stack.append((indent, root))
+        while len(stack) > 1 and indent < stack[-1][0]:
+            stack.pop()
+        current_indent, current = stack[-1]
+        if indent > current_indent:
+            nested = Block(block_type)
+            current.children[-1].children.append(nested)
+            stack.append((indent, nested))
+            current = nested
+
+        if current.block_type != block_type:
+            return None
+        # ordered lists count up from 1
+        if number is not None and number != str(len(current.children) + 1):
+            return None
+        current.children.append(Block(block_type_list_item, match.group(4).strip()))
+    return root
+
+
+# the html of recently rendered blocks, keyed by a hash of their markdown
+# and shared by every page rendered in this process; off unless enabled
+block_cache = None
+
+
+def enable_block_cache(max_blocks):
+    global block_cache
+    block_cache = LRUCache(max_blocks) if max_blocks else None
+    return block_cache
+
+
 def markdown_to_html_node(markdown):
-    markdown_blocks = markdown_to_blocks(markdown)
     children = []
-    for markdown_block in markdown_blocks:
-        html_node = markdown_block_to_html(markdown_block)
-        children.append(html_node)
+    cache = block_cache
+    for lines in split_block_lines(markdown):
+        if cache is None:
+            children.append(block_to_html_node(lex_block(lines)))
+            continue
+        # an unchanged block is not lexed or parsed again,
+        # its html from an earlier render is reused as is
+        source = "\n".join(lines)
+        key = hashlib.blake2b(source.encode(), digest_size=16).digest()
+        html = cache.get(key)
+        if html is None:
+            html = block_to_html_node(lex_block(lines)).to_html()
+            cache.put(key, html)
+        children.append(LeafNode(None, html))
     return ParentNode("div", children, None)
 
 
+def markdown_to_html_arena(markdown):
+    """
+    Parses markdown straight into an HTMLArena, without keeping an
+    HTMLNode per element of the document.
+    """
+    arena = HTMLArena()
+    root = arena.add_parent(-1, "div")
+    for block in lex_blocks(markdown):
+        block_to_arena(arena, root, block)
+    return arena
+
+
+def block_to_arena(arena, parent, block):
+    match block.block_type:
+        case "heading":
+            node = arena.add_parent(parent, f"h{block.level}")
+            text_to_arena(arena, node, block.text)
+        case "paragraph":
+            node = arena.add_parent(parent, "p")
+            text_to_arena(arena, node, block.text)
+        case "code":
+            node = arena.add_parent(parent, "pre")
+            code = arena.add_parent(node, "code")
+            arena.add_leaf(code, None, block.text)
+        case "quote":
+            node = arena.add_parent(parent, "blockquote")
+            for child in block.children:
+                if isinstance(child, str):
+                    text_to_arena(arena, node, child)
+                else:
+                    block_to_arena(arena, node, child)
+        case "ordered_list" | "unordered_list":
+            tag = "ol" if block.block_type == block_type_olist else "ul"
+            node = arena.add_parent(parent, tag)
+            for item in block.children:
+                block_to_arena(arena, node, item)
+        case "list_item":
+            node = arena.add_parent(parent, "li")
+            text_to_arena(arena, node, block.text)
+            for child in block.children:
+                block_to_arena(arena, node, child)
+        case _:
+            raise ValueError("Invalid type!")
+    return node
+
+
+def text_to_arena(arena, parent, text):
+    for text_node in text_to_textnodes(text):
+        arena.append_node(parent, text_node_to_html_node(text_node))
+
+
+def block_to_html_node(block):
+    match block.block_type:
+        case "heading":
+            return ParentNode(f"h{block.level}", text_to_children(block.text))
+        case "paragraph":
+            return ParentNode("p", text_to_children(block.text))
+        case "code":
+            code = ParentNode("code", [LeafNode(None, block.text)])
+            return ParentNode("pre", [code])
+        case "quote":
+            children = []
+            for child in block.children:
+                if isinstance(child, str):
+                    children.extend(text_to_children(child))
+                else:
+                    children.append(block_to_html_node(child))
+            return ParentNode("blockquote", children)
+        case "ordered_list":
+            return ParentNode("ol", list(map(block_to_html_node, block.children)))
+        case "unordered_list":
+            return ParentNode("ul", list(map(block_to_html_node, block.children)))
+        case "list_item":
+            children = text_to_children(block.text)
+            children.extend(map(block_to_html_node, block.children))
+            return ParentNode("li", children)
+        case _:
+            raise ValueError("Invalid type!")
+
+
+# the html of recently rendered inline text, for headings, paragraphs and
+# list items repeated across pages; off unless enabled
+inline_cache = None
+
+
+def enable_inline_cache(max_entries):
+    global inline_cache
+    inline_cache = LRUCache(max_entries) if max_entries else None
+    return inline_cache
+
+
+def memo_caches():
+    # the block and inline caches that are enabled, by name
+    caches = {"block": block_cache, "inline": inline_cache}
+    return {name: cache for name, cache in caches.items() if cache is not None}
+
+
 def text_to_children(text):
+    timer = buildstats.active_timer
+    if timer is None:
+        return cached_inline_to_children(text)
+    with timer.stage("parse_inlines"):
+        return cached_inline_to_children(text)
+
+
+def cached_inline_to_children(text):
+    cache = inline_cache
+    if cache is None:
+        return inline_to_children(text)
+    html = cache.get(text)
+    if html is None:
+        children = inline_to_children(text)
+        if not children:
+            return children
+        html = "".join(child.to_html() for child in children)
+        cache.put(text, html)
+    return [LeafNode(None, html)]
+
+
+def inline_to_children(text):
     text_nodes = text_to_textnodes(text)
     children = []
     for text_node in text_nodes:
@@ -0,0 +1,237 @@
+import contextlib
+import json
+import math
+import time
+import tracemalloc
+
+page_stages = (
+    "read",
+    "parse_blocks",
+    "parse_inlines",
+    "serialize",
+    "template",
+    "write",
+)
+build_stages = ("discover", "static_copy", "compress")
+
+# the timer of the page being rendered in this process, if it is profiled;
+# lets deeply nested code such as inline parsing report its own stage
+active_timer = None
+
+
+class StageTimer:
+    """
+    Adds up wall time per stage. Stages can nest, and the time spent
+    in an inner stage is not counted again for the outer one.
+
+    With track_memory, and tracemalloc running, it also records the peak
+    memory allocated during each stage and during everything it timed.
+    """
+
+    def __init__(self, track_memory=False):
+        self.totals = {}
+        self.track_memory = track_memory
+        self.peaks = {}
+        self.peak = 0
+        self.memory_base = None
+        self.running = []
+
+    def start(self, name):
+        entry = [name, time.perf_counter(), 0.0, 0, 0]
+        if self.track_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if self.running:
+                self.running[-1][4] = max(self.running[-1][4], peak)
+            elif self.memory_base is None:
+                self.memory_base = current
+            # the peak is reset so that it starts out at this stage
+            tracemalloc.reset_peak()
+            entry[3] = entry[4] = current
+        self.running.append(entry)
+
+    def stop(self):
+        name, started, inner, memory_start, peak = self.running.pop()
+        elapsed = time.perf_counter() - started
+        self.totals[name] = self.totals.get(name, 0.0) + elapsed - inner
+        if self.running:
+            self.running[-1][2] += elapsed
+
+        if self.track_memory:
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            self.peaks[name] = max(self.peaks.get(name, 0), peak - memory_start)
+            if self.running:
+                self.running[-1][4] = max(self.running[-1][4], peak)
+            else:
+                self.peak = max(self.peak, peak - self.memory_base)
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        self.start(name)
+        try:
+            yield
+        finally:
+            self.stop()
+
+    def result(self):
+        result = {"totals": self.totals}
+        if self.track_memory:
+            result["peaks"] = self.peaks
+            result["peak"] = self.peak
+        return result
+
+
+@contextlib.contextmanager
+def activate(timer):
+    global active_timer
+    previous, active_timer = active_timer, timer
+    try:
+        yield timer
+    finally:
+        active_timer = previous
+
+
+def stage(stats, name):
+    if stats is None:
+        return contextlib.nullcontext()
+    return stats.stage(name)
+
+
+def percentile(values, fraction):
+    # nearest rank on an already sorted list
+    if not values:
+        return 0.0
+    index = max(0, min(len(values) - 1, math.ceil(fraction * len(values)) - 1))
+    return values[index]
+
+
+def summarize(values):
+    values = sorted(values)
+    return {
+        "total": sum(values),
+        "mean": sum(values) / len(values) if values else 0.0,
+        "p50": percentile(values, 0.5),
+        "p90": percentile(values, 0.9),
+        "p99": percentile(values, 0.99),
+        "max": values[-1] if values else 0.0,
+    }
+
+
+class BuildStats:
+    """
+    Collects the stage timings of every page of a build, plus the
+    timings of build wide stages, and turns them into a report.
+
+    With track_memory it also collects peak memory per page and stage,
+    and warns or fails when a page goes over memory_budget bytes.
+    """
+
+    def __init__(self, track_memory=False, memory_budget=None, budget_action="warn"):
+        self.started = time.perf_counter()
+        self.track_memory = track_memory or memory_budget is not None
+        self.memory_budget = memory_budget
+        self.budget_action = budget_action
+        self.timer = StageTimer()
+        self.pages = []
+        # hits and misses of the block and inline caches, by cache
+        self.caches = {}
+
+    def stage(self, name):
+        return self.timer.stage(name)
+
+    def page_timer(self):
+        return StageTimer(self.track_memory)
+
+    def add_page(self, source_path, dest_path, result):
+        page = {
+            "source": source_path,
+            "dest": dest_path,
+            "total": sum(result["totals"].values()),
+            "stages": result["totals"],
+        }
+        if "peak" in result:
+            page["peak_memory"] = result["peak"]
+            page["stage_peak_memory"] = result["peaks"]
+        self.pages.append(page)
+        for name, (hits, misses) in result.get("caches", {}).items():
+            counters = self.caches.setdefault(name, [0, 0])
+            counters[0] += hits
+            counters[1] += misses
+        self.check_budget(page)
+
+    def check_budget(self, page):
+        if self.memory_budget is None or page["peak_memory"] <= self.memory_budget:
+            return
+        message = (
+            f"{page['source']} peaked at {page['peak_memory'] / 2**20:.1f} MB, "
+            f"over the memory budget of {self.memory_budget / 2**20:.1f} MB"
+        )
+        if self.budget_action == "fail":
+            raise RuntimeError(message)
+        print(f"Warning: {message}")
+
+    def report(self, slowest=10):
+        stages = {}
+        for name in page_stages:
+            timings = [page["stages"].get(name, 0.0) for page in self.pages]
+            stages[name] = summarize(timings)
+            if self.track_memory:
+                stages[name]["peak_memory"] = max(
+                    (page["stage_peak_memory"].get(name, 0) for page in self.pages),
+                    default=0,
+                )
+        for name in build_stages:
+            stages[name] = {"total": self.timer.totals.get(name, 0.0)}
+        pages = sorted(self.pages, key=lambda page: page["total"], reverse=True)
+        report = {
+            "wall_seconds": time.perf_counter() - self.started,
+            "page_count": len(self.pages),
+            "pages": summarize(page["total"] for page in self.pages),
+            "stages": stages,
+            "slowest_pages": pages[:slowest],
+        }
+        if self.track_memory:
+            pages = sorted(self.pages, key=lambda page: page["peak_memory"])
+            report["peak_memory"] = summarize(page["peak_memory"] for page in pages)
+            report["largest_pages"] = pages[::-1][:slowest]
+            report["memory_budget"] = self.memory_budget
+        if self.caches:
+            report["caches"] = {
+                name: {
+                    "hits": hits,
+                    "misses": misses,
+                    "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+                }
+                for name, (hits, misses) in self.caches.items()
+            }
+        return report
+
+    def save(self, path, slowest=10):
+        report = self.report(slowest)
+        with open(path, "w") as file:
+            json.dump(report, file, indent=2)
+        return report
+
+
+def print_report(report):
+    print(
+        f"Built {report['page_count']} pages in {report['wall_seconds']:.3f}s, "
+        f"p50 {report['pages']['p50'] * 1000:.2f}ms "
+        f"p99 {report['pages']['p99'] * 1000:.2f}ms per page"
+    )
+    for name, stage in report["stages"].items():
+        if "peak_memory" in stage:
+            peak = f" {stage['peak_memory'] / 2**20:>9.2f} MB peak"
+        else:
+            peak = ""
+        print(f" {name:<14} {stage['total']:>9.4f}s{peak}")
+    if "peak_memory" in report:
+        for page in report["largest_pages"][:3]:
+            megabytes = page["peak_memory"] / 2**20
+            print(f" large page {page['source']} {megabytes:.2f} MB peak")
+    for name, cache in report.get("caches", {}).items():
+        print(
+            f" {name + ' cache':<14} {cache['hits']} hits, {cache['misses']} misses "
+            f"({cache['hit_rate']:.0%})"
+        )
+    for page in report["slowest_pages"][:3]:
+        print(f" slow page {page['source']} {page['total'] * 1000:.2f}ms")
@@ -1,27 +1,42 @@
 import os
 import shutil
 
+from fastcopy import copy_files
+from generate_content import remove_output
+from ignore import build_matcher
+from inventory import kind_dir, scan
+from manifest import BuildManifest, hash_file
+from minify import minify_stylesheet
 
-def ignore():
+
+def ignore(path=".gitignore"):
+    # the lines of an ignore file, see ignore.compile_pattern
     try:
-        with open(".gitignore", "r") as f:
-            read = f.read().splitlines()
-            return [file.strip("/") for file in read if file]
+        with open(path, "r") as f:
+            return f.read().splitlines()
     except FileNotFoundError:
         return []
 
 
 def copy_contents_non_recursive(source, destination, ignore_list=None):
+    matcher = build_matcher(source, ignore_list)
 
-    for source_dir, _, files in os.walk(source):
-        destination_dir = os.path.join(destination, os.path.relpath(source_dir, source))
+    for source_dir, directories, files in os.walk(source):
+        relative_dir = os.path.relpath(source_dir, source)
+        destination_dir = os.path.join(destination, relative_dir)
         os.makedirs(destination_dir)
 
-        if ignore_list is not None:
+        if matcher is not None:
+            relative_dir = "" if relative_dir == "." else relative_dir
+            directories[:] = [
+                directory
+                for directory in directories
+                if not matcher.is_ignored(os.path.join(relative_dir, directory), True)
+            ]
             files = [
                 file
                 for file in files
-                if file not in ignore_list and not file.startswith((".", ""))
+                if not matcher.is_ignored(os.path.join(relative_dir, file))
             ]
 
         for file in files:
@@ -35,20 +50,93 @@ def copy_contents_recursive(source, destination, ignore_list=None):
     if not os.path.exists(destination):
         os.makedirs(destination)
 
-    directory_contents = os.listdir(source)
-    if ignore_list is not None:
-        directory_contents = [
-            file
-            for file in os.listdir(source)
-            if file not in ignore_list and not file.startswith((".", ""))
-        ]
-
-    for item in directory_contents:
-        source_path = os.path.join(source, item)
-        destination_path = os.path.join(destination, item)
-        print(f" {source_path} -> {destination_path}")
-
-        if os.path.isfile(source_path):
-            shutil.copy(source_path, destination_path)
+    inventory = scan(source)
+    matcher = build_matcher(source, ignore_list, inventory)
+    for entry in inventory.walk(matcher.skip if matcher else None):
+        destination_path = os.path.join(destination, entry.relpath)
+        print(f" {entry.path} -> {destination_path}")
+
+        if entry.kind == kind_dir:
+            os.makedirs(destination_path, exist_ok=True)
         else:
-            copy_contents_recursive(source_path, destination_path, ignore_list)
+            shutil.copy(entry.path, destination_path)
+
+
+def sync_contents(
+    source,
+    destination,
+    manifest_path,
+    use_hash=False,
+    mode="copy",
+    inventory=None,
+    ignore_list=None,
+    minify_css=False,
+):
+    """
+    Copies only the files of source that are missing from destination
+    or differ in size or mtime, and removes the files an earlier sync
+    copied whose source is gone. Unchanged files are left untouched.
+    With use_hash, files of the same size but another mtime are
+    compared by content before being copied again. Changed files are
+    copied on a thread pool, see fastcopy.copy_files. Files matched by
+    ignore_list are treated as if they did not exist. With minify_css,
+    stylesheets are minified as they are copied; as their outputs never
+    match the sources, those are compared with the source size and
+    mtime recorded in the manifest instead.
+    Returns the number of files copied, unchanged and removed.
+    """
+    if inventory is None:
+        inventory = scan(source)
+    matcher = build_matcher(source, ignore_list, inventory)
+    manifest = BuildManifest.load(manifest_path)
+    synced = {}
+    changed = []
+    directories = [destination]
+    unchanged = 0
+
+    for entry in inventory.walk(matcher.skip if matcher else None):
+        destination_file = os.path.normpath(os.path.join(destination, entry.relpath))
+        if entry.kind == kind_dir:
+            directories.append(destination_file)
+            continue
+        record = {"source": entry.path, "size": entry.size}
+        minify = minify_css and entry.name.endswith(".css")
+        if minify:
+            record["mtime_ns"] = entry.mtime_ns
+            record["minified"] = True
+        synced[destination_file] = record
+        try:
+            destination_stat = os.stat(destination_file)
+        except FileNotFoundError:
+            destination_stat = None
+
+        if minify:
+            if destination_stat is not None and (
+                manifest.static.get(destination_file) == record
+            ):
+                unchanged += 1
+                continue
+        elif destination_stat is not None and entry.size == destination_stat.st_size:
+            if entry.mtime_ns == destination_stat.st_mtime_ns or (
+                use_hash and hash_file(entry.path) == hash_file(destination_file)
+            ):
+                unchanged += 1
+                continue
+        print(f" {entry.path} -> {destination_file}")
+        changed.append((entry.path, destination_file, entry.size))
+    copied = copy_files(changed, mode, directories=directories).files
+    for _, destination_file, _ in changed:
+        if synced[destination_file].get("minified"):
+            minify_stylesheet(destination_file)
+
+    removed = 0
+    for destination_file in sorted(manifest.static):
+        if destination_file not in synced:
+            print(f"Removing stale file {destination_file}")
+            remove_output(destination_file, destination)
+            removed += 1
+
+    manifest.static = synced
+    manifest.save()
+    print(f"Copied {copied} static files, {unchanged} unchanged, {removed} removed")
+    return copied, unchanged, removed
@@ -0,0 +1,237 @@
+"""
+Serves the site straight from its sources while editing. Nothing is
+built up front: a page is rendered the first time it is requested and
+kept in memory until its markdown or the template changes.
+
+    python3 src/devserver.py --port 8888
+"""
+
+import argparse
+import hashlib
+import mimetypes
+import os
+import posixpath
+import sys
+import threading
+import urllib.parse
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from block_markdown import enable_block_cache, enable_inline_cache
+from generate_content import render_content
+from lru import LRUCache
+from template import load_template
+
+
+class CachedPage:
+    __slots__ = (
+        "size",
+        "mtime_ns",
+        "digest",
+        "template",
+        "title",
+        "content",
+        "body",
+    )
+
+    def __init__(self, size, mtime_ns, digest, template, title, content, body):
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.digest = digest
+        self.template = template
+        self.title = title
+        self.content = content
+        self.body = body
+
+
+class PageRenderer:
+    """
+    Maps request paths to markdown under content or files under static,
+    and renders pages on demand into an LRU of the last max_pages pages.
+    A page is rendered again when its size or mtime changed and its
+    content hash did too, or when the template changed.
+    """
+
+    def __init__(self, content, static, template_path, base_path="/", max_pages=1024):
+        self.content = content
+        self.static = static
+        self.template_path = template_path
+        self.base_path = base_path
+        self.pages = LRUCache(max_pages)
+        self.lock = threading.Lock()
+        self.template = None
+        self.template_stamp = None
+
+    def resolve(self, url_path):
+        """
+        Returns ("page", markdown path) or ("static", file path) for a
+        request path, None when nothing matches or the path is unsafe.
+        """
+        path = urllib.parse.unquote(urllib.parse.urlsplit(url_path).path)
+        if self.base_path != "/" and path.startswith(self.base_path):
+            path = "/" + path[len(self.base_path) :]
+        # every path stays below the directory it is served from
+        parts = [part for part in path.split("/") if part]
+        if any(part in (".", "..") or "\\" in part for part in parts):
+            return None
+        relpath = posixpath.join(*parts) if parts else ""
+
+        if path.endswith("/") or not parts:
+            candidates = [posixpath.join(relpath, "index.md")]
+        elif relpath.endswith(".html"):
+            candidates = [relpath[:-5] + ".md"]
+        else:
+            candidates = [relpath + ".md", posixpath.join(relpath, "index.md")]
+        for candidate in candidates:
+            source = os.path.join(self.content, candidate)
+            if os.path.isfile(source):
+                return "page", source
+
+        source = os.path.join(self.static, relpath)
+        if parts and os.path.isfile(source):
+            return "static", source
+        return None
+
+    def current_template(self):
+        stat = os.stat(self.template_path)
+        stamp = (stat.st_size, stat.st_mtime_ns)
+        with self.lock:
+            if stamp != self.template_stamp:
+                self.template = load_template(self.template_path, self.base_path)
+                self.template_stamp = stamp
+            return self.template
+
+    def render(self, source):
+        """
+        Returns the page for a markdown file as utf-8 bytes.
+        """
+        template = self.current_template()
+        stat = os.stat(source)
+        page = self.pages.get(source)
+        if (
+            page is not None
+            and page.template is template
+            and (page.size, page.mtime_ns) == (stat.st_size, stat.st_mtime_ns)
+        ):
+            return page.body
+
+        with open(source, "r") as file:
+            markdown = file.read()
+        digest = hashlib.sha256(markdown.encode()).digest()
+        if page is not None and page.digest == digest:
+            # touched but not changed, only the template may need applying
+            title, content, body = page.title, page.content, page.body
+            if page.template is not template:
+                body = (template.render(title, content) + "\n").encode()
+        else:
+            title, content = render_content(markdown)
+            body = (template.render(title, content) + "\n").encode()
+
+        page = CachedPage(
+            stat.st_size, stat.st_mtime_ns, digest, template, title, content, body
+        )
+        self.pages.put(source, page)
+        return body
+
+
+class DevRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    renderer = None
+
+    def do_GET(self):
+        self.respond(send_body=True)
+
+    def do_HEAD(self):
+        self.respond(send_body=False)
+
+    def respond(self, send_body):
+        match = self.renderer.resolve(self.path)
+        if match is None:
+            self.send_text(HTTPStatus.NOT_FOUND, "Not found\n", send_body)
+            return
+        kind, source = match
+        try:
+            if kind == "page":
+                body = self.renderer.render(source)
+                content_type = "text/html; charset=utf-8"
+            else:
+                with open(source, "rb") as file:
+                    body = file.read()
+                content_type = mimetypes.guess_type(source)[0]
+        except ValueError as error:
+            # broken markdown is shown rather than ending the request badly
+            message = f"Can not render {source}: {error}\n"
+            self.send_text(HTTPStatus.INTERNAL_SERVER_ERROR, message, send_body)
+            return
+
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", content_type or "application/octet-stream")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def send_text(self, status, text, send_body):
+        body = text.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+
+def make_server(renderer, host="127.0.0.1", port=8888):
+    handler = type("Handler", (DevRequestHandler,), {"renderer": renderer})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the site from its sources.")
+    parser.add_argument(
+        "base_path", nargs="?", default="/", help="path the site is served from"
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8888)
+    parser.add_argument(
+        "--max-pages",
+        type=int,
+        default=1024,
+        help="rendered pages kept in memory (default: 1024)",
+    )
+    parser.add_argument(
+        "--block-cache",
+        type=int,
+        default=4096,
+        metavar="N",
+        help="reuse the html of the last N distinct blocks, so an edit only "
+        "renders the blocks it touched (default: 4096, 0 to turn off)",
+    )
+    parser.add_argument(
+        "--inline-cache",
+        type=int,
+        default=0,
+        metavar="N",
+        help="reuse the html of the last N distinct inline texts (default: off)",
+    )
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+
+    enable_block_cache(args.block_cache)
+    enable_inline_cache(args.inline_cache)
+    renderer = PageRenderer(
+        "./content", "./static", "./template.html", args.base_path, args.max_pages
+    )
+    server = make_server(renderer, args.host, args.port)
+    url = f"http://{args.host}:{server.server_port}{args.base_path}"
+    print(f"Serving ./content on {url}, pages render on first request")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
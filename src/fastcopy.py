@@ -0,0 +1,192 @@
+"""
+Copies files on a thread pool, keeping the data inside the kernel where
+the platform allows it, or links them instead of copying at all.
+"""
+
+import errno
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from inventory import kind_dir, scan
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+copy_modes = ("copy", "hardlink", "reflink")
+
+# the linux ioctl that makes a copy on write clone of a whole file
+FICLONE = 0x40049409
+
+# errors meaning a fast path is not available for these two files,
+# as opposed to a failure to read or write them
+unsupported_errors = {
+    errno.EXDEV,
+    errno.ENOSYS,
+    errno.EINVAL,
+    errno.ENOTTY,
+    errno.EOPNOTSUPP,
+    getattr(errno, "ENOTSUP", errno.EOPNOTSUPP),
+    errno.EPERM,
+}
+
+chunk_size = 1 << 30
+
+
+class CopyStats:
+    def __init__(self, files=0, size=0, linked=0, seconds=0.0):
+        self.files = files
+        self.size = size
+        self.linked = linked
+        self.seconds = seconds
+
+    def throughput(self):
+        # in megabytes per second
+        if not self.seconds:
+            return 0.0
+        return self.size / 2**20 / self.seconds
+
+    def summary(self):
+        linked = f", {self.linked} linked" if self.linked else ""
+        return (
+            f"Copied {self.files} files{linked}, {self.size / 2**20:.1f} MB "
+            f"in {self.seconds:.2f}s ({self.throughput():.1f} MB/s)"
+        )
+
+
+def kernel_copy(source_fd, destination_fd):
+    """
+    Copies from the current position of source_fd to destination_fd
+    with copy_file_range, falling back to sendfile. Returns False, with
+    nothing written, when neither works for these files.
+    """
+    copied = 0
+    if hasattr(os, "copy_file_range"):
+        try:
+            while os.copy_file_range(source_fd, destination_fd, chunk_size):
+                copied += 1
+            return True
+        except OSError as error:
+            if copied or error.errno not in unsupported_errors:
+                raise
+
+    if hasattr(os, "sendfile"):
+        offset = os.lseek(source_fd, 0, os.SEEK_CUR)
+        try:
+            while True:
+                sent = os.sendfile(destination_fd, source_fd, offset, chunk_size)
+                if not sent:
+                    return True
+                offset += sent
+                copied += 1
+        except OSError as error:
+            if copied or error.errno not in unsupported_errors:
+                raise
+    return False
+
+
+def copy_data(source_path, destination_path):
+    with open(source_path, "rb") as source, open(destination_path, "wb") as destination:
+        if not kernel_copy(source.fileno(), destination.fileno()):
+            shutil.copyfileobj(source, destination, 1 << 20)
+    shutil.copystat(source_path, destination_path)
+
+
+def reflink(source_path, destination_path):
+    if fcntl is None:
+        return False
+    with open(source_path, "rb") as source, open(destination_path, "wb") as destination:
+        try:
+            fcntl.ioctl(destination.fileno(), FICLONE, source.fileno())
+        except OSError as error:
+            if error.errno not in unsupported_errors:
+                raise
+            return False
+    shutil.copystat(source_path, destination_path)
+    return True
+
+
+def hardlink(source_path, destination_path):
+    if os.path.lexists(destination_path):
+        os.remove(destination_path)
+    try:
+        os.link(source_path, destination_path)
+    except OSError as error:
+        if error.errno not in unsupported_errors:
+            raise
+        return False
+    return True
+
+
+def copy_file(source_path, destination_path, mode="copy"):
+    """
+    Copies one file, keeping its mtime, and returns True when it was
+    linked rather than copied. Links fall back to a copy when the file
+    system can not make them.
+    """
+    if mode == "hardlink" and hardlink(source_path, destination_path):
+        return True
+    if mode == "reflink" and reflink(source_path, destination_path):
+        return True
+    copy_data(source_path, destination_path)
+    return False
+
+
+def copy_files(pairs, mode="copy", workers=None, directories=()):
+    """
+    Copies (source path, destination path) pairs on a pool of threads.
+    A pair may carry the size of its source as a third item, when an
+    inventory already knows it, otherwise the worker takes it. Every
+    destination directory is created up front, once.
+    Returns a CopyStats.
+    """
+    if mode not in copy_modes:
+        raise ValueError(f"Unknown copy mode: {mode}")
+    started = time.perf_counter()
+    pairs = list(pairs)
+
+    needed = set(directories)
+    needed.update(os.path.dirname(pair[1]) for pair in pairs)
+    for directory in sorted(needed):
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def copy_pair(pair):
+        linked = copy_file(pair[0], pair[1], mode)
+        size = pair[2] if len(pair) > 2 else os.path.getsize(pair[0])
+        return linked, size
+
+    stats = CopyStats()
+    if pairs:
+        workers = workers or min(32, (os.cpu_count() or 1) * 4)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for linked, size in executor.map(copy_pair, pairs):
+                stats.files += 1
+                stats.linked += linked
+                stats.size += size
+    stats.seconds = time.perf_counter() - started
+    return stats
+
+
+def copy_tree(
+    source, destination, mode="copy", workers=None, inventory=None, skip=None
+):
+    """
+    Copies the whole source directory into destination, empty
+    directories included, and returns a CopyStats. Entries skip returns
+    True for are left out, see Inventory.walk.
+    """
+    if inventory is None:
+        inventory = scan(source)
+    pairs = []
+    directories = [destination]
+    for entry in inventory.walk(skip):
+        destination_path = os.path.join(destination, entry.relpath)
+        if entry.kind == kind_dir:
+            directories.append(destination_path)
+        else:
+            pairs.append((entry.path, destination_path, entry.size))
+    return copy_files(pairs, mode, workers, directories)
@@ -1,6 +1,16 @@
 import os
 import re
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+import block_markdown
+import buildstats
 from block_markdown import markdown_to_html_node
+from buildstats import StageTimer, stage
+from ignore import build_matcher
+from inventory import kind_dir, kind_file, scan
+from manifest import BuildManifest, hash_file, page_record
+from template import load_template, minify_enabled
 
 
 def extract_title(markdown):
@@ -14,51 +24,357 @@ def extract_title(markdown):
     raise ValueError("No title found")
 
 
-def generate_page(from_path, template_path, dest_path,base_path="/"):
+def generate_page(
+    from_path,
+    template_path,
+    dest_path,
+    base_path="/",
+    template=None,
+    timer=None,
+    cache=None,
+):
     print(f"Generating page from {from_path} to {dest_path} using {template_path}")
-    with open(from_path, "r") as file:
-        src_file = file.read()
+    if template is None:
+        template = load_template(template_path, base_path)
+    title = write_page(from_path, template, dest_path, timer, cache)
+    print(f"Generated {title} at {dest_path}")
 
-    with open(template_path, "r") as file:
-        template = file.read()
 
-    title = extract_title(src_file)
-    node = markdown_to_html_node(src_file)
-    content = node.to_html()
+def write_page(from_path, template, dest_path, timer=None, cache=None):
+    if timer is not None:
+        return write_page_timed(from_path, template, dest_path, timer, cache)
+
+    with open(from_path, "r") as file:
+        src_file = file.read()
 
-    template = template.replace("{{ Title }}", title).replace("{{ Content }}", content).replace('href="/', f'href="{base_path}').replace('src="/', f'src="{base_path}')
+    cached = cache.get(src_file) if cache is not None else None
+    if cached is not None:
+        title, content = cached
+    else:
+        title = extract_title(src_file)
+        content = markdown_to_html_node(src_file)
+        if cache is not None:
+            content = content.to_html()
+            cache.put(src_file, title, content)
 
-
+    # the content html is serialized straight into the file
     with open(dest_path, "w") as file:
-        file.write(template)
+        template.write(file, title, content)
         file.write("\n")
-    print(f"Generated {title} at {dest_path}")
+    return title
+
+
+def render_content(markdown, cache=None):
+    # the title and content html of a page, without the template
+    cached = cache.get(markdown) if cache is not None else None
+    if cached is not None:
+        return cached
+    title = extract_title(markdown)
+    content = markdown_to_html_node(markdown).to_html()
+    if cache is not None:
+        cache.put(markdown, title, content)
+    return title, content
+
+
+def write_page_timed(from_path, template, dest_path, timer, cache=None):
+    # renders the page in separate steps so that each stage can be timed
+    with buildstats.activate(timer):
+        with timer.stage("read"):
+            with open(from_path, "r") as file:
+                src_file = file.read()
+            cached = cache.get(src_file) if cache is not None else None
+
+        if cached is not None:
+            title, content = cached
+        else:
+            with timer.stage("parse_blocks"):
+                title = extract_title(src_file)
+                node = markdown_to_html_node(src_file)
+
+            with timer.stage("serialize"):
+                content = node.to_html()
+
+            if cache is not None:
+                # storing the render is not part of any stage of the page
+                cache.put(src_file, title, content)
+
+        with timer.stage("template"):
+            page = template.render(title, content)
+
+        with timer.stage("write"):
+            with open(dest_path, "w") as file:
+                file.write(page)
+                file.write("\n")
+    return title
+
+
+# the compiled template of the build, handed to each worker process once
+worker_template = None
+worker_profile = False
+worker_track_memory = False
+worker_cache = None
+
+
+def init_worker(
+    template, profile=False, track_memory=False, cache=None, cache_sizes=None
+):
+    global worker_template, worker_profile, worker_track_memory, worker_cache
+    worker_template = template
+    worker_profile = profile
+    worker_track_memory = track_memory
+    worker_cache = cache
+    # each worker keeps block and inline caches of the same size as the parent's
+    cache_sizes = cache_sizes or {}
+    block_markdown.enable_block_cache(cache_sizes.get("block"))
+    block_markdown.enable_inline_cache(cache_sizes.get("inline"))
+    if track_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def write_page_in_worker(from_path, dest_path):
+    timer = StageTimer(worker_track_memory) if worker_profile else None
+    counters = cache_counters()
+    title = write_page(from_path, worker_template, dest_path, timer, worker_cache)
+    return title, page_result(timer, counters) if timer else None
+
 
+def render_content_in_worker(markdown):
+    return render_content(markdown, worker_cache)
 
-def generate_pages_recursive(dir_path_content, dest_dir_path, template_path, base_path= "/", ignore_list=None):
+
+def cache_sizes():
+    return {
+        name: cache.max_size for name, cache in block_markdown.memo_caches().items()
+    }
+
+
+def cache_counters():
+    return {
+        name: (cache.hits, cache.misses)
+        for name, cache in block_markdown.memo_caches().items()
+    }
+
+
+def page_result(timer, counters):
+    # the timings of a page, plus the cache hits and misses it caused
+    result = timer.result()
+    result["caches"] = {
+        name: (hits - counters[name][0], misses - counters[name][1])
+        for name, (hits, misses) in cache_counters().items()
+    }
+    return result
+
+
+def build_pages(pages, template_path, base_path="/", workers=1, stats=None, cache=None):
+    """
+    Renders (source path, destination path) pairs, serially or on a
+    pool of worker processes. Logging and errors are reported in page
+    order either way, so a parallel build reads like a serial one.
+    With stats, the stage timings of every page are added to it, and
+    with memory tracking on it the peak memory of every page too.
+    With a render cache, pages whose markdown was rendered before are
+    not parsed again.
+    """
+    for directory in sorted({os.path.dirname(dest) for _, dest in pages}):
+        os.makedirs(directory, exist_ok=True)
+
+    if not pages:
+        return
+    template = load_template(template_path, base_path)
+
+    if workers <= 1 or len(pages) <= 1:
+        for source_content, dest_content in pages:
+            timer = stats.page_timer() if stats is not None else None
+            counters = cache_counters()
+            generate_page(
+                source_content,
+                template_path,
+                dest_content,
+                base_path,
+                template,
+                timer,
+                cache,
+            )
+            if stats is not None:
+                result = page_result(timer, counters)
+                stats.add_page(source_content, dest_content, result)
+        return
+
+    chunksize = max(1, len(pages) // (workers * 4))
+    executor = ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=init_worker,
+        initargs=(
+            template,
+            stats is not None,
+            stats is not None and stats.track_memory,
+            cache,
+            cache_sizes(),
+        ),
+    )
+    try:
+        results = executor.map(
+            write_page_in_worker,
+            [source_content for source_content, _ in pages],
+            [dest_content for _, dest_content in pages],
+            chunksize=chunksize,
+        )
+        for source_content, dest_content in pages:
+            print(
+                f"Generating page from {source_content} to {dest_content} using {template_path}"
+            )
+            title, result = next(results)
+            print(f"Generated {title} at {dest_content}")
+            if stats is not None:
+                stats.add_page(source_content, dest_content, result)
+    finally:
+        # stop pending pages from rendering once one of them has failed
+        executor.shutdown(cancel_futures=True)
+
+
+def generate_pages_recursive(
+    dir_path_content,
+    dest_dir_path,
+    template_path,
+    base_path="/",
+    ignore_list=None,
+    template=None,
+    cache=None,
+    inventory=None,
+):
+
+    # read and compile the template once for the whole tree
+    if template is None:
+        template = load_template(template_path, base_path)
+    if inventory is None:
+        inventory = scan(dir_path_content)
+    matcher = build_matcher(dir_path_content, ignore_list, inventory)
 
     if not os.path.exists(dest_dir_path):
         os.makedirs(dest_dir_path)
 
-    directory_contents = os.listdir(dir_path_content)
-    if ignore_list is not None:
-        directory_contents = [
-            file
-            for file in os.listdir(dir_path_content)
-            if file not in ignore_list and not file.startswith((".", ""))
-        ]
-
-    for item in directory_contents:
-        source_content = os.path.join(dir_path_content, item)
-        dest_content = os.path.join(dest_dir_path, item)
+    for entry in inventory.walk(matcher.skip if matcher else None):
+        source_content = entry.path
+        dest_content = os.path.join(dest_dir_path, entry.relpath)
         print(f" {source_content} -> {dest_content}")
 
-        if os.path.isfile(source_content) and source_content.endswith(".md"):
+        if entry.kind == kind_file and source_content.endswith(".md"):
             dest_content = dest_content[:-3] + ".html"
-            generate_page(source_content, template_path, dest_content, base_path)
-        elif os.path.isdir(source_content):
-            generate_pages_recursive(
-                source_content, dest_content, template_path, base_path, ignore_list
-                )
+            generate_page(
+                source_content,
+                template_path,
+                dest_content,
+                base_path,
+                template,
+                cache=cache,
+            )
+        elif entry.kind == kind_dir:
+            os.makedirs(dest_content, exist_ok=True)
         else:
             print(f"Non-markdown content detect: {source_content}")
+
+
+def discover_pages(dir_path_content, dest_dir_path, ignore_list=None, inventory=None):
+    """
+    Collects every markdown file below dir_path_content as a
+    (source path, destination path) pair, in a stable order.
+    ignore_list holds gitignore style patterns, see ignore.build_matcher.
+    """
+    if inventory is None:
+        inventory = scan(dir_path_content)
+    matcher = build_matcher(dir_path_content, ignore_list, inventory)
+    pages = []
+    for entry in inventory.files(matcher.skip if matcher else None):
+        if entry.name.endswith(".md"):
+            dest_content = os.path.join(dest_dir_path, entry.relpath)
+            pages.append((entry.path, dest_content[:-3] + ".html"))
+    return pages
+
+
+def generate_pages_parallel(
+    dir_path_content,
+    dest_dir_path,
+    template_path,
+    base_path="/",
+    ignore_list=None,
+    workers=None,
+    stats=None,
+    cache=None,
+    inventory=None,
+):
+    """
+    Discovers every page up front, then renders them on a process pool
+    with one worker per cpu core unless told otherwise.
+    """
+    with stage(stats, "discover"):
+        pages = discover_pages(dir_path_content, dest_dir_path, ignore_list, inventory)
+    os.makedirs(dest_dir_path, exist_ok=True)
+    build_pages(
+        pages, template_path, base_path, workers or os.cpu_count() or 1, stats, cache
+    )
+    return len(pages)
+
+
+def remove_output(dest_path, dest_dir_path):
+    if os.path.exists(dest_path):
+        os.remove(dest_path)
+    # prune directories left empty, but never the output root itself
+    root = os.path.abspath(dest_dir_path)
+    directory = os.path.dirname(os.path.abspath(dest_path))
+    while directory != root and directory.startswith(root + os.sep):
+        try:
+            os.rmdir(directory)
+        except OSError:
+            break
+        directory = os.path.dirname(directory)
+
+
+def generate_pages_incremental(
+    dir_path_content,
+    dest_dir_path,
+    template_path,
+    base_path="/",
+    manifest_path=".build-manifest.json",
+    ignore_list=None,
+    workers=1,
+    stats=None,
+    cache=None,
+    inventory=None,
+):
+    """
+    Renders only the pages whose markdown, template, base path, minify
+    setting or generator version changed since the build recorded in
+    the manifest, and deletes the outputs of markdown files that no
+    longer exist.
+    Returns the number of pages rendered.
+    """
+    with stage(stats, "discover"):
+        manifest = BuildManifest.load(manifest_path)
+        template_hash = hash_file(template_path)
+
+        pages = {}
+        stale_pages = []
+        for source_content, dest_content in discover_pages(
+            dir_path_content, dest_dir_path, ignore_list, inventory
+        ):
+            record = page_record(
+                source_content,
+                hash_file(source_content),
+                template_hash,
+                base_path,
+                minify_enabled(),
+            )
+            pages[dest_content] = record
+            if not manifest.is_fresh(dest_content, record):
+                stale_pages.append((source_content, dest_content))
+
+    build_pages(stale_pages, template_path, base_path, workers, stats, cache)
+
+    for dest_content in manifest.removed_outputs(pages):
+        print(f"Removing stale page {dest_content}")
+        remove_output(dest_content, dest_dir_path)
+
+    manifest.pages = pages
+    manifest.save()
+    print(f"Rendered {len(stale_pages)} of {len(pages)} pages")
+    return len(stale_pages)
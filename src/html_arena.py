@@ -0,0 +1,198 @@
+import io
+from array import array
+
+from htmlnode import LeafNode, ParentNode
+
+
+def props_to_html(props):
+    if props is None:
+        return ""
+    html_props = ""
+    for prop in props.keys():
+        html_props += f' {prop}="{props[prop]}"'
+    return html_props
+
+
+class HTMLArena:
+    """
+    An html tree stored as parallel arrays indexed by node id instead of
+    one object per node. Tag names are interned, leaf values are slices
+    of one text buffer and children are linked through first child and
+    next sibling ids, -1 meaning none. Node 0 is the root.
+    """
+
+    def __init__(self):
+        self.tags = [None]
+        self.tag_ids = {None: 0}
+        self.props = []
+
+        self.node_tags = array("i")
+        # leaf values as offset and length into the text buffer,
+        # parent nodes have an offset of -1
+        self.value_starts = array("q")
+        self.value_lengths = array("q")
+        self.first_child = array("i")
+        self.next_sibling = array("i")
+        self.last_child = array("i")
+        self.node_props = array("i")
+
+        # leaf values are copied into one buffer as they are added,
+        # rather than kept alive as one string object each
+        self.chunks = io.StringIO()
+        self.length = 0
+        self.buffer = ""
+
+    def __len__(self):
+        return len(self.node_tags)
+
+    def add_parent(self, parent, tag, props=None):
+        return self.add(parent, tag, -1, 0, props)
+
+    def add_leaf(self, parent, tag, value, props=None):
+        if value is None:
+            raise ValueError("Leafnode must have a value")
+        start = self.length
+        self.chunks.write(value)
+        self.length += len(value)
+        return self.add(parent, tag, start, len(value), props)
+
+    def add(self, parent, tag, value_start, value_length, props):
+        node = len(self.node_tags)
+        tag_id = self.tag_ids.get(tag)
+        if tag_id is None:
+            tag_id = self.tag_ids[tag] = len(self.tags)
+            self.tags.append(tag)
+        self.node_tags.append(tag_id)
+        self.value_starts.append(value_start)
+        self.value_lengths.append(value_length)
+        self.first_child.append(-1)
+        self.next_sibling.append(-1)
+        self.last_child.append(-1)
+        if props:
+            self.node_props.append(len(self.props))
+            self.props.append(props)
+        else:
+            self.node_props.append(-1)
+
+        if parent >= 0:
+            previous = self.last_child[parent]
+            if previous < 0:
+                self.first_child[parent] = node
+            else:
+                self.next_sibling[previous] = node
+            self.last_child[parent] = node
+        return node
+
+    def append_node(self, parent, html_node):
+        """
+        Copies an HTMLNode tree below parent and returns the new node id.
+        """
+        if not isinstance(html_node, ParentNode):
+            return self.add_leaf(
+                parent, html_node.tag, html_node.value, html_node.props
+            )
+        root = self.add_parent(parent, html_node.tag, html_node.props)
+        pending = [(root, html_node.children or ())]
+        while pending:
+            node, children = pending.pop()
+            for child in children:
+                if isinstance(child, ParentNode):
+                    # the child takes its place among its siblings now,
+                    # its own children are copied later
+                    child_node = self.add_parent(node, child.tag, child.props)
+                    pending.append((child_node, child.children or ()))
+                else:
+                    self.add_leaf(node, child.tag, child.value, child.props)
+        return root
+
+    @classmethod
+    def from_node(cls, html_node):
+        arena = cls()
+        arena.append_node(-1, html_node)
+        return arena
+
+    def text(self):
+        if len(self.buffer) != self.length:
+            self.buffer = self.chunks.getvalue()
+        return self.buffer
+
+    def children(self, node):
+        child = self.first_child[node]
+        while child >= 0:
+            yield child
+            child = self.next_sibling[child]
+
+    def open_tag(self, node):
+        index = self.node_props[node]
+        props = props_to_html(self.props[index]) if index >= 0 else ""
+        return f"<{self.tags[self.node_tags[node]]}{props}>"
+
+    def iter_html(self, node=0):
+        """
+        Yields the html of node and its subtree, walking the arrays
+        iteratively so the depth of the tree does not matter.
+        """
+        text = self.text()
+        tags = self.tags
+        open_parents = []
+        while True:
+            tag = tags[self.node_tags[node]]
+            start = self.value_starts[node]
+            if start < 0:
+                if tag is None:
+                    raise ValueError("ParentNode must have a tag")
+                child = self.first_child[node]
+                if child < 0:
+                    raise ValueError("ParentNode must have children")
+                yield self.open_tag(node)
+                open_parents.append(node)
+                node = child
+                continue
+
+            value = text[start : start + self.value_lengths[node]]
+            yield f"{self.open_tag(node)}{value}</{tag}>" if tag else value
+
+            # climb up to the next node that has a sibling left
+            while True:
+                if not open_parents:
+                    return
+                sibling = self.next_sibling[node]
+                if sibling >= 0:
+                    node = sibling
+                    break
+                node = open_parents.pop()
+                yield f"</{tags[self.node_tags[node]]}>"
+
+    def to_html(self, node=0):
+        return "".join(self.iter_html(node))
+
+    def write_html(self, stream, node=0):
+        write = stream.write
+        for fragment in self.iter_html(node):
+            write(fragment)
+
+    def to_node(self, node=0):
+        """
+        Builds the equivalent HTMLNode tree, for code that expects one.
+        """
+        order = []
+        pending = [node]
+        while pending:
+            current = pending.pop()
+            order.append(current)
+            pending.extend(self.children(current))
+
+        text = self.text()
+        built = {}
+        for current in reversed(order):
+            tag = self.tags[self.node_tags[current]]
+            index = self.node_props[current]
+            props = self.props[index] if index >= 0 else None
+            start = self.value_starts[current]
+            if start < 0:
+                children = [built.pop(child) for child in self.children(current)]
+                built[current] = ParentNode(tag, children, props)
+            else:
+                value = text[start : start + self.value_lengths[current]]
+                built[current] = LeafNode(tag, value, props)
+        return built[node]
@@ -1,4 +1,7 @@
 class HTMLNode:
+    # slots keep nodes small, there can be hundreds of thousands of them
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
         self.tag = tag
         self.value = value
@@ -6,8 +9,18 @@ class HTMLNode:
         self.props = props
 
     def to_html(self):
+        return "".join(self.iter_html())
+
+    def iter_html(self):
         raise NotImplementedError("to_html is not implemented")
 
+    def write_html(self, stream):
+        # writes fragments as they are produced, the full html
+        # of the node is never held in memory
+        write = stream.write
+        for fragment in self.iter_html():
+            write(fragment)
+
     def props_to_html(self):
         if self.props == None:
             return ""
@@ -21,13 +34,24 @@ class HTMLNode:
 
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, value, props=None):
-        super().__init__(tag, value, None, props)
+        self.tag = tag
+        self.value = value
+        self.props = props
+
+    # children is read only and always None, only writing to it is checked
+    @property
+    def children(self):
+        return None
 
-    def __setattr__(self, name, value):
-        if name == "children" and hasattr(self, "children"):
-            raise AttributeError("LeafNode cannot have a children")
-        super().__setattr__(name, value)
+    @children.setter
+    def children(self, value):
+        raise AttributeError("LeafNode cannot have a children")
+
+    def __reduce__(self):
+        return (LeafNode, (self.tag, self.value, self.props))
 
     def to_html(self):
         if self.value == None:
@@ -36,30 +60,62 @@ class LeafNode(HTMLNode):
             return f"{self.value}"
         return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
 
+    def iter_html(self):
+        yield self.to_html()
+
     def __repr__(self):
         return f"LeafNode({self.tag}, {self.value}, {self.props})"
 
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, children, props=None):
-        super().__init__(tag, None, children, props)
+        self.tag = tag
+        self.children = children
+        self.props = props
 
-    def __setattr__(self, name, value):
-        if name == "value" and hasattr(self, "value"):
-            raise AttributeError("ParentNode cannot have a value")
-        super().__setattr__(name, value)
+    # value is read only and always None, only writing to it is checked
+    @property
+    def value(self):
+        return None
 
-    def to_html(self):
+    @value.setter
+    def value(self, value):
+        raise AttributeError("ParentNode cannot have a value")
+
+    def __reduce__(self):
+        return (ParentNode, (self.tag, self.children, self.props))
+
+    def iter_html(self):
+        self.check()
+        yield f"<{self.tag}{self.props_to_html()}>"
+        # walk the tree with an explicit stack instead of recursing,
+        # so no level copies the html of its descendants and deep
+        # trees do not run into the recursion limit
+        stack = [(self.tag, iter(self.children))]
+        while stack:
+            tag, children = stack[-1]
+            for child in children:
+                if isinstance(child, ParentNode):
+                    child.check()
+                    yield f"<{child.tag}{child.props_to_html()}>"
+                    stack.append((child.tag, iter(child.children)))
+                    break
+                if isinstance(child, LeafNode):
+                    yield child.to_html()
+                else:
+                    yield from child.iter_html()
+            else:
+                stack.pop()
+                yield f"</{tag}>"
+
+    def check(self):
         if self.tag is None:
             raise ValueError("ParentNode must have a tag")
         # ensure that an empty list is counted as having no children
         if not self.children:
             raise ValueError("ParentNode must have children")
-        children_html = ""
-        for child in self.children:
-            children_html += child.to_html()
-
-        return f"<{self.tag}{self.props_to_html()}>{children_html}</{self.tag}>"
 
     def __repr__(self):
         return f"ParentNode({self.tag}, children: {self.children}, {self.props})"
@@ -0,0 +1,211 @@
+"""
+Decides which files of a tree a build leaves out, with the semantics of
+.gitignore files: globs, "**", "!" negation, directory only patterns
+and ignore files nested in sub directories.
+"""
+
+import os
+import re
+
+from inventory import kind_dir
+
+ignore_filename = ".gitignore"
+
+# names a build leaves out unless a pattern says otherwise
+default_patterns = (".*",)
+
+
+class Pattern:
+    def __init__(self, regex, negated, dir_only):
+        self.regex = regex
+        self.negated = negated
+        self.dir_only = dir_only
+
+
+def compile_pattern(line):
+    """
+    Compiles one line of an ignore file, None for blanks and comments.
+    The regex matches paths relative to the directory of the file.
+    """
+    # trailing spaces are dropped unless escaped
+    line = line.rstrip("\n")
+    stripped = line.rstrip(" ")
+    if stripped.endswith("\\") and len(stripped) < len(line):
+        stripped += " "
+    line = stripped
+    if not line or line.startswith("#"):
+        return None
+
+    negated = line.startswith("!")
+    if negated:
+        line = line[1:]
+    elif line.startswith(("\\!", "\\#")):
+        line = line[1:]
+
+    dir_only = line.endswith("/")
+    line = line.rstrip("/")
+    if not line:
+        return None
+
+    # a pattern with a slash other than at its end is relative to the
+    # ignore file, one without matches a name at any depth
+    if "/" in line:
+        regex = translate_glob(line.lstrip("/"))
+    else:
+        regex = "(?:.*/)?" + translate_glob(line)
+    return Pattern(re.compile(regex, re.DOTALL), negated, dir_only)
+
+
+def translate_glob(glob):
+    parts = []
+    index = 0
+    while index < len(glob):
+        char = glob[index]
+        if glob.startswith("**", index) and (index == 0 or glob[index - 1] == "/"):
+            end = index + 2
+            if glob.startswith("/", end):
+                # "**/" matches no directory or any number of them
+                parts.append("(?:.*/)?")
+                index = end + 1
+                continue
+            if end == len(glob):
+                parts.append(".*")
+                index = end
+                continue
+        if char == "*":
+            while glob.startswith("*", index + 1):
+                index += 1
+            parts.append("[^/]*")
+        elif char == "?":
+            parts.append("[^/]")
+        elif char == "[":
+            end = glob.find("]", index + 2)
+            if end < 0:
+                parts.append(re.escape(char))
+            else:
+                members = glob[index + 1 : end]
+                if members.startswith("!"):
+                    members = "^" + members[1:]
+                parts.append("[" + members.replace("\\", "\\\\") + "]")
+                index = end
+        elif char == "\\" and index + 1 < len(glob):
+            index += 1
+            parts.append(re.escape(glob[index]))
+        else:
+            parts.append(re.escape(char))
+        index += 1
+    return "".join(parts)
+
+
+class IgnoreRules:
+    """
+    The patterns of one ignore file, plus one regex joining them all
+    so that paths none of them match are rejected in a single step.
+    """
+
+    def __init__(self, base, lines):
+        self.base = base
+        self.patterns = [
+            pattern for pattern in map(compile_pattern, lines) if pattern is not None
+        ]
+        self.any = re.compile(
+            "|".join(f"(?:{pattern.regex.pattern})" for pattern in self.patterns)
+            or "(?!)",
+            re.DOTALL,
+        )
+
+    def match(self, relpath, is_dir):
+        """
+        Returns True if relpath is ignored, False if it is re-included
+        by a negated pattern and None if no pattern matches it.
+        """
+        if self.base:
+            relpath = relpath[len(self.base) + 1 :]
+        if not self.any.fullmatch(relpath):
+            return None
+        # the last matching pattern wins
+        for pattern in reversed(self.patterns):
+            if pattern.dir_only and not is_dir:
+                continue
+            if pattern.regex.fullmatch(relpath):
+                return not pattern.negated
+        return None
+
+
+class IgnoreMatcher:
+    """
+    Answers whether a path below root is ignored, given patterns for
+    the root and the ignore files found in root and its sub directories.
+    Patterns of deeper files win over those of the directories above,
+    and nothing below an ignored directory is ever included again.
+    The rules that apply in a directory are collected once per directory.
+    """
+
+    def __init__(self, root, patterns=(), filename=ignore_filename, inventory=None):
+        self.root = root
+        self.filename = filename
+        self.inventory = inventory
+        self.base_rules = IgnoreRules("", patterns)
+        self.rules = {}
+        self.ignored_directories = {"": False}
+
+    def read_rules(self, directory):
+        relpath = os.path.join(directory, self.filename)
+        if self.inventory is not None and relpath not in self.inventory:
+            return None
+        try:
+            with open(os.path.join(self.root, relpath), "r") as file:
+                return IgnoreRules(directory, file.read().splitlines())
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+
+    def rules_for(self, directory):
+        # the rules in force for the entries of directory, deepest last
+        rules = self.rules.get(directory)
+        if rules is None:
+            if directory:
+                rules = list(self.rules_for(os.path.dirname(directory)))
+            else:
+                rules = [self.base_rules]
+            nested = self.read_rules(directory)
+            if nested is not None:
+                rules.append(nested)
+            self.rules[directory] = rules
+        return rules
+
+    def decide(self, relpath, is_dir):
+        for rules in reversed(self.rules_for(os.path.dirname(relpath))):
+            ignored = rules.match(relpath, is_dir)
+            if ignored is not None:
+                return ignored
+        return False
+
+    def is_directory_ignored(self, directory):
+        ignored = self.ignored_directories.get(directory)
+        if ignored is None:
+            ignored = self.is_directory_ignored(
+                os.path.dirname(directory)
+            ) or self.decide(directory, True)
+            self.ignored_directories[directory] = ignored
+        return ignored
+
+    def is_ignored(self, relpath, is_dir=False):
+        if is_dir:
+            return self.is_directory_ignored(relpath)
+        return self.is_directory_ignored(os.path.dirname(relpath)) or self.decide(
+            relpath, False
+        )
+
+    def skip(self, entry):
+        # for Inventory.walk, which prunes the directories skipped
+        return self.is_ignored(entry.relpath, entry.kind == kind_dir)
+
+
+def build_matcher(root, ignore_list, inventory=None):
+    """
+    The matcher for the ignore_list patterns of a build, None when no
+    ignore list is given and every file is kept.
+    """
+    if ignore_list is None:
+        return None
+    return IgnoreMatcher(root, [*default_patterns, *ignore_list], inventory=inventory)
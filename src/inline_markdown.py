@@ -2,17 +2,128 @@ import re
 
 from textnode import TextNode, TextType
 
+special_characters = re.compile(r"[*_`!\[]")
+image_pattern = re.compile(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)")
+link_pattern = re.compile(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)")
+
 
 def text_to_textnodes(text):
-    nodes = [TextNode(text, TextType.TEXT)]
-    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
-    nodes = split_nodes_delimiter(nodes, "*", TextType.ITALIC)
-    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
-    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
-    nodes = split_nodes_image(nodes)
-    nodes = split_nodes_link(nodes)
+    """
+    Splits text into TextNodes in a single left to right scan.
+    Open emphasis delimiters are kept on a stack, so bold and italic
+    nest inside each other; code spans, images and links are taken
+    whole as soon as they start.
+    """
+    # a frame is [delimiter, text type, finished nodes, pending text]
+    stack = [[None, TextType.TEXT, [], []]]
+    position = 0
+
+    while True:
+        match = special_characters.search(text, position)
+        if match is None:
+            if position < len(text):
+                stack[-1][3].append(text[position:])
+            break
+        index = match.start()
+        frame = stack[-1]
+        if index > position:
+            frame[3].append(text[position:index])
+        char = text[index]
+
+        if char == "`":
+            end = text.find("`", index + 1)
+            if end == -1:
+                raise ValueError("Invalid markdown: no closing delimiter")
+            if end > index + 1:
+                flush_text(frame)
+                frame[2].append(TextNode(text[index + 1 : end], TextType.CODE))
+            position = end + 1
+            continue
+
+        if char == "!" or char == "[":
+            if char == "!":
+                found = image_pattern.match(text, index)
+                text_type = TextType.IMAGE
+            else:
+                found = link_pattern.match(text, index)
+                text_type = TextType.LINK
+            if found is None:
+                frame[3].append(char)
+                position = index + 1
+                continue
+            flush_text(frame)
+            frame[2].append(TextNode(found.group(1), text_type, found.group(2)))
+            position = found.end()
+            continue
 
-    return nodes
+        position = scan_delimiter(text, index, stack)
+
+    if len(stack) > 1:
+        raise ValueError("Invalid markdown: no closing delimiter")
+    flush_text(stack[0])
+    return stack[0][2]
+
+
+def scan_delimiter(text, index, stack):
+    # a run of * or _ can close emphasis when it follows non whitespace
+    # and open one when it is followed by non whitespace;
+    # underscores inside words, like snake_case, do neither
+    char = text[index]
+    end = index
+    while end < len(text) and text[end] == char:
+        end += 1
+    before = text[index - 1] if index > 0 else " "
+    after = text[end] if end < len(text) else " "
+    can_close = not before.isspace()
+    can_open = not after.isspace()
+    if char == "_":
+        can_close = can_close and not after.isalnum()
+        can_open = can_open and not before.isalnum()
+
+    run = end - index
+    innermost = stack[-1][0]
+    if char == "_":
+        closing = opening = "_"
+    else:
+        closing = "**" if innermost == "**" and run >= 2 else "*"
+        opening = "**" if run >= 2 else "*"
+
+    if can_close and innermost == closing:
+        close_frame(stack)
+        return index + len(closing)
+    if can_open:
+        text_type = TextType.BOLD if opening == "**" else TextType.ITALIC
+        flush_text(stack[-1])
+        stack.append([opening, text_type, [], []])
+        return index + len(opening)
+    if can_close:
+        # closes an emphasis that is not the innermost one
+        raise ValueError("Invalid markdown: no closing delimiter")
+    # a run surrounded by whitespace is plain text
+    stack[-1][3].append(text[index:end])
+    return end
+
+
+def flush_text(frame):
+    if frame[3]:
+        frame[2].append(TextNode("".join(frame[3]), TextType.TEXT))
+        frame[3].clear()
+
+
+def close_frame(stack):
+    frame = stack.pop()
+    flush_text(frame)
+    text_type, nodes = frame[1], frame[2]
+    # like the split passes, empty emphasis produces no node
+    if not nodes:
+        return
+    if len(nodes) == 1 and nodes[0].text_type == TextType.TEXT:
+        node = TextNode(nodes[0].text, text_type)
+    else:
+        text = "".join(node.text for node in nodes)
+        node = TextNode(text, text_type, children=nodes)
+    flush_text(stack[-1])
+    stack[-1][2].append(node)
 
 
 def split_nodes_delimiter(old_nodes, delimiter, text_type):
@@ -41,39 +152,16 @@ def split_nodes_delimiter(old_nodes, delimiter, text_type):
 
 
 def split_nodes_image(old_nodes):
-    new_nodes = []
+    return split_nodes_pattern(old_nodes, image_pattern, TextType.IMAGE)
 
-    for old_node in old_nodes:
-        if old_node.text_type != TextType.TEXT:
-            new_nodes.append(old_node)
-            continue
-
-        original_text = old_node.text
-        images = extract_markdown_images(original_text)
-        if len(images) == 0:
-            new_nodes.append(old_node)
-            continue
 
-        for image in images:
-            # split original text using the matches generated by extract_markdown_images
-            sections = original_text.split(f"![{image[0]}]({image[1]})", 1)
-
-            if len(sections) != 2:
-                raise ValueError("Invalid markdown: image section not closed")
-
-            if sections[0] != "":
-                new_nodes.append(TextNode(sections[0], TextType.TEXT))
-
-            new_nodes.append(TextNode(image[0], TextType.IMAGE, image[1]))
-            original_text = sections[1]
-
-        if original_text != "":
-            new_nodes.append(TextNode(original_text, TextType.TEXT))
-
-    return new_nodes
+def split_nodes_link(old_nodes):
+    return split_nodes_pattern(old_nodes, link_pattern, TextType.LINK)
 
 
-def split_nodes_link(old_nodes):
+def split_nodes_pattern(old_nodes, pattern, text_type):
+    # slices the text between match spans, so each text node
+    # is scanned once however many images or links it holds
     new_nodes = []
 
     for old_node in old_nodes:
@@ -82,37 +170,26 @@ def split_nodes_link(old_nodes):
             continue
 
         original_text = old_node.text
-        links = extract_markdown_links(original_text)
-        if len(links) == 0:
+        position = 0
+        for match in pattern.finditer(original_text):
+            if match.start() > position:
+                new_nodes.append(
+                    TextNode(original_text[position : match.start()], TextType.TEXT)
+                )
+            new_nodes.append(TextNode(match.group(1), text_type, match.group(2)))
+            position = match.end()
+
+        if position == 0:
             new_nodes.append(old_node)
-            continue
-
-        for link in links:
-            # split original text using the matches generated by extract_markdown_images
-            sections = original_text.split(f"[{link[0]}]({link[1]})", 1)
-
-            if len(sections) != 2:
-                raise ValueError("Invalid markdown: Link is not closed")
-
-            if sections[0] != "":
-                new_nodes.append(TextNode(sections[0], TextType.TEXT))
-
-            new_nodes.append(TextNode(link[0], TextType.LINK, link[1]))
-            original_text = sections[1]
-
-        if original_text != "":
-            new_nodes.append(TextNode(original_text, TextType.TEXT))
+        elif position < len(original_text):
+            new_nodes.append(TextNode(original_text[position:], TextType.TEXT))
 
     return new_nodes
 
 
 def extract_markdown_images(text):
-    pattern = r"!\[([^\[\]]*)\]\(([^\(\)]*)\)"
-    matches = re.findall(pattern, text)
-    return matches
+    return image_pattern.findall(text)
 
 
 def extract_markdown_links(text):
-    pattern = r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)"
-    matches = re.findall(pattern, text)
-    return matches
+    return link_pattern.findall(text)
@@ -0,0 +1,119 @@
+"""
+A listing of a whole directory tree taken in one pass with os.scandir,
+so that the stages of a build look up file kinds, sizes and mtimes
+instead of each walking the tree and calling stat again.
+"""
+
+import os
+
+kind_file = "file"
+kind_dir = "dir"
+kind_other = "other"
+
+
+class Entry:
+    __slots__ = ("path", "relpath", "name", "kind", "size", "mtime_ns", "inode")
+
+    def __init__(self, path, relpath, name, kind, size, mtime_ns, inode):
+        self.path = path
+        self.relpath = relpath
+        self.name = name
+        self.kind = kind
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.inode = inode
+
+    def __repr__(self):
+        return f"Entry({self.relpath}, {self.kind}, {self.size}, {self.mtime_ns})"
+
+
+class Inventory:
+    """
+    The entries below root, by the relative path of their directory,
+    each directory's entries sorted by name. The root is "".
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.children = {"": []}
+        self.entries = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, relpath):
+        return relpath in self.entries
+
+    def get(self, relpath):
+        return self.entries.get(relpath)
+
+    def walk(self, skip=None):
+        """
+        Yields every entry depth first in name order, leaving out the
+        entries skip returns True for, and everything below them.
+        """
+        pending = [iter(self.children[""])]
+        while pending:
+            for entry in pending[-1]:
+                if skip is not None and skip(entry):
+                    continue
+                yield entry
+                if entry.kind == kind_dir:
+                    pending.append(iter(self.children[entry.relpath]))
+                    break
+            else:
+                pending.pop()
+
+    def files(self, skip=None):
+        return [entry for entry in self.walk(skip) if entry.kind == kind_file]
+
+
+def scan(root):
+    """
+    Lists root iteratively, with one stat per entry at most: the kind
+    of an entry comes from the directory listing itself, symlinks are
+    followed like os.path.isfile and os.path.isdir would.
+    """
+    inventory = Inventory(root)
+    root_stat = os.stat(root)
+    visited = {(root_stat.st_dev, root_stat.st_ino)}
+    pending = [""]
+    while pending:
+        relpath = pending.pop()
+        directory = os.path.join(root, relpath) if relpath else root
+        children = inventory.children.setdefault(relpath, [])
+        with os.scandir(directory) as listing:
+            items = sorted(listing, key=lambda item: item.name)
+
+        for item in items:
+            child = os.path.join(relpath, item.name) if relpath else item.name
+            try:
+                stat = item.stat()
+            except FileNotFoundError:
+                # a broken symlink, or removed while listing
+                continue
+            if item.is_dir():
+                kind = kind_dir
+            elif item.is_file():
+                kind = kind_file
+            else:
+                kind = kind_other
+
+            entry = Entry(
+                item.path,
+                child,
+                item.name,
+                kind,
+                stat.st_size,
+                stat.st_mtime_ns,
+                stat.st_ino,
+            )
+            children.append(entry)
+            inventory.entries[child] = entry
+            if kind == kind_dir:
+                inventory.children[child] = []
+                # a symlink back up the tree must not be listed forever
+                if (stat.st_dev, stat.st_ino) not in visited:
+                    visited.add((stat.st_dev, stat.st_ino))
+                    pending.append(child)
+    return inventory
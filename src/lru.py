@@ -0,0 +1,59 @@
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    A dict bounded to max_size entries that drops the least recently
+    used entry when full, counting hits and misses as it goes.
+    Safe to share between the threads of a server.
+    """
+
+    def __init__(self, max_size):
+        if max_size < 1:
+            raise ValueError("LRUCache must hold at least one entry")
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def get(self, key, default=None):
+        with self.lock:
+            try:
+                value = self.entries[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self.lock:
+            return self.entries.pop(key, default)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def counters(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self.entries),
+            "max_size": self.max_size,
+        }
@@ -1,8 +1,26 @@
+import argparse
+import cProfile
 import os
 import shutil
 import sys
-from copystatic import copy_contents_recursive
-from generate_content import generate_pages_recursive
+import tracemalloc
+
+from block_markdown import enable_block_cache, enable_inline_cache
+from buildstats import BuildStats, print_report, stage
+from copystatic import ignore, sync_contents
+from fastcopy import copy_modes, copy_tree
+from generate_content import (
+    generate_pages_incremental,
+    generate_pages_parallel,
+    generate_pages_recursive,
+)
+from ignore import build_matcher
+from inventory import scan
+from minify import minify_stylesheets
+from pipeline import generate_pages_async
+from precompress import precompress_tree
+from render_cache import RenderCache, default_max_bytes
+from template import enable_minify
 
 source = "./static"
 destination = "./docs"
@@ -10,21 +28,316 @@ destination = "./docs"
 from_path = "./content"
 dest_path = "./docs"
 template_path = "./template.html"
+manifest_path = "./.build-manifest.json"
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Build the static site.")
+    parser.add_argument(
+        "base_path", nargs="?", default="/", help="path the site is served from"
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="keep the public directory and only re-render changed pages",
+    )
+    parser.add_argument(
+        "--ignore",
+        action="append",
+        metavar="PATTERN",
+        help="leave files matching this gitignore pattern out, may be repeated; "
+        "also skips dotfiles and honours .gitignore files in the trees",
+    )
+    parser.add_argument(
+        "--ignore-file",
+        metavar="FILE",
+        help="read ignore patterns from FILE, as with --ignore",
+    )
+    parser.add_argument(
+        "--copy-mode",
+        choices=copy_modes,
+        default="copy",
+        help="copy static files, or hardlink or reflink them (default: copy)",
+    )
+    parser.add_argument(
+        "--hash-static",
+        action="store_true",
+        help="with --incremental, compare static files by content, not mtime",
+    )
+    parser.add_argument(
+        "--minify",
+        action="store_true",
+        help="collapse whitespace and strip comments from the pages, "
+        "leaving pre, code, textarea, script and style content alone",
+    )
+    parser.add_argument(
+        "--minify-css",
+        action="store_true",
+        help="minify the stylesheets copied from the static directory",
+    )
+    parser.add_argument(
+        "--precompress",
+        action="store_true",
+        help="write .gz (and .br with brotli installed) siblings of text outputs",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        nargs="?",
+        const=0,
+        default=None,
+        metavar="N",
+        help="render pages on N worker processes, one per cpu core when N is "
+        "left out (default: render in this process)",
+    )
+    parser.add_argument(
+        "--async",
+        dest="use_async",
+        type=int,
+        nargs="?",
+        const=8,
+        metavar="N",
+        help="overlap reads and writes with rendering, N files in flight "
+        "at a time (default: 8); not used with --profile",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        metavar="DIR",
+        help="reuse the content html of unchanged pages from this directory",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=float,
+        default=default_max_bytes / 2**20,
+        metavar="MB",
+        help="size the cache directory is pruned to after a build (default: 256)",
+    )
+    parser.add_argument(
+        "--block-cache",
+        type=int,
+        default=0,
+        metavar="N",
+        help="reuse the html of the last N distinct blocks rendered (default: off)",
+    )
+    parser.add_argument(
+        "--inline-cache",
+        type=int,
+        default=0,
+        metavar="N",
+        help="reuse the html of the last N distinct inline texts (default: off)",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="REPORT",
+        help="time every build stage per page and write a json report",
+    )
+    parser.add_argument(
+        "--slowest",
+        type=int,
+        default=10,
+        metavar="N",
+        help="number of slowest pages listed in the report (default: 10)",
+    )
+    parser.add_argument(
+        "--memory",
+        action="store_true",
+        help="trace the peak memory of every page and stage with tracemalloc",
+    )
+    parser.add_argument(
+        "--memory-budget",
+        type=float,
+        metavar="MB",
+        help="peak memory a single page may use, implies --memory",
+    )
+    parser.add_argument(
+        "--memory-budget-action",
+        choices=("warn", "fail"),
+        default="warn",
+        help="what to do when a page goes over the budget (default: warn)",
+    )
+    parser.add_argument(
+        "--cprofile",
+        metavar="FILE",
+        help="run the build under cProfile and dump the stats to FILE",
+    )
+    return parser.parse_args(argv)
+
+
+def worker_count(jobs):
+    # a bare -j means one worker per cpu core
+    if jobs is None:
+        return 1
+    return jobs or os.cpu_count() or 1
 
 
 def main():
-    base_path= "/"
-    if len(sys.argv) > 1:
-        base_path = sys.argv[1]
+    args = parse_args(sys.argv[1:])
+    stats = build_stats(args)
+    if stats is not None and stats.track_memory:
+        tracemalloc.start()
+
+    profiler = cProfile.Profile() if args.cprofile else None
+    if profiler is not None:
+        profiler.enable()
+    enable_block_cache(args.block_cache)
+    enable_inline_cache(args.inline_cache)
+    enable_minify(args.minify)
+    cache = None
+    if args.cache_dir:
+        cache = RenderCache(args.cache_dir, int(args.cache_size * 2**20))
+    try:
+        build(args, stats, cache)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(args.cprofile)
+            print(f"Wrote cProfile data to {args.cprofile}")
+
+    if cache is not None:
+        removed = cache.prune()
+        if removed:
+            print(f"Pruned {removed} entries from the render cache")
+
+    if stats is not None:
+        if args.profile:
+            report = stats.save(args.profile, args.slowest)
+        else:
+            report = stats.report(args.slowest)
+        print_report(report)
+        if args.profile:
+            print(f"Wrote build profile to {args.profile}")
+
+
+def build_stats(args):
+    budget = args.memory_budget
+    if not (args.profile or args.memory or budget is not None):
+        return None
+    return BuildStats(
+        track_memory=args.memory,
+        memory_budget=None if budget is None else int(budget * 2**20),
+        budget_action=args.memory_budget_action,
+    )
+
+
+def ignore_patterns(args):
+    # None when ignoring is off, which keeps every file
+    if args.ignore is None and args.ignore_file is None:
+        return None
+    patterns = ignore(args.ignore_file) if args.ignore_file else []
+    return patterns + (args.ignore or [])
+
+
+def build(args, stats=None, cache=None):
+    base_path = args.base_path
+    workers = worker_count(args.jobs)
+    ignore_list = ignore_patterns(args)
+
+    # both trees are listed once, every stage below works from these
+    with stage(stats, "discover"):
+        static_inventory = scan(source)
+        content_inventory = scan(from_path)
+
+    if args.incremental:
+        print("Syncing static files to public directory...")
+        with stage(stats, "static_copy"):
+            sync_contents(
+                source,
+                destination,
+                manifest_path,
+                args.hash_static,
+                args.copy_mode,
+                static_inventory,
+                ignore_list,
+                args.minify_css,
+            )
+
+        print("Generating changed content...")
+        generate_pages_incremental(
+            from_path,
+            dest_path,
+            template_path,
+            base_path,
+            manifest_path,
+            ignore_list,
+            workers=workers,
+            stats=stats,
+            cache=cache,
+            inventory=content_inventory,
+        )
+        compress(args, stats)
+        return
+
     print("Deleting public directory...")
     if os.path.exists(destination):
         shutil.rmtree(destination)
+    # its records describe the outputs just deleted, the next incremental
+    # build has to start over
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
 
     print("Copying static files to public directory...")
-    copy_contents_recursive(source, destination)
+    with stage(stats, "static_copy"):
+        matcher = build_matcher(source, ignore_list, static_inventory)
+        copied = copy_tree(
+            source,
+            destination,
+            args.copy_mode,
+            inventory=static_inventory,
+            skip=matcher.skip if matcher else None,
+        )
+        print(copied.summary())
+        minify_static(args)
 
     print("Generating content...")
-    generate_pages_recursive(from_path, dest_path, template_path,base_path)
+    if args.use_async and stats is None:
+        generate_pages_async(
+            from_path,
+            dest_path,
+            template_path,
+            base_path,
+            ignore_list,
+            args.use_async,
+            workers,
+            cache,
+            content_inventory,
+        )
+    elif workers > 1 or stats is not None:
+        generate_pages_parallel(
+            from_path,
+            dest_path,
+            template_path,
+            base_path,
+            ignore_list,
+            workers=workers,
+            stats=stats,
+            cache=cache,
+            inventory=content_inventory,
+        )
+    else:
+        generate_pages_recursive(
+            from_path,
+            dest_path,
+            template_path,
+            base_path,
+            ignore_list,
+            cache=cache,
+            inventory=content_inventory,
+        )
+    compress(args, stats)
+
+
+def minify_static(args):
+    if args.minify_css:
+        print(f"Minified {minify_stylesheets(destination)} stylesheets")
+
+
+def compress(args, stats=None):
+    if not args.precompress:
+        return
+    print("Compressing text outputs...")
+    with stage(stats, "compress"):
+        print(precompress_tree(destination).summary())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,74 @@
+import hashlib
+import json
+import os
+
+# bump whenever a change to the generator alters the html it produces,
+# so that every page recorded by an older build is treated as stale
+GENERATOR_VERSION = "1"
+
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def page_record(source_path, source_hash, template_hash, base_path, minify=False):
+    return {
+        "source": source_path,
+        "source_hash": source_hash,
+        "template_hash": template_hash,
+        "base_path": base_path,
+        "minify": minify,
+        "version": GENERATOR_VERSION,
+    }
+
+
+class BuildManifest:
+    """
+    Records the inputs every generated page was rendered from,
+    keyed by the output path of the page, and the static files the
+    last sync put in the output directory.
+    """
+
+    def __init__(self, path, pages=None, static=None):
+        self.path = path
+        self.pages = pages if pages is not None else {}
+        self.static = static if static is not None else {}
+
+    @classmethod
+    def load(cls, path):
+        # a missing, unreadable or outdated manifest means a full rebuild
+        try:
+            with open(path, "r") as file:
+                data = json.load(file)
+        except (FileNotFoundError, ValueError):
+            return cls(path)
+        if not isinstance(data, dict) or data.get("version") != GENERATOR_VERSION:
+            return cls(path)
+        return cls(path, data.get("pages", {}), data.get("static", {}))
+
+    def save(self):
+        # write to a temporary file first so an interrupted build
+        # never leaves a truncated manifest behind
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w") as file:
+            json.dump(
+                {
+                    "version": GENERATOR_VERSION,
+                    "pages": self.pages,
+                    "static": self.static,
+                },
+                file,
+                indent=2,
+                sort_keys=True,
+            )
+        os.replace(temp_path, self.path)
+
+    def is_fresh(self, dest_path, record):
+        return self.pages.get(dest_path) == record and os.path.exists(dest_path)
+
+    def removed_outputs(self, dest_paths):
+        return sorted(path for path in self.pages if path not in dest_paths)
@@ -0,0 +1,277 @@
+"""
+Shrinks the pages and stylesheets of a build. Pages are minified as a
+stream, fragment by fragment as the template produces them, so that no
+second copy of a whole page is ever made.
+"""
+
+import os
+import re
+
+from inventory import scan
+
+# elements whose content is kept exactly as it is
+preserved_tags = {"pre", "code", "textarea", "script", "style"}
+
+# elements that do not flow with the text around them, whitespace next
+# to their tags never shows and is dropped rather than collapsed
+block_tags = {
+    "address",
+    "article",
+    "aside",
+    "base",
+    "blockquote",
+    "body",
+    "br",
+    "dd",
+    "details",
+    "div",
+    "dl",
+    "dt",
+    "fieldset",
+    "figcaption",
+    "figure",
+    "footer",
+    "form",
+    "h1",
+    "h2",
+    "h3",
+    "h4",
+    "h5",
+    "h6",
+    "head",
+    "header",
+    "hr",
+    "html",
+    "li",
+    "link",
+    "main",
+    "meta",
+    "nav",
+    "noscript",
+    "ol",
+    "p",
+    "pre",
+    "script",
+    "section",
+    "style",
+    "summary",
+    "table",
+    "tbody",
+    "td",
+    "tfoot",
+    "th",
+    "thead",
+    "title",
+    "tr",
+    "ul",
+}
+
+# html whitespace, which unlike str.split leaves &nbsp; characters alone
+whitespace = re.compile(r"[ \t\n\r\f]+")
+tag_pattern = re.compile(
+    r"<(/?)([A-Za-z][A-Za-z0-9-]*)[^>\"']*(?:(?:\"[^\"]*\"|'[^']*')[^>\"']*)*>"
+)
+declaration_pattern = re.compile(r"<![^>]*>")
+closing_patterns = {
+    name: re.compile(f"</{name}(?![A-Za-z0-9-])", re.IGNORECASE)
+    for name in preserved_tags
+}
+
+
+class HTMLMinifier:
+    """
+    Collapses runs of whitespace to one space, drops those next to block
+    level tags and strips comments. feed takes the page in fragments of
+    any size and returns the minified html of as much as can be decided,
+    keeping only an unfinished tag or comment back for the next call.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        # name of the preserved element being copied through, if any
+        self.raw_tag = None
+        self.pending_space = False
+        self.after_block = True
+
+    def feed(self, fragment):
+        self.buffer += fragment
+        out = []
+        position = self.process(out, final=False)
+        self.buffer = self.buffer[position:]
+        return "".join(out)
+
+    def close(self):
+        out = []
+        self.process(out, final=True)
+        self.buffer = ""
+        return "".join(out)
+
+    def process(self, out, final):
+        # returns how much of the buffer was consumed
+        buffer = self.buffer
+        position = 0
+        while position < len(buffer):
+            if self.raw_tag is not None:
+                match = closing_patterns[self.raw_tag].search(buffer, position)
+                if match is None:
+                    # a closing tag may be split across fragments
+                    keep = 0 if final else len(self.raw_tag) + 1
+                    end = max(position, len(buffer) - keep)
+                    out.append(buffer[position:end])
+                    return end
+                end = match.start()
+                out.append(buffer[position:end])
+                self.raw_tag = None
+                position = end
+                continue
+
+            start = buffer.find("<", position)
+            if start < 0:
+                # text going on in the next fragment is joined up by
+                # the pending space
+                self.text(out, buffer[position:])
+                return len(buffer)
+            if start > position:
+                self.text(out, buffer[position:start])
+                position = start
+
+            end = self.markup(out, buffer, position, final)
+            if end is None:
+                return position
+            position = end
+        return position
+
+    def markup(self, out, buffer, position, final):
+        """
+        Handles the markup starting at position, returns where it ends,
+        or None when it is not complete yet.
+        """
+        if buffer.startswith("<!--", position):
+            end = buffer.find("-->", position + 4)
+            if end < 0:
+                if final:
+                    return len(buffer)
+                return None
+            comment = buffer[position : end + 3]
+            if comment.startswith("<!--[if"):
+                # conditional comments are markup, not notes
+                self.tag(out, comment, block=True)
+            return end + 3
+        if buffer.startswith("<!", position):
+            match = declaration_pattern.match(buffer, position)
+            if match is None:
+                return self.incomplete(out, buffer, position, final)
+            self.tag(out, match.group(), block=True)
+            return match.end()
+
+        match = tag_pattern.match(buffer, position)
+        if match is None:
+            next_char = buffer[position + 1 : position + 2]
+            if next_char and not (next_char.isalpha() or next_char == "/"):
+                # a lone "<" in the text
+                self.text(out, "<")
+                return position + 1
+            return self.incomplete(out, buffer, position, final)
+        closing, name = match.group(1), match.group(2).lower()
+        self.tag(out, match.group(), block=name in block_tags)
+        if not closing and name in preserved_tags:
+            self.raw_tag = name
+        return match.end()
+
+    def incomplete(self, out, buffer, position, final):
+        if not final:
+            return None
+        # never closed, kept as it is
+        self.text(out, buffer[position:])
+        return len(buffer)
+
+    def tag(self, out, tag, block):
+        if self.pending_space and not (block or self.after_block):
+            out.append(" ")
+        out.append(tag)
+        self.pending_space = False
+        self.after_block = block
+
+    def text(self, out, text):
+        collapsed = whitespace.sub(" ", text)
+        core = collapsed.strip(" ")
+        if not core:
+            self.pending_space = self.pending_space or bool(collapsed)
+            return
+        if (self.pending_space or collapsed[0] == " ") and not self.after_block:
+            out.append(" ")
+        out.append(core)
+        self.pending_space = collapsed[-1] == " "
+        self.after_block = False
+
+
+def iter_minified(fragments):
+    minifier = HTMLMinifier()
+    for fragment in fragments:
+        html = minifier.feed(fragment)
+        if html:
+            yield html
+    html = minifier.close()
+    if html:
+        yield html
+
+
+def minify_html(html):
+    return "".join(iter_minified([html]))
+
+
+css_token = re.compile(r"(\"(?:\\.|[^\"\\])*\"|'(?:\\.|[^'\\])*')|/\*.*?\*/", re.DOTALL)
+css_punctuation = re.compile(r" ?([{};,>]) ?")
+
+
+def squeeze_css(css):
+    css = whitespace.sub(" ", css)
+    css = css_punctuation.sub(r"\1", css)
+    # "a :hover" and "a:hover" differ, only the space after a colon goes
+    return css.replace(": ", ":").replace(";}", "}")
+
+
+def minify_css(css):
+    """
+    Strips comments and insignificant whitespace, leaving strings alone.
+    """
+    pieces = []
+    text = []
+    position = 0
+    for match in css_token.finditer(css):
+        text.append(css[position : match.start()])
+        position = match.end()
+        if match.group(1):
+            pieces.append(squeeze_css("".join(text)))
+            pieces.append(match.group(1))
+            text = []
+    text.append(css[position:])
+    pieces.append(squeeze_css("".join(text)))
+    return "".join(pieces).strip(" ")
+
+
+def minify_stylesheet(path):
+    """
+    Minifies one stylesheet through a new file, so that a hardlinked
+    output never changes the source it shares an inode with.
+    """
+    with open(path, "r") as file:
+        css = file.read()
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "w") as file:
+        file.write(minify_css(css))
+    os.replace(temporary, path)
+
+
+def minify_stylesheets(root, inventory=None):
+    """
+    Minifies every .css file below root, returns how many.
+    """
+    if inventory is None:
+        inventory = scan(root)
+    count = 0
+    for entry in inventory.files():
+        if entry.name.endswith(".css"):
+            minify_stylesheet(entry.path)
+            count += 1
+    return count
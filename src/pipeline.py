@@ -0,0 +1,153 @@
+"""
+Builds pages through an asyncio pipeline, so that waiting on reads and
+writes overlaps with rendering:
+
+    readers -> bounded queue -> renderers -> bounded queue -> writers
+
+Files are read and written on a thread pool. Pages are rendered on the
+event loop itself, or on a pool of worker processes with workers > 1.
+"""
+
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from generate_content import (
+    cache_sizes,
+    discover_pages,
+    init_worker,
+    render_content,
+    render_content_in_worker,
+)
+from template import load_template
+
+
+def read_file(path):
+    with open(path, "r") as file:
+        return file.read()
+
+
+def write_file(path, text):
+    with open(path, "w") as file:
+        file.write(text)
+        file.write("\n")
+
+
+async def run_pipeline(
+    pages, template, concurrency=8, queue_size=32, render_executor=None, cache=None
+):
+    """
+    Renders (source path, destination path) pairs with concurrency
+    readers and writers. At most queue_size pages wait between two
+    stages, so memory stays bounded however many pages there are.
+    The first error stops the pipeline and is raised.
+    """
+    loop = asyncio.get_running_loop()
+    io_executor = ThreadPoolExecutor(max_workers=concurrency * 2)
+    pending = asyncio.Queue()
+    read_queue = asyncio.Queue(queue_size)
+    write_queue = asyncio.Queue(queue_size)
+    for page in pages:
+        pending.put_nowait(page)
+
+    async def reader():
+        while not pending.empty():
+            source, dest = pending.get_nowait()
+            markdown = await loop.run_in_executor(io_executor, read_file, source)
+            await read_queue.put((source, dest, markdown))
+
+    async def renderer():
+        while (item := await read_queue.get()) is not None:
+            source, dest, markdown = item
+            if render_executor is None:
+                title, content = render_content(markdown, cache)
+            else:
+                title, content = await loop.run_in_executor(
+                    render_executor, render_content_in_worker, markdown
+                )
+            await write_queue.put((dest, title, template.render(title, content)))
+
+    async def writer():
+        while (item := await write_queue.get()) is not None:
+            dest, title, page = item
+            await loop.run_in_executor(io_executor, write_file, dest, page)
+            print(f"Generated {title} at {dest}")
+
+    async def run_stage(workers, queue, consumers):
+        # once a stage is done, each consumer of its output is told so
+        await asyncio.gather(*workers)
+        for _ in range(consumers):
+            await queue.put(None)
+
+    renderer_count = concurrency if render_executor is not None else 1
+    readers = [asyncio.create_task(reader()) for _ in range(concurrency)]
+    renderers = [asyncio.create_task(renderer()) for _ in range(renderer_count)]
+    writers = [asyncio.create_task(writer()) for _ in range(concurrency)]
+    tasks = [
+        asyncio.create_task(run_stage(readers, read_queue, renderer_count)),
+        asyncio.create_task(run_stage(renderers, write_queue, concurrency)),
+        *writers,
+    ]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in [*tasks, *readers, *renderers]:
+            task.cancel()
+        await asyncio.gather(*tasks, *readers, *renderers, return_exceptions=True)
+        io_executor.shutdown(wait=True, cancel_futures=True)
+
+
+def build_pages_async(
+    pages, template_path, base_path="/", concurrency=8, workers=1, cache=None
+):
+    """
+    Like generate_content.build_pages, but pages are logged as they
+    are written rather than in order.
+    """
+    for directory in sorted({os.path.dirname(dest) for _, dest in pages}):
+        os.makedirs(directory, exist_ok=True)
+    if not pages:
+        return
+    template = load_template(template_path, base_path)
+
+    render_executor = None
+    if workers > 1:
+        render_executor = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=init_worker,
+            initargs=(template, False, False, cache, cache_sizes()),
+        )
+    try:
+        asyncio.run(
+            run_pipeline(
+                pages,
+                template,
+                concurrency,
+                render_executor=render_executor,
+                cache=cache,
+            )
+        )
+    finally:
+        if render_executor is not None:
+            render_executor.shutdown(cancel_futures=True)
+
+
+def generate_pages_async(
+    dir_path_content,
+    dest_dir_path,
+    template_path,
+    base_path="/",
+    ignore_list=None,
+    concurrency=8,
+    workers=1,
+    cache=None,
+    inventory=None,
+):
+    """
+    Discovers every page, then builds them through the pipeline.
+    Returns the number of pages built.
+    """
+    pages = discover_pages(dir_path_content, dest_dir_path, ignore_list, inventory)
+    os.makedirs(dest_dir_path, exist_ok=True)
+    build_pages_async(pages, template_path, base_path, concurrency, workers, cache)
+    return len(pages)
@@ -0,0 +1,177 @@
+"""
+Writes a compressed sibling next to every text file of a built site,
+index.html.gz and, when the brotli module is installed, index.html.br,
+so that servers can send them as they are instead of compressing on
+every request.
+"""
+
+import gzip
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from inventory import kind_file, scan
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+text_extensions = (".html", ".css", ".js", ".svg", ".txt", ".xml", ".json")
+
+# siblings not kept for being no smaller than their source, by relative
+# path, with the mtime of the source they were made from
+skipped_name = ".precompressed.json"
+
+
+def gzip_data(data):
+    # mtime=0 keeps the output the same from one build to the next
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def brotli_data(data):
+    return brotli.compress(data, quality=11)
+
+
+def available_encoders():
+    # suffix -> function compressing bytes
+    encoders = {".gz": gzip_data}
+    if brotli is not None:
+        encoders[".br"] = brotli_data
+    return encoders
+
+
+class CompressStats:
+    def __init__(self):
+        self.files = 0
+        self.unchanged = 0
+        self.removed = 0
+        self.size = 0
+        self.compressed_size = 0
+        self.seconds = 0.0
+
+    def summary(self):
+        saved = ""
+        if self.size:
+            saved = f", {100 - 100 * self.compressed_size / self.size:.0f}% smaller"
+        return (
+            f"Compressed {self.files} files{saved}, {self.unchanged} unchanged, "
+            f"{self.removed} removed in {self.seconds:.2f}s"
+        )
+
+
+def compress_file(path, encoders):
+    """
+    Writes the siblings of path for every (suffix, function) pair in
+    encoders. A sibling gets the mtime of its source, which is how an up
+    to date sibling is told apart from a stale one. A sibling no smaller
+    than its source is not kept. Returns the sizes of the source and of
+    the smallest sibling, and the suffixes of the siblings not kept.
+    """
+    with open(path, "rb") as file:
+        data = file.read()
+    source_stat = os.stat(path)
+    smallest = len(data)
+    skipped = []
+    for suffix, encode in encoders:
+        target = path + suffix
+        compressed = encode(data)
+        if len(compressed) >= len(data):
+            if os.path.exists(target):
+                os.remove(target)
+            skipped.append(suffix)
+            continue
+        temporary = f"{target}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as file:
+            file.write(compressed)
+        os.utime(temporary, ns=(source_stat.st_atime_ns, source_stat.st_mtime_ns))
+        os.replace(temporary, target)
+        smallest = min(smallest, len(compressed))
+    return len(data), smallest, skipped
+
+
+def load_skipped(path):
+    try:
+        with open(path, "r") as file:
+            skipped = json.load(file)
+    except (FileNotFoundError, ValueError):
+        return {}
+    return skipped if isinstance(skipped, dict) else {}
+
+
+def save_skipped(path, skipped):
+    if not skipped:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "w") as file:
+        json.dump(skipped, file, indent=2, sort_keys=True)
+    os.replace(temporary, path)
+
+
+def precompress_tree(root, workers=None, encoders=None, inventory=None):
+    """
+    Compresses the text files below root on a pool of threads, zlib and
+    brotli let go of the gil while they work. Files whose siblings carry
+    their mtime are skipped, as are those whose siblings were found no
+    smaller than them, and siblings whose source is gone are removed.
+    Returns a CompressStats.
+    """
+    started = time.perf_counter()
+    encoders = available_encoders() if encoders is None else encoders
+    if inventory is None:
+        inventory = scan(root)
+    files = {
+        entry.path: entry
+        for entry in inventory.entries.values()
+        if entry.kind == kind_file and entry.relpath != skipped_name
+    }
+    skipped_path = os.path.join(root, skipped_name)
+    previously_skipped = load_skipped(skipped_path)
+    skipped = {}
+
+    stats = CompressStats()
+    jobs = []
+    for path, entry in sorted(files.items()):
+        suffix = next((suffix for suffix in encoders if path.endswith(suffix)), None)
+        if suffix is not None:
+            # only siblings this module writes, never a .gz of the site's own
+            source = path[: -len(suffix)]
+            if source.endswith(text_extensions) and source not in files:
+                os.remove(path)
+                stats.removed += 1
+            continue
+        if not path.endswith(text_extensions):
+            continue
+        stale = []
+        for suffix, encode in encoders.items():
+            if getattr(files.get(path + suffix), "mtime_ns", None) == entry.mtime_ns:
+                continue
+            if previously_skipped.get(entry.relpath + suffix) == entry.mtime_ns:
+                skipped[entry.relpath + suffix] = entry.mtime_ns
+                continue
+            stale.append((suffix, encode))
+        if stale:
+            jobs.append((entry, stale))
+        else:
+            stats.unchanged += 1
+
+    if jobs:
+        workers = workers or min(32, os.cpu_count() or 1)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(lambda job: compress_file(job[0].path, job[1]), jobs)
+            for (entry, stale), (size, compressed_size, not_kept) in zip(jobs, results):
+                for suffix in not_kept:
+                    skipped[entry.relpath + suffix] = entry.mtime_ns
+                if len(not_kept) == len(stale):
+                    # nothing worth keeping was written
+                    continue
+                stats.files += 1
+                stats.size += size
+                stats.compressed_size += compressed_size
+    if skipped != previously_skipped:
+        save_skipped(skipped_path, skipped)
+    stats.seconds = time.perf_counter() - started
+    return stats
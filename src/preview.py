@@ -0,0 +1,309 @@
+"""
+Serves a built site for previews and load tests. Unlike
+python3 -m http.server it keeps connections alive, answers conditional
+and range requests, serves the .gz sibling of a file to clients that
+accept gzip, and sends bodies with sendfile from a fixed pool of threads.
+
+    python3 src/preview.py docs --port 8888
+"""
+
+import argparse
+import email.utils
+import mimetypes
+import os
+import sys
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+
+class PooledHTTPServer(HTTPServer):
+    """
+    Handles each connection on a pool of threads rather than on a new
+    thread per connection. A kept alive connection holds its thread
+    until it is closed or idle for the handler timeout.
+    """
+
+    def __init__(self, address, handler, threads=32):
+        super().__init__(address, handler)
+        self.executor = ThreadPoolExecutor(
+            max_workers=threads, thread_name_prefix="preview"
+        )
+
+    def process_request(self, request, client_address):
+        self.executor.submit(self.process_request_thread, request, client_address)
+
+    def process_request_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def accepts_gzip(header):
+    # true unless gzip is missing from Accept-Encoding or has q=0
+    for coding in (header or "").split(","):
+        name, _, params = coding.strip().partition(";")
+        if name.strip().lower() not in ("gzip", "*"):
+            continue
+        quality = params.strip().lower()
+        if quality.startswith("q="):
+            try:
+                return float(quality[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+
+def parse_range(header, size):
+    """
+    Returns (start, end) inclusive for a single byte range, None when
+    the whole file is to be sent instead, and raises ValueError for a
+    range that can not be satisfied.
+    """
+    unit, _, ranges = (header or "").partition("=")
+    first, dash, last = ranges.strip().partition("-")
+    if unit.strip().lower() != "bytes" or not dash:
+        return None
+    # several ranges at once are answered with the whole file
+    if not (first or last) or any(
+        part and not part.isdigit() for part in (first, last)
+    ):
+        return None
+    if first:
+        start = int(first)
+        end = int(last) if last else size - 1
+        if start > end and last:
+            return None
+    else:
+        # the last bytes of the file, none of them for a length of 0
+        start, end = size - min(int(last), size), size - 1
+        if not int(last):
+            start = size
+    if start >= size:
+        raise ValueError("range not satisfiable")
+    return start, min(end, size - 1)
+
+
+def is_current_sibling(compressed, path):
+    """
+    True when the compressed file exists and was made from the current
+    version of path: precompress gives it the mtime of its source, so a
+    sibling left behind by an earlier build has another one.
+    """
+    try:
+        return os.stat(compressed).st_mtime_ns == os.stat(path).st_mtime_ns
+    except OSError:
+        return False
+
+
+def make_etag(stat, encoding=None):
+    # strong, and different for each encoding of the same file
+    tag = f"{stat.st_size:x}-{stat.st_mtime_ns:x}"
+    if encoding:
+        tag += f"-{encoding}"
+    return f'"{tag}"'
+
+
+class PreviewRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # seconds an idle kept alive connection holds on to its thread
+    timeout = 15
+    # headers and body go out as separate writes
+    disable_nagle_algorithm = True
+    root = "."
+    base_path = "/"
+    quiet = False
+
+    def do_GET(self):
+        self.respond(send_body=True)
+
+    def do_HEAD(self):
+        self.respond(send_body=False)
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+    def translate_path(self):
+        """
+        Returns the file a request path maps to below root, with
+        index.html for directories, or None when the path is unsafe.
+        """
+        path = urllib.parse.unquote(urllib.parse.urlsplit(self.path).path)
+        if self.base_path != "/" and path.startswith(self.base_path):
+            path = "/" + path[len(self.base_path) :]
+        parts = [part for part in path.split("/") if part]
+        if any(part in (".", "..") or "\\" in part for part in parts):
+            return None
+        return os.path.join(self.root, *parts) if parts else self.root
+
+    def respond(self, send_body):
+        path = self.translate_path()
+        if path is not None and os.path.isdir(path):
+            if not urllib.parse.urlsplit(self.path).path.endswith("/"):
+                self.redirect_to_directory(send_body)
+                return
+            path = os.path.join(path, "index.html")
+        if path is None or not os.path.isfile(path):
+            self.send_text(HTTPStatus.NOT_FOUND, "Not found\n", send_body)
+            return
+
+        content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        if content_type.startswith("text/"):
+            content_type += "; charset=utf-8"
+        compressed = path + ".gz"
+        has_gzip = is_current_sibling(compressed, path)
+        encoding = None
+        if has_gzip and accepts_gzip(self.headers.get("Accept-Encoding")):
+            path, encoding = compressed, "gzip"
+
+        try:
+            file = open(path, "rb")
+        except OSError:
+            self.send_text(HTTPStatus.NOT_FOUND, "Not found\n", send_body)
+            return
+        with file:
+            stat = os.fstat(file.fileno())
+            etag = make_etag(stat, encoding)
+            headers = {
+                "Content-Type": content_type,
+                "ETag": etag,
+                "Last-Modified": email.utils.formatdate(stat.st_mtime, usegmt=True),
+                "Accept-Ranges": "bytes",
+                "Cache-Control": "no-cache",
+            }
+            if encoding:
+                headers["Content-Encoding"] = encoding
+            if has_gzip:
+                headers["Vary"] = "Accept-Encoding"
+
+            if self.not_modified(etag, stat):
+                self.send_headers(HTTPStatus.NOT_MODIFIED, headers)
+                return
+
+            start, end = 0, stat.st_size - 1
+            status = HTTPStatus.OK
+            if "Range" in self.headers and self.if_range_matches(etag):
+                try:
+                    byte_range = parse_range(self.headers["Range"], stat.st_size)
+                except ValueError:
+                    self.send_text(
+                        HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE,
+                        "Range not satisfiable\n",
+                        send_body,
+                        {"Content-Range": f"bytes */{stat.st_size}"},
+                    )
+                    return
+                if byte_range is not None:
+                    start, end = byte_range
+                    status = HTTPStatus.PARTIAL_CONTENT
+                    headers["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+
+            headers["Content-Length"] = str(end - start + 1)
+            self.send_headers(status, headers)
+            if send_body and end >= start:
+                self.send_file(file, start, end - start + 1)
+
+    def not_modified(self, etag, stat):
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            tags = [tag.strip() for tag in if_none_match.split(",")]
+            return "*" in tags or etag in tags or "W/" + etag in tags
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since is None:
+            return False
+        try:
+            since = email.utils.parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return int(stat.st_mtime) <= since.timestamp()
+
+    def if_range_matches(self, etag):
+        # a range of a file that changed since is answered with all of it
+        if_range = self.headers.get("If-Range")
+        return if_range is None or if_range.strip() == etag
+
+    def send_file(self, file, offset, count):
+        # socket.sendfile uses os.sendfile where it can and send otherwise
+        self.connection.sendfile(file, offset, count)
+
+    def send_headers(self, status, headers):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+
+    def send_text(self, status, text, send_body, headers=None):
+        body = text.encode()
+        headers = {
+            **(headers or {}),
+            "Content-Type": "text/plain; charset=utf-8",
+            "Content-Length": str(len(body)),
+        }
+        self.send_headers(status, headers)
+        if send_body:
+            self.wfile.write(body)
+
+    def redirect_to_directory(self, send_body):
+        parts = urllib.parse.urlsplit(self.path)
+        location = urllib.parse.urlunsplit(parts._replace(path=parts.path + "/"))
+        self.send_text(
+            HTTPStatus.MOVED_PERMANENTLY,
+            f"Moved to {location}\n",
+            send_body,
+            {"Location": location},
+        )
+
+
+def make_server(root, host="127.0.0.1", port=8888, threads=32, base_path="/"):
+    handler = type(
+        "Handler",
+        (PreviewRequestHandler,),
+        {"root": root, "base_path": base_path},
+    )
+    return PooledHTTPServer((host, port), handler, threads)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a built site.")
+    parser.add_argument(
+        "root", nargs="?", default="./docs", help="directory to serve (default: docs)"
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8888)
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=32,
+        help="connections handled at the same time (default: 32)",
+    )
+    parser.add_argument(
+        "--base-path",
+        default="/",
+        help="path prefix the site was built for, stripped from requests",
+    )
+    parser.add_argument("--quiet", action="store_true", help="do not log every request")
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+
+    server = make_server(args.root, args.host, args.port, args.threads, args.base_path)
+    server.RequestHandlerClass.quiet = args.quiet
+    print(f"Serving {args.root} on http://{args.host}:{server.server_port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import hashlib
+import json
+import os
+import uuid
+
+from manifest import GENERATOR_VERSION
+
+default_max_bytes = 256 * 2**20
+
+
+def render_key(markdown):
+    digest = hashlib.sha256(GENERATOR_VERSION.encode())
+    digest.update(b"\0")
+    digest.update(markdown.encode())
+    return digest.hexdigest()
+
+
+class RenderCache:
+    """
+    Maps the hash of a page's markdown, together with the generator
+    version, to its rendered content html and title, one small json
+    file per page below directory.
+
+    Entries are written to a temporary file and renamed into place, so
+    any number of worker processes can share the cache: a reader sees a
+    whole entry or none at all. A hit touches the entry, and prune drops
+    the least recently used entries once the cache outgrows max_bytes.
+    """
+
+    def __init__(self, directory, max_bytes=default_max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def entry_path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(self, markdown):
+        """
+        Returns (title, content html) for markdown, or None on a miss.
+        """
+        path = self.entry_path(render_key(markdown))
+        try:
+            with open(path, "r") as file:
+                entry = json.load(file)
+        except (FileNotFoundError, ValueError):
+            return None
+        if not isinstance(entry, dict) or entry.get("version") != GENERATOR_VERSION:
+            return None
+        try:
+            title, html = entry["title"], entry["html"]
+        except KeyError:
+            return None
+
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            # pruned by another process since, the entry read is still good
+            pass
+        return title, html
+
+    def put(self, markdown, title, html):
+        path = self.entry_path(render_key(markdown))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # a name of its own per writer, two processes may store one page
+        temp_path = f"{path}.{os.getpid()}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(temp_path, "w") as file:
+                json.dump(
+                    {"version": GENERATOR_VERSION, "title": title, "html": html}, file
+                )
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def entries(self):
+        entries = []
+        if not os.path.isdir(self.directory):
+            return entries
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if not entry.name.endswith(".json"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def prune(self):
+        """
+        Removes the least recently used entries until the cache fits in
+        max_bytes. Returns the number of entries removed.
+        """
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        return removed
@@ -0,0 +1,91 @@
+import re
+
+from minify import iter_minified
+
+# whether load_template returns templates that minify the pages
+minify_pages = False
+
+slot_pattern = re.compile(r"\{\{ (Title|Content) \}\}")
+
+
+def rewrite_root_urls(html, base_path):
+    """
+    Points root relative href and src attributes at base_path,
+    so the site can be served from a sub directory.
+    """
+    if base_path == "/":
+        return html
+    return html.replace('href="/', f'href="{base_path}').replace(
+        'src="/', f'src="{base_path}'
+    )
+
+
+class CompiledTemplate:
+    """
+    A page template split once into literal segments and
+    {{ Title }} / {{ Content }} slots, so that rendering a page
+    is a single join instead of a chain of full page replaces.
+    Instances only hold strings and can be shipped to worker processes.
+    With minify, pages are minified as they are rendered.
+    """
+
+    def __init__(self, source, base_path="/", minify=False):
+        self.base_path = base_path
+        self.minify = minify
+        self.parts = []
+        self.slots = []
+
+        position = 0
+        for match in slot_pattern.finditer(source):
+            literal = source[position : match.start()]
+            self.parts.append(rewrite_root_urls(literal, base_path))
+            self.slots.append((len(self.parts), match.group(1)))
+            self.parts.append("")
+            position = match.end()
+        self.parts.append(rewrite_root_urls(source[position:], base_path))
+
+    def render(self, title, content):
+        return "".join(self.iter_page(title, content))
+
+    def write(self, stream, title, content):
+        write = stream.write
+        for fragment in self.iter_page(title, content):
+            write(fragment)
+
+    def iter_page(self, title, content):
+        """
+        Yields the page piece by piece. content is either html or an
+        html node, which is then serialized fragment by fragment.
+        """
+        fragments = self.iter_fragments(title, content)
+        if self.minify:
+            return iter_minified(fragments)
+        return fragments
+
+    def iter_fragments(self, title, content):
+        slots = dict(self.slots)
+        for index, part in enumerate(self.parts):
+            name = slots.get(index)
+            if name is None:
+                yield part
+            elif name == "Title":
+                yield rewrite_root_urls(title, self.base_path)
+            elif isinstance(content, str):
+                yield rewrite_root_urls(content, self.base_path)
+            else:
+                for fragment in content.iter_html():
+                    yield rewrite_root_urls(fragment, self.base_path)
+
+
+def enable_minify(enabled=True):
+    global minify_pages
+    minify_pages = enabled
+
+
+def minify_enabled():
+    return minify_pages
+
+
+def load_template(template_path, base_path="/"):
+    with open(template_path, "r") as file:
+        return CompiledTemplate(file.read(), base_path, minify_pages)
@@ -0,0 +1,57 @@
+import os
+import random
+import tempfile
+import unittest
+
+from benchmarks.corpus import CorpusSettings, generate_corpus, generate_markdown
+from benchmarks.suite import compare
+from block_markdown import markdown_to_html_node
+
+
+class TestCorpus(unittest.TestCase):
+    def test_reproducible(self):
+        settings = CorpusSettings(pages=3, seed=7)
+        first = generate_markdown(random.Random(7), settings, "Page")
+        second = generate_markdown(random.Random(7), settings, "Page")
+        self.assertEqual(first, second)
+
+    def test_pages_render(self):
+        settings = CorpusSettings(pages=20, blocks_per_page=30, inline_density=0.5)
+        with tempfile.TemporaryDirectory() as root:
+            content, template_path = generate_corpus(root, settings)
+            self.assertTrue(os.path.exists(template_path))
+            paths = [
+                os.path.join(directory, name)
+                for directory, _, files in os.walk(content)
+                for name in files
+            ]
+            self.assertEqual(len(paths), 20)
+            for path in paths:
+                with open(path) as file:
+                    markdown_to_html_node(file.read()).to_html()
+
+    def test_block_mix(self):
+        settings = CorpusSettings(block_mix={"code": 1}, blocks_per_page=5)
+        markdown = generate_markdown(random.Random(0), settings, "Code")
+        self.assertEqual(markdown.count("```"), 10)
+
+
+class TestCompare(unittest.TestCase):
+    def test_threshold(self):
+        baseline = {"stages": {"a": {"seconds": 1.0}, "b": {"seconds": 1.0}}}
+        results = {
+            "stages": {
+                "a": {"seconds": 1.05},
+                "b": {"seconds": 1.5},
+                "new": {"seconds": 1.0},
+            }
+        }
+        rows = compare(results, baseline, 0.1)
+        self.assertListEqual(
+            [(name, regressed) for name, *_, regressed in rows],
+            [("a", False), ("b", True)],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
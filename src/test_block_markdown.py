@@ -1,6 +1,8 @@
 import re
 import unittest
+from unittest import mock
 
+import block_markdown
 from block_markdown import (
     block_to_block_type,
     block_type_code,
@@ -9,11 +11,15 @@ from block_markdown import (
     block_type_paragraph,
     block_type_quote,
     block_type_ulist,
+    enable_block_cache,
+    enable_inline_cache,
     is_code_block,
     is_heading,
     is_olist,
     is_quote_block,
     is_ulist_block,
+    lex_blocks,
+    markdown_block_to_html,
     markdown_to_blocks,
     markdown_to_html_node,
 )
@@ -477,5 +483,140 @@ alert(message);
         self.assertEqual(format_test_block(html), format_test_block(expected_output))
 
 
+class TestBlockLexer(unittest.TestCase):
+    def test_block_types_and_sources(self):
+        md = "# title\n\n> quote\n\n1. one\n2. two\n\n- item\n\n```\ncode\n```\n\ntext"
+        blocks = lex_blocks(md)
+        self.assertListEqual(
+            [block.block_type for block in blocks],
+            [
+                block_type_heading,
+                block_type_quote,
+                block_type_olist,
+                block_type_ulist,
+                block_type_code,
+                block_type_paragraph,
+            ],
+        )
+        self.assertListEqual([block.source for block in blocks], markdown_to_blocks(md))
+
+    def test_matches_block_by_block_conversion(self):
+        docs = [
+            test_heading_doc,
+            re.sub(">+", ">", test_quote_doc),
+            test_olist_doc,
+            test_ulist_doc.replace("*hello", "hello"),
+        ]
+        for doc in docs:
+            expected = [
+                markdown_block_to_html(block).to_html()
+                for block in markdown_to_blocks(doc)
+            ]
+            actual = [child.to_html() for child in markdown_to_html_node(doc).children]
+            self.assertListEqual(expected, actual)
+
+    def test_nested_unordered_list(self):
+        md = "- fruit\n  - apple\n  - pear\n- vegetables\n    1. leek\n    2. kale"
+        self.assertEqual(
+            markdown_to_html_node(md).to_html(),
+            "<div><ul><li>fruit<ul><li>apple</li><li>pear</li></ul></li>"
+            "<li>vegetables<ol><li>leek</li><li>kale</li></ol></li></ul></div>",
+        )
+
+    def test_nested_ordered_list(self):
+        md = "1. first\n\t- a\n\t\t- deep\n2. second"
+        self.assertEqual(
+            markdown_to_html_node(md).to_html(),
+            "<div><ol><li>first<ul><li>a<ul><li>deep</li></ul></li></ul></li>"
+            "<li>second</li></ol></div>",
+        )
+
+    def test_long_ordered_list(self):
+        md = "\n".join(f"{n}. item" for n in range(1, 13))
+        self.assertEqual(lex_blocks(md)[0].block_type, block_type_olist)
+        self.assertEqual(len(lex_blocks(md)[0].children), 12)
+
+    def test_broken_lists_are_paragraphs(self):
+        for md in ["1. one\n3. three", "- a\n1. b", "- a\n  text"]:
+            self.assertEqual(lex_blocks(md)[0].block_type, block_type_paragraph)
+
+    def test_nested_quote(self):
+        md = "> outer\n> text\n>> inner\n>>> innermost\n> back"
+        self.assertEqual(
+            markdown_to_html_node(md).to_html(),
+            "<div><blockquote>outer text<blockquote>inner<blockquote>innermost"
+            "</blockquote></blockquote>back</blockquote></div>",
+        )
+
+    def test_code_block_with_empty_lines(self):
+        md = "```\nfirst\n\n\nsecond\n```\n\nafter"
+        self.assertEqual(
+            markdown_to_html_node(md).to_html(),
+            "<div><pre><code>\nfirst\n\n\nsecond\n</code></pre><p>after</p></div>",
+        )
+
+    def test_whitespace_only_blocks_are_skipped(self):
+        self.assertListEqual(
+            [block.source for block in lex_blocks("a\n\n   \t\n\nb")], ["a", "b"]
+        )
+
+
+class TestBlockCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = enable_block_cache(64)
+
+    def tearDown(self):
+        enable_block_cache(None)
+
+    def test_cached_html_matches(self):
+        md = "# Title\n\nsome **bold**\n\n- a\n  - b\n\n```\ncode\n\n```"
+        for _ in range(2):
+            html = markdown_to_html_node(md).to_html()
+        enable_block_cache(None)
+        self.assertEqual(html, markdown_to_html_node(md).to_html())
+        self.assertEqual(self.cache.hits, 4)
+        self.assertEqual(self.cache.misses, 4)
+
+    def test_only_changed_blocks_are_rendered(self):
+        blocks = [f"paragraph {n}" for n in range(20)]
+        markdown_to_html_node("\n\n".join(blocks))
+        blocks[7] = "paragraph seven"
+        with mock.patch(
+            "block_markdown.block_to_html_node",
+            wraps=block_markdown.block_to_html_node,
+        ) as render:
+            html = markdown_to_html_node("\n\n".join(blocks)).to_html()
+        self.assertEqual(render.call_count, 1)
+        self.assertIn("<p>paragraph seven</p><p>paragraph 8</p>", html)
+
+
+class TestInlineCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = enable_inline_cache(64)
+
+    def tearDown(self):
+        enable_inline_cache(None)
+
+    def test_repeated_text_is_rendered_once(self):
+        md = "# See **also**\n\n- See **also**\n- [home](/)\n\n> See **also**"
+        expected = "<div><h1>See <b>also</b></h1><ul><li>See <b>also</b></li>"
+        with mock.patch(
+            "block_markdown.text_to_textnodes",
+            wraps=block_markdown.text_to_textnodes,
+        ) as parse:
+            html = markdown_to_html_node(md).to_html()
+        self.assertEqual(parse.call_count, 2)
+        self.assertTrue(html.startswith(expected))
+        enable_inline_cache(None)
+        self.assertEqual(html, markdown_to_html_node(md).to_html())
+        self.assertEqual((self.cache.hits, self.cache.misses), (2, 2))
+
+    def test_errors_are_not_cached(self):
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                markdown_to_html_node("some **bold")
+        self.assertEqual(len(self.cache), 0)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,151 @@
+import contextlib
+import io
+import os
+import tempfile
+import time
+import tracemalloc
+import unittest
+
+import block_markdown
+from buildstats import BuildStats, StageTimer, page_stages, percentile, summarize
+from generate_content import build_pages, discover_pages
+
+
+class TestStageTimer(unittest.TestCase):
+    def test_nested_stages_are_exclusive(self):
+        timer = StageTimer()
+        with timer.stage("outer"):
+            time.sleep(0.01)
+            with timer.stage("inner"):
+                time.sleep(0.02)
+        self.assertGreaterEqual(timer.totals["inner"], 0.02)
+        self.assertGreaterEqual(timer.totals["outer"], 0.01)
+        self.assertLess(timer.totals["outer"], 0.02)
+
+    def test_repeated_stages_add_up(self):
+        timer = StageTimer()
+        for _ in range(3):
+            with timer.stage("a"):
+                pass
+        self.assertListEqual(list(timer.totals), ["a"])
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 0.5), 50)
+        self.assertEqual(percentile(values, 0.99), 99)
+        self.assertEqual(percentile([], 0.5), 0.0)
+        self.assertEqual(summarize([3.0, 1.0, 2.0])["max"], 3.0)
+
+    def test_memory_peaks(self):
+        timer = StageTimer(track_memory=True)
+        tracemalloc.start()
+        try:
+            with timer.stage("outer"):
+                with timer.stage("small"):
+                    small = bytearray(10_000)
+                with timer.stage("large"):
+                    large = bytearray(1_000_000)
+                    del large
+        finally:
+            tracemalloc.stop()
+        del small
+        result = timer.result()
+        self.assertGreaterEqual(result["peaks"]["large"], 1_000_000)
+        self.assertLess(result["peaks"]["small"], 1_000_000)
+        # a stage peak includes the peaks of the stages nested in it
+        self.assertGreaterEqual(result["peaks"]["outer"], 1_000_000)
+        self.assertGreaterEqual(result["peak"], 1_000_000)
+
+
+class TestBuildReport(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        root = self.temp_dir.name
+        self.content = os.path.join(root, "content")
+        self.template = os.path.join(root, "template.html")
+        with open(self.template, "w") as file:
+            file.write("<title>{{ Title }}</title>{{ Content }}")
+        for n in range(6):
+            os.makedirs(os.path.join(self.content, str(n)))
+            with open(os.path.join(self.content, str(n), "index.md"), "w") as file:
+                file.write(f"# Page {n}\n\n" + "Some *text* here.\n\n" * (n * 50 + 1))
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def build(self, workers, stats=None):
+        stats = stats or BuildStats()
+        pages = discover_pages(
+            self.content, os.path.join(self.temp_dir.name, f"public{workers}")
+        )
+        with contextlib.redirect_stdout(io.StringIO()):
+            build_pages(pages, self.template, "/", workers, stats)
+        return stats.report(slowest=2)
+
+    def build_traced(self, workers, **kwargs):
+        tracemalloc.start()
+        try:
+            return self.build(workers, BuildStats(**kwargs))
+        finally:
+            tracemalloc.stop()
+
+    def test_report(self):
+        for workers in (1, 3):
+            report = self.build(workers)
+            self.assertEqual(report["page_count"], 6)
+            self.assertEqual(len(report["slowest_pages"]), 2)
+            slowest = [page["total"] for page in report["slowest_pages"]]
+            self.assertEqual(slowest, sorted(slowest, reverse=True))
+            self.assertEqual(slowest[0], report["pages"]["max"])
+            for name in page_stages:
+                self.assertGreater(report["stages"][name]["total"], 0)
+
+    def test_memory_report(self):
+        for workers in (1, 3):
+            report = self.build_traced(workers, track_memory=True)
+            self.assertEqual(len(report["largest_pages"]), 2)
+            largest = report["largest_pages"][0]
+            self.assertEqual(largest["peak_memory"], report["peak_memory"]["max"])
+            self.assertGreater(largest["peak_memory"], 0)
+            for name in ("parse_blocks", "parse_inlines", "serialize", "template"):
+                self.assertGreater(report["stages"][name]["peak_memory"], 0)
+
+    def test_cache_counters(self):
+        block_markdown.enable_inline_cache(100)
+        try:
+            for workers in (1, 3):
+                report = self.build(workers)
+                inline = report["caches"]["inline"]
+                # every page repeats one paragraph, rendered once per process
+                self.assertGreater(inline["hits"], 250)
+                self.assertLessEqual(inline["misses"], 12)
+                self.assertNotIn("block", report["caches"])
+        finally:
+            block_markdown.enable_inline_cache(None)
+
+    def test_build_stages_are_reported(self):
+        stats = BuildStats()
+        with stats.stage("compress"):
+            time.sleep(0.01)
+        stages = stats.report()["stages"]
+        self.assertGreaterEqual(stages["compress"]["total"], 0.01)
+        self.assertEqual(stages["static_copy"]["total"], 0.0)
+
+    def test_memory_budget_warns(self):
+        stats = BuildStats(memory_budget=2**20)
+        result = {"totals": {"read": 0.1}, "peaks": {"read": 2**21}, "peak": 2**21}
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            stats.add_page("big.md", "big.html", result)
+            stats.add_page("small.md", "small.html", dict(result, peak=2**19))
+        self.assertEqual(output.getvalue().count("over the memory budget"), 1)
+        self.assertEqual(stats.report()["largest_pages"][0]["source"], "big.md")
+
+    def test_memory_budget_fails(self):
+        for workers in (1, 3):
+            with self.assertRaises(RuntimeError):
+                self.build_traced(workers, memory_budget=1, budget_action="fail")
+
+
+if __name__ == "__main__":
+    unittest.main()
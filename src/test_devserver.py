@@ -0,0 +1,172 @@
+import os
+import tempfile
+import threading
+import unittest
+import urllib.error
+import urllib.request
+from unittest import mock
+
+import block_markdown
+import devserver
+from devserver import PageRenderer, make_server
+from testutil import write_file
+
+
+class TestPageRenderer(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = self.temp_dir.name
+        self.path = lambda *parts: os.path.join(self.root, *parts)
+        write_file(
+            self.path("template.html"), "<title>{{ Title }}</title>{{ Content }}"
+        )
+        write_file(self.path("content", "index.md"), "# Home\n\nhello")
+        write_file(self.path("content", "blog", "a", "index.md"), "# A\n\n**a**")
+        write_file(self.path("content", "about.md"), "# About")
+        write_file(self.path("static", "index.css"), "body {}")
+        self.renderer = PageRenderer(
+            self.path("content"), self.path("static"), self.path("template.html")
+        )
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def render(self, *parts):
+        with mock.patch(
+            "devserver.render_content", wraps=devserver.render_content
+        ) as render:
+            body = self.renderer.render(self.path("content", *parts))
+        return body, render.call_count
+
+    def touch(self, *parts, text=None):
+        path = self.path(*parts)
+        stat = os.stat(path)
+        if text is not None:
+            write_file(path, text)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    def test_resolve(self):
+        content = lambda *parts: ("page", self.path("content", *parts))
+        self.assertEqual(self.renderer.resolve("/"), content("index.md"))
+        post = content("blog", "a", "index.md")
+        self.assertEqual(self.renderer.resolve("/blog/a/"), post)
+        self.assertEqual(self.renderer.resolve("/blog/a"), post)
+        self.assertEqual(self.renderer.resolve("/about.html"), content("about.md"))
+        self.assertEqual(self.renderer.resolve("/about?x=1"), content("about.md"))
+        self.assertEqual(
+            self.renderer.resolve("/index.css"),
+            ("static", self.path("static", "index.css")),
+        )
+        self.assertIsNone(self.renderer.resolve("/missing"))
+        self.assertIsNone(self.renderer.resolve("/../template.html"))
+        self.assertIsNone(self.renderer.resolve("/%2e%2e/template.html"))
+
+    def test_resolve_base_path(self):
+        self.renderer.base_path = "/site/"
+        self.assertEqual(
+            self.renderer.resolve("/site/about"),
+            ("page", self.path("content", "about.md")),
+        )
+
+    def test_nothing_rendered_before_a_request(self):
+        self.assertEqual(len(self.renderer.pages), 0)
+        body, calls = self.render("index.md")
+        self.assertEqual(
+            body, b"<title>Home</title><div><h1>Home</h1><p>hello</p></div>\n"
+        )
+        self.assertEqual(calls, 1)
+        self.assertEqual(len(self.renderer.pages), 1)
+
+    def test_unchanged_page_is_cached(self):
+        self.render("index.md")
+        self.assertEqual(self.render("index.md")[1], 0)
+
+    def test_edited_page_is_rendered_again(self):
+        self.render("about.md")
+        self.touch("content", "about.md", text="# About us")
+        body, calls = self.render("about.md")
+        self.assertEqual(calls, 1)
+        self.assertIn(b"<h1>About us</h1>", body)
+
+    def test_touched_page_keeps_its_html(self):
+        first, _ = self.render("about.md")
+        self.touch("content", "about.md")
+        body, calls = self.render("about.md")
+        self.assertEqual((body, calls), (first, 0))
+        # the new mtime is remembered, the next request does not hash
+        self.assertEqual(self.render("about.md")[1], 0)
+
+    def test_template_change_reapplies_template(self):
+        self.render("about.md")
+        self.touch("template.html", text="<h6>{{ Title }}</h6>{{ Content }}")
+        body, calls = self.render("about.md")
+        self.assertEqual(calls, 0)
+        self.assertTrue(body.startswith(b"<h6>About</h6>"))
+
+    def test_least_recently_used_page_is_evicted(self):
+        self.renderer.pages = devserver.LRUCache(1)
+        self.render("index.md")
+        self.render("about.md")
+        self.assertEqual(self.render("index.md")[1], 1)
+
+    def test_main_enables_the_block_cache(self):
+        self.addCleanup(block_markdown.enable_block_cache, 0)
+        with mock.patch("devserver.make_server"), mock.patch("builtins.print"):
+            devserver.main([])
+        self.assertEqual(block_markdown.block_cache.max_size, 4096)
+
+
+class TestDevServer(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        root = self.temp_dir.name
+        write_file(os.path.join(root, "template.html"), "{{ Title }}|{{ Content }}")
+        write_file(os.path.join(root, "content", "index.md"), "# Home")
+        write_file(os.path.join(root, "content", "bad.md"), "no title")
+        write_file(os.path.join(root, "static", "index.css"), "body {}")
+        renderer = PageRenderer(
+            os.path.join(root, "content"),
+            os.path.join(root, "static"),
+            os.path.join(root, "template.html"),
+        )
+        self.server = make_server(renderer, port=0)
+        self.server.RequestHandlerClass.log_message = lambda *args: None
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        self.temp_dir.cleanup()
+
+    def get(self, path):
+        try:
+            with urllib.request.urlopen(self.url + path) as response:
+                return response.status, response.headers, response.read()
+        except urllib.error.HTTPError as error:
+            return error.code, error.headers, error.read()
+
+    def test_page(self):
+        status, headers, body = self.get("/")
+        self.assertEqual(status, 200)
+        self.assertEqual(headers["Content-Type"], "text/html; charset=utf-8")
+        self.assertEqual(body, b"Home|<div><h1>Home</h1></div>\n")
+
+    def test_static_file(self):
+        status, headers, body = self.get("/index.css")
+        self.assertEqual(status, 200)
+        self.assertEqual((headers["Content-Type"], body), ("text/css", b"body {}"))
+
+    def test_not_found(self):
+        self.assertEqual(self.get("/missing")[0], 404)
+
+    def test_render_error(self):
+        status, _, body = self.get("/bad")
+        self.assertEqual(status, 500)
+        self.assertIn(b"Can not render", body)
+
+
+if __name__ == "__main__":
+    unittest.main()
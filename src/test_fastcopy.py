@@ -0,0 +1,105 @@
+import errno
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from fastcopy import copy_file, copy_files, copy_tree
+from testutil import read_bytes, write_file
+
+
+class TestFastCopy(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = self.temp_dir.name
+        self.source = os.path.join(self.root, "static")
+        self.destination = os.path.join(self.root, "public")
+        write_file(os.path.join(self.source, "index.css"), b"body {}")
+        write_file(os.path.join(self.source, "images", "a.png"), os.urandom(300_000))
+        write_file(os.path.join(self.source, "images", "empty.png"), b"")
+        os.makedirs(os.path.join(self.source, "fonts"))
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def assertCopied(self, name):
+        source = os.path.join(self.source, name)
+        destination = os.path.join(self.destination, name)
+        self.assertEqual(read_bytes(source), read_bytes(destination))
+        self.assertEqual(os.stat(source).st_mtime_ns, os.stat(destination).st_mtime_ns)
+
+    def test_copy_tree(self):
+        stats = copy_tree(self.source, self.destination)
+        self.assertEqual(stats.files, 3)
+        self.assertEqual(stats.size, 300_007)
+        for name in ("index.css", "images/a.png", "images/empty.png"):
+            self.assertCopied(name)
+        self.assertTrue(os.path.isdir(os.path.join(self.destination, "fonts")))
+        self.assertIn("MB/s", stats.summary())
+
+    def test_sizes_come_with_the_pairs(self):
+        with mock.patch("os.path.getsize") as getsize:
+            stats = copy_tree(self.source, self.destination)
+        getsize.assert_not_called()
+        self.assertEqual(stats.size, 300_007)
+        stats = copy_files(
+            [(os.path.join(self.source, "index.css"), os.path.join(self.root, "a"))]
+        )
+        self.assertEqual(stats.size, 7)
+
+    def test_hardlink(self):
+        stats = copy_tree(self.source, self.destination, "hardlink")
+        self.assertEqual(stats.linked, 3)
+        self.assertTrue(
+            os.path.samefile(
+                os.path.join(self.source, "index.css"),
+                os.path.join(self.destination, "index.css"),
+            )
+        )
+
+    def test_reflink_falls_back_to_copy(self):
+        stats = copy_tree(self.source, self.destination, "reflink")
+        self.assertEqual(stats.files, 3)
+        self.assertCopied("images/a.png")
+        self.assertFalse(
+            os.path.samefile(
+                os.path.join(self.source, "index.css"),
+                os.path.join(self.destination, "index.css"),
+            )
+        )
+
+    def test_copy_without_kernel_support(self):
+        error = OSError(errno.ENOSYS, "not supported")
+        with mock.patch("os.copy_file_range", side_effect=error, create=True):
+            with mock.patch("os.sendfile", side_effect=error, create=True):
+                copy_tree(self.source, self.destination)
+        self.assertCopied("images/a.png")
+
+    def test_sendfile_fallback(self):
+        error = OSError(errno.EXDEV, "cross device")
+        with mock.patch("os.copy_file_range", side_effect=error, create=True):
+            copy_file(
+                os.path.join(self.source, "images", "a.png"),
+                os.path.join(self.root, "a.png"),
+            )
+        self.assertEqual(
+            read_bytes(os.path.join(self.source, "images", "a.png")),
+            read_bytes(os.path.join(self.root, "a.png")),
+        )
+
+    def test_errors_are_raised(self):
+        with self.assertRaises(FileNotFoundError):
+            copy_files([(os.path.join(self.source, "missing"), self.destination)])
+        with self.assertRaises(ValueError):
+            copy_files([], "symlink")
+
+    def test_overwrites_existing_files(self):
+        write_file(os.path.join(self.destination, "index.css"), b"old and longer")
+        copy_tree(self.source, self.destination)
+        self.assertCopied("index.css")
+        copy_tree(self.source, self.destination, "hardlink")
+        self.assertCopied("index.css")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,10 @@
+import contextlib
+import io
+import os
+import tempfile
 import unittest
 
-from generate_content import (
-    extract_title,
-)
-
+from generate_content import build_pages, discover_pages, extract_title
 
 md_1 = """# Tolkien Fan Club             
 
@@ -32,5 +33,60 @@ class TestGenerateContent(unittest.TestCase):
             extract_title(md_3)
 
 
+class TestBuildPages(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        root = self.temp_dir.name
+        self.content = os.path.join(root, "content")
+        self.template = os.path.join(root, "template.html")
+        with open(self.template, "w") as file:
+            file.write('<title>{{ Title }}</title><a href="/">{{ Content }}</a>')
+        for n in range(8):
+            os.makedirs(os.path.join(self.content, f"page{n}"))
+            with open(os.path.join(self.content, f"page{n}", "index.md"), "w") as file:
+                file.write(f"# Page {n}\n\nSome **text** [here](/page{n})\n")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def build(self, public, workers):
+        pages = discover_pages(self.content, public)
+        log = io.StringIO()
+        with contextlib.redirect_stdout(log):
+            build_pages(pages, self.template, "/site/", workers)
+        outputs = {}
+        for _, dest in pages:
+            with open(dest) as file:
+                outputs[os.path.relpath(dest, public)] = file.read()
+        return log.getvalue().replace(public, ""), outputs
+
+    def test_parallel_matches_serial(self):
+        root = self.temp_dir.name
+        serial = self.build(os.path.join(root, "serial"), 1)
+        parallel = self.build(os.path.join(root, "parallel"), 4)
+        self.assertEqual(serial, parallel)
+        self.assertIn(
+            'href="/site/page3"', serial[1][os.path.join("page3", "index.html")]
+        )
+
+    def test_parallel_error_matches_serial(self):
+        with open(os.path.join(self.content, "page5", "index.md"), "w") as file:
+            file.write("no title here\n")
+
+        def failing_build(public, workers):
+            log = io.StringIO()
+            pages = discover_pages(self.content, public)
+            with contextlib.redirect_stdout(log):
+                with self.assertRaises(ValueError) as error:
+                    build_pages(pages, self.template, "/", workers)
+            return log.getvalue().replace(public, ""), str(error.exception)
+
+        root = self.temp_dir.name
+        serial = failing_build(os.path.join(root, "serial"), 1)
+        parallel = failing_build(os.path.join(root, "parallel"), 4)
+        self.assertEqual(serial, parallel)
+        self.assertEqual(serial[1], "No title found")
+
+
 if __name__ == "__main__":
     unittest.main()
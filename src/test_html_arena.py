@@ -0,0 +1,94 @@
+import glob
+import io
+import os
+import unittest
+
+from block_markdown import markdown_to_html_arena, markdown_to_html_node
+from html_arena import HTMLArena
+from htmlnode import LeafNode, ParentNode
+
+content_dir = os.path.join(os.path.dirname(__file__), "..", "content")
+
+md = """# Title
+
+A paragraph with **bold *and italic*** and a [link](/somewhere).
+
+- one
+  1. nested
+- two
+
+> quoted
+>> deeper
+
+```
+code
+```
+"""
+
+
+class TestHTMLArena(unittest.TestCase):
+    def test_matches_html_nodes(self):
+        self.assertEqual(
+            markdown_to_html_arena(md).to_html(), markdown_to_html_node(md).to_html()
+        )
+
+    def test_matches_html_nodes_for_content(self):
+        for path in glob.glob(os.path.join(content_dir, "**", "*.md"), recursive=True):
+            with open(path) as file:
+                markdown = file.read()
+            self.assertEqual(
+                markdown_to_html_arena(markdown).to_html(),
+                markdown_to_html_node(markdown).to_html(),
+            )
+
+    def test_tags_are_interned(self):
+        arena = markdown_to_html_arena("- a\n- b\n- c\n\n- d")
+        self.assertEqual(len(arena), 11)
+        self.assertListEqual(arena.tags, [None, "div", "ul", "li"])
+
+    def test_round_trip(self):
+        node = ParentNode(
+            "p",
+            [
+                LeafNode(None, "text "),
+                ParentNode("b", [LeafNode("i", "both")]),
+                LeafNode("a", "link", {"href": "/x"}),
+            ],
+            {"class": "c"},
+        )
+        arena = HTMLArena.from_node(node)
+        self.assertEqual(arena.to_html(), node.to_html())
+        self.assertEqual(arena.to_node().to_html(), node.to_html())
+        stream = io.StringIO()
+        arena.write_html(stream)
+        self.assertEqual(stream.getvalue(), node.to_html())
+
+    def test_subtree(self):
+        arena = markdown_to_html_arena("para\n\n- item")
+        ul = list(arena.children(0))[1]
+        self.assertEqual(arena.to_html(ul), "<ul><li>item</li></ul>")
+
+    def test_leaf_root(self):
+        arena = HTMLArena.from_node(LeafNode("b", "bold"))
+        self.assertEqual(arena.to_html(), "<b>bold</b>")
+
+    def test_deep_tree(self):
+        arena = HTMLArena()
+        parent = arena.add_parent(-1, "div")
+        for _ in range(100_000):
+            parent = arena.add_parent(parent, "span")
+        arena.add_leaf(parent, None, "deep")
+        html = arena.to_html()
+        self.assertTrue(html.endswith("deep" + "</span>" * 100_000 + "</div>"))
+
+    def test_empty_parent_raises_error(self):
+        arena = HTMLArena()
+        arena.add_parent(-1, "div")
+        with self.assertRaises(ValueError):
+            arena.to_html()
+        with self.assertRaises(ValueError):
+            arena.add_leaf(0, "p", None)
+
+
+if __name__ == "__main__":
+    unittest.main()
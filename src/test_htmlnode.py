@@ -1,3 +1,5 @@
+import io
+import pickle
 import unittest
 
 from htmlnode import HTMLNode, LeafNode, ParentNode
@@ -108,6 +110,58 @@ class TestHTMLNode(unittest.TestCase):
             parent_node.to_html(), "<div><span><b>grandchild</b></span></div>"
         )
 
+    def test_nodes_are_slotted(self):
+        for node in [
+            HTMLNode("p"),
+            LeafNode("b", "bold"),
+            ParentNode("p", [LeafNode("b", "bold")]),
+        ]:
+            self.assertFalse(hasattr(node, "__dict__"))
+            with self.assertRaises(AttributeError):
+                node.extra = "not allowed"
+
+    def test_parent_value_is_none(self):
+        node = ParentNode("p", [LeafNode("b", "bold")])
+        self.assertIsNone(node.value)
+
+    def test_pickle(self):
+        node = ParentNode("p", [LeafNode("a", "link", {"href": "/"})], {"id": "x"})
+        self.assertEqual(pickle.loads(pickle.dumps(node)).to_html(), node.to_html())
+
+    def test_iter_html(self):
+        node = ParentNode(
+            "p",
+            [LeafNode("b", "bold"), ParentNode("i", [LeafNode(None, "it")])],
+            {"class": "x"},
+        )
+        self.assertListEqual(
+            list(node.iter_html()),
+            ['<p class="x">', "<b>bold</b>", "<i>", "it", "</i>", "</p>"],
+        )
+        self.assertEqual(node.to_html(), "".join(node.iter_html()))
+
+    def test_write_html(self):
+        node = ParentNode("ul", [ParentNode("li", [LeafNode(None, "one")])])
+        stream = io.StringIO()
+        node.write_html(stream)
+        self.assertEqual(stream.getvalue(), "<ul><li>one</li></ul>")
+
+    def test_deep_tree(self):
+        node = LeafNode(None, "deep")
+        for _ in range(5000):
+            node = ParentNode("span", [node])
+        html = node.to_html()
+        self.assertTrue(html.startswith("<span>" * 5000 + "deep</span>"))
+
+    def test_invalid_descendant_raises_error(self):
+        node = ParentNode("div", [ParentNode("p", [])])
+        with self.assertRaises(ValueError):
+            node.to_html()
+
+    def test_base_node_not_implemented(self):
+        with self.assertRaises(NotImplementedError):
+            HTMLNode("p", "text").to_html()
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,138 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from copystatic import copy_contents_recursive
+from generate_content import discover_pages
+from ignore import IgnoreMatcher, compile_pattern
+from inventory import scan
+from testutil import write_file
+
+
+def matches(pattern, path):
+    return compile_pattern(pattern).regex.fullmatch(path) is not None
+
+
+class TestPatterns(unittest.TestCase):
+    def test_blank_and_comments(self):
+        self.assertIsNone(compile_pattern(""))
+        self.assertIsNone(compile_pattern("   "))
+        self.assertIsNone(compile_pattern("# comment"))
+        self.assertTrue(matches("\\#notes", "#notes"))
+
+    def test_name_matches_at_any_depth(self):
+        self.assertTrue(matches("drafts", "drafts"))
+        self.assertTrue(matches("drafts", "blog/drafts"))
+        self.assertFalse(matches("drafts", "blog/drafts.md"))
+
+    def test_slash_anchors(self):
+        self.assertTrue(matches("/drafts", "drafts"))
+        self.assertFalse(matches("/drafts", "blog/drafts"))
+        self.assertTrue(matches("blog/*.md", "blog/a.md"))
+        self.assertFalse(matches("blog/*.md", "blog/a/b.md"))
+        self.assertFalse(matches("blog/*.md", "x/blog/a.md"))
+
+    def test_globs(self):
+        self.assertTrue(matches("*.psd", "images/big.psd"))
+        self.assertTrue(matches("page?.md", "page1.md"))
+        self.assertFalse(matches("page?.md", "page10.md"))
+        self.assertTrue(matches("[ab].md", "a.md"))
+        self.assertFalse(matches("[!ab].md", "a.md"))
+        self.assertTrue(matches("[!ab].md", "c.md"))
+
+    def test_double_star(self):
+        self.assertTrue(matches("**/tmp", "tmp"))
+        self.assertTrue(matches("**/tmp", "a/b/tmp"))
+        self.assertTrue(matches("blog/**", "blog/a/b.md"))
+        self.assertFalse(matches("blog/**", "blog"))
+        self.assertTrue(matches("a/**/b", "a/b"))
+        self.assertTrue(matches("a/**/b", "a/x/y/b"))
+        self.assertFalse(matches("a/**/b", "ab"))
+
+    def test_flags(self):
+        pattern = compile_pattern("!build/")
+        self.assertTrue(pattern.negated)
+        self.assertTrue(pattern.dir_only)
+        self.assertTrue(matches("\\!important", "!important"))
+        self.assertTrue(matches("trailing\\ ", "trailing "))
+        self.assertTrue(matches("trailing  ", "trailing"))
+
+
+class TestIgnoreMatcher(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = self.temp_dir.name
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_last_match_wins(self):
+        matcher = IgnoreMatcher(self.root, ["*.md", "!keep.md"])
+        self.assertTrue(matcher.is_ignored("a.md"))
+        self.assertFalse(matcher.is_ignored("blog/keep.md"))
+
+    def test_directory_only(self):
+        matcher = IgnoreMatcher(self.root, ["build/"])
+        self.assertTrue(matcher.is_ignored("build", is_dir=True))
+        self.assertFalse(matcher.is_ignored("build"))
+        self.assertTrue(matcher.is_ignored("build/page.md"))
+
+    def test_ignored_directory_can_not_be_included_again(self):
+        matcher = IgnoreMatcher(self.root, ["drafts/", "!drafts/keep.md"])
+        self.assertTrue(matcher.is_ignored("drafts/keep.md"))
+
+    def test_nested_ignore_files(self):
+        write_file(os.path.join(self.root, ".gitignore"), "*.tmp\n")
+        write_file(os.path.join(self.root, "blog", ".gitignore"), "!a.tmp\n/local\n")
+        matcher = IgnoreMatcher(self.root)
+        self.assertTrue(matcher.is_ignored("b.tmp"))
+        self.assertTrue(matcher.is_ignored("blog/b.tmp"))
+        self.assertFalse(matcher.is_ignored("blog/a.tmp"))
+        self.assertTrue(matcher.is_ignored("a.tmp"))
+        # patterns with a slash are relative to their own ignore file
+        self.assertTrue(matcher.is_ignored("blog/local"))
+        self.assertFalse(matcher.is_ignored("local"))
+        self.assertFalse(matcher.is_ignored("blog/x/local"))
+
+    def test_nested_files_found_through_inventory(self):
+        write_file(os.path.join(self.root, "blog", ".gitignore"), "*.md\n")
+        write_file(os.path.join(self.root, "blog", "a.md"))
+        write_file(os.path.join(self.root, "index.md"))
+        inventory = scan(self.root)
+        matcher = IgnoreMatcher(self.root, [".*"], inventory=inventory)
+        files = [entry.relpath for entry in inventory.files(matcher.skip)]
+        self.assertListEqual(files, ["index.md"])
+
+
+class TestIgnoreList(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.temp_dir.name, "content")
+        for name in ("index.md", "blog/a.md", "drafts/b.md", ".hidden/c.md"):
+            write_file(os.path.join(self.content, name), "# Title")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_ignore_list_no_longer_drops_everything(self):
+        pages = discover_pages(self.content, "public", ["drafts/"])
+        self.assertListEqual(
+            [dest for _, dest in pages],
+            [
+                os.path.join("public", "blog", "a.html"),
+                os.path.join("public", "index.html"),
+            ],
+        )
+        self.assertEqual(len(discover_pages(self.content, "public")), 4)
+
+    def test_copy_contents_recursive(self):
+        destination = os.path.join(self.temp_dir.name, "public")
+        with contextlib.redirect_stdout(io.StringIO()):
+            copy_contents_recursive(self.content, destination, ["/index.md"])
+        self.assertListEqual(sorted(os.listdir(destination)), ["blog", "drafts"])
+
+
+if __name__ == "__main__":
+    unittest.main()
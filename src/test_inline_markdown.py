@@ -185,6 +185,25 @@ class TestInlineMarkdown(unittest.TestCase):
             new_nodes,
         )
 
+    def test_split_links_skips_images(self):
+        node = TextNode("![same](/a.png) and [same](/a.png)", TextType.TEXT)
+        self.assertListEqual(
+            [
+                TextNode("![same](/a.png) and ", TextType.TEXT),
+                TextNode("same", TextType.LINK, "/a.png"),
+            ],
+            split_nodes_link([node]),
+        )
+
+    def test_split_many_links(self):
+        text = "".join(f"[link {n}](/page/{n}) and " for n in range(2000))
+        new_nodes = split_nodes_link([TextNode(text, TextType.TEXT)])
+        self.assertEqual(len(new_nodes), 4000)
+        self.assertEqual(
+            new_nodes[-2], TextNode("link 1999", TextType.LINK, "/page/1999")
+        )
+        self.assertEqual(new_nodes[-1], TextNode(" and ", TextType.TEXT))
+
     def test_text_to_textnodes(self):
         nodes = text_to_textnodes(
             "This is **text** with an *italic* word and a `code block` and an ![obi wan image](https://i.imgur.com/fJRm4Vk.jpeg) and a [link](https://boot.dev)"
@@ -208,5 +227,117 @@ class TestInlineMarkdown(unittest.TestCase):
         )
 
 
+class TestInlineScanner(unittest.TestCase):
+    def test_bold_inside_italic(self):
+        nodes = text_to_textnodes("*italic **bold** more*")
+        self.assertListEqual(
+            [
+                TextNode(
+                    "italic bold more",
+                    TextType.ITALIC,
+                    children=[
+                        TextNode("italic ", TextType.TEXT),
+                        TextNode("bold", TextType.BOLD),
+                        TextNode(" more", TextType.TEXT),
+                    ],
+                )
+            ],
+            nodes,
+        )
+
+    def test_italic_inside_bold(self):
+        nodes = text_to_textnodes("a **bold _italic_** b")
+        self.assertListEqual(
+            [
+                TextNode("a ", TextType.TEXT),
+                TextNode(
+                    "bold italic",
+                    TextType.BOLD,
+                    children=[
+                        TextNode("bold ", TextType.TEXT),
+                        TextNode("italic", TextType.ITALIC),
+                    ],
+                ),
+                TextNode(" b", TextType.TEXT),
+            ],
+            nodes,
+        )
+
+    def test_triple_asterisks(self):
+        nodes = text_to_textnodes("***both***")
+        self.assertListEqual(
+            [
+                TextNode(
+                    "both",
+                    TextType.BOLD,
+                    children=[TextNode("both", TextType.ITALIC)],
+                )
+            ],
+            nodes,
+        )
+
+    def test_code_is_verbatim(self):
+        nodes = text_to_textnodes("run `a * b_c **d**` now")
+        self.assertListEqual(
+            [
+                TextNode("run ", TextType.TEXT),
+                TextNode("a * b_c **d**", TextType.CODE),
+                TextNode(" now", TextType.TEXT),
+            ],
+            nodes,
+        )
+
+    def test_link_inside_bold(self):
+        nodes = text_to_textnodes("**see [docs](https://boot.dev)**")
+        self.assertListEqual(
+            [
+                TextNode(
+                    "see docs",
+                    TextType.BOLD,
+                    children=[
+                        TextNode("see ", TextType.TEXT),
+                        TextNode("docs", TextType.LINK, "https://boot.dev"),
+                    ],
+                )
+            ],
+            nodes,
+        )
+
+    def test_plain_delimiters(self):
+        self.assertListEqual(
+            [TextNode("2 * 3 and snake_case_name", TextType.TEXT)],
+            text_to_textnodes("2 * 3 and snake_case_name"),
+        )
+        self.assertListEqual(
+            [TextNode("not an image ![alt] or [link]", TextType.TEXT)],
+            text_to_textnodes("not an image ![alt] or [link]"),
+        )
+
+    def test_empty_emphasis_is_dropped(self):
+        self.assertListEqual(
+            [TextNode("a", TextType.TEXT), TextNode("b", TextType.TEXT)],
+            text_to_textnodes("a****b"),
+        )
+
+    def test_unclosed_delimiters_raise(self):
+        for text in ["**bold", "an *italic", "`code", "**a *b** c*"]:
+            with self.assertRaises(ValueError):
+                text_to_textnodes(text)
+
+    def test_matches_split_passes(self):
+        text = (
+            "A **bold** word, _underscored_ and *starred* italics, `code`, "
+            "an ![image](/a.png) and a [link](https://boot.dev) at the end"
+        )
+        nodes = [TextNode(text, TextType.TEXT)]
+        nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+        nodes = split_nodes_delimiter(nodes, "*", TextType.ITALIC)
+        nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
+        nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+        nodes = split_nodes_image(nodes)
+        nodes = split_nodes_link(nodes)
+        self.assertListEqual(nodes, text_to_textnodes(text))
+
+
 if __name__ == "__main__":
     unittest.main()
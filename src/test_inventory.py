@@ -0,0 +1,64 @@
+import os
+import tempfile
+import unittest
+
+from inventory import kind_dir, kind_file, scan
+from testutil import write_file
+
+
+class TestInventory(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = self.temp_dir.name
+        write_file(os.path.join(self.root, "index.md"), "# Home")
+        write_file(os.path.join(self.root, "blog", "b", "index.md"), "# B")
+        write_file(os.path.join(self.root, "blog", "a", "index.md"), "# A")
+        write_file(os.path.join(self.root, "blog", "a", "image.png"), "png")
+        os.makedirs(os.path.join(self.root, "empty"))
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_walk_is_depth_first_in_name_order(self):
+        inventory = scan(self.root)
+        self.assertListEqual(
+            [entry.relpath for entry in inventory.walk()],
+            [
+                "blog",
+                os.path.join("blog", "a"),
+                os.path.join("blog", "a", "image.png"),
+                os.path.join("blog", "a", "index.md"),
+                os.path.join("blog", "b"),
+                os.path.join("blog", "b", "index.md"),
+                "empty",
+                "index.md",
+            ],
+        )
+
+    def test_entries(self):
+        inventory = scan(self.root)
+        entry = inventory.get(os.path.join("blog", "a", "image.png"))
+        path = os.path.join(self.root, "blog", "a", "image.png")
+        stat = os.stat(path)
+        self.assertEqual(entry.path, path)
+        self.assertEqual(entry.kind, kind_file)
+        self.assertEqual(entry.size, 3)
+        self.assertEqual(entry.mtime_ns, stat.st_mtime_ns)
+        self.assertEqual(entry.inode, stat.st_ino)
+        self.assertEqual(inventory.get("empty").kind, kind_dir)
+        self.assertEqual(len(inventory), 8)
+
+    def test_skip_prunes_directories(self):
+        inventory = scan(self.root)
+        files = inventory.files(lambda entry: entry.name == "blog")
+        self.assertListEqual([entry.relpath for entry in files], ["index.md"])
+
+    def test_symlink_loops_are_listed_once(self):
+        os.symlink(self.root, os.path.join(self.root, "blog", "loop"))
+        inventory = scan(self.root)
+        self.assertEqual(inventory.get(os.path.join("blog", "loop")).kind, kind_dir)
+        self.assertEqual(len(inventory.files()), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
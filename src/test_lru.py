@@ -0,0 +1,33 @@
+import unittest
+
+from lru import LRUCache
+
+
+class TestLRUCache(unittest.TestCase):
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        self.assertEqual(cache.get("a"), 1)
+        cache.put("c", 3)
+        self.assertNotIn("b", cache)
+        self.assertIn("a", cache)
+        self.assertEqual(len(cache), 2)
+
+    def test_counters(self):
+        cache = LRUCache(4)
+        cache.put("a", 1)
+        cache.get("a")
+        cache.get("b")
+        cache.get("b", 0)
+        self.assertDictEqual(
+            cache.counters(), {"hits": 1, "misses": 2, "size": 1, "max_size": 4}
+        )
+
+    def test_size_must_be_positive(self):
+        with self.assertRaises(ValueError):
+            LRUCache(0)
+
+
+if __name__ == "__main__":
+    unittest.main()
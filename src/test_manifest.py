@@ -0,0 +1,224 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import generate_content
+import main
+from copystatic import sync_contents
+from generate_content import discover_pages, generate_pages_incremental
+from manifest import BuildManifest, hash_file, page_record
+from testutil import write_file
+
+template = "<title>{{ Title }}</title><article>{{ Content }}</article>"
+
+
+class TestIncrementalBuild(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        root = self.temp_dir.name
+        self.content = os.path.join(root, "content")
+        self.public = os.path.join(root, "public")
+        self.template = os.path.join(root, "template.html")
+        self.manifest = os.path.join(root, "manifest.json")
+        write_file(self.template, template)
+        write_file(os.path.join(self.content, "index.md"), "# Home\n\nhello")
+        write_file(os.path.join(self.content, "blog", "a", "index.md"), "# A\n\na")
+        write_file(os.path.join(self.content, "blog", "b", "index.md"), "# B\n\nb")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def build(self, base_path="/"):
+        with mock.patch(
+            "generate_content.generate_page", wraps=generate_content.generate_page
+        ) as generate_page:
+            with contextlib.redirect_stdout(io.StringIO()):
+                generate_pages_incremental(
+                    self.content, self.public, self.template, base_path, self.manifest
+                )
+        return sorted(call.args[0] for call in generate_page.call_args_list)
+
+    def test_discover_pages(self):
+        pages = discover_pages(self.content, self.public)
+        self.assertListEqual(
+            [
+                (
+                    os.path.join(self.content, "blog", "a", "index.md"),
+                    os.path.join(self.public, "blog", "a", "index.html"),
+                ),
+                (
+                    os.path.join(self.content, "blog", "b", "index.md"),
+                    os.path.join(self.public, "blog", "b", "index.html"),
+                ),
+                (
+                    os.path.join(self.content, "index.md"),
+                    os.path.join(self.public, "index.html"),
+                ),
+            ],
+            pages,
+        )
+
+    def test_first_build_renders_everything(self):
+        self.assertEqual(len(self.build()), 3)
+        self.assertTrue(os.path.exists(os.path.join(self.public, "index.html")))
+
+    def test_unchanged_build_renders_nothing(self):
+        self.build()
+        self.assertListEqual(self.build(), [])
+
+    def test_edit_renders_one_page(self):
+        self.build()
+        edited = os.path.join(self.content, "blog", "a", "index.md")
+        write_file(edited, "# A\n\nedited")
+        self.assertListEqual(self.build(), [edited])
+
+    def test_template_and_base_path_invalidate(self):
+        self.build()
+        write_file(self.template, template + "\n")
+        self.assertEqual(len(self.build()), 3)
+        self.assertEqual(len(self.build("/site/")), 3)
+
+    def test_minify_setting_invalidates(self):
+        self.build()
+        with mock.patch("template.minify_pages", True):
+            self.assertEqual(len(self.build()), 3)
+            self.assertEqual(self.build(), [])
+        self.assertEqual(len(self.build()), 3)
+
+    def test_deleted_output_is_rendered_again(self):
+        self.build()
+        os.remove(os.path.join(self.public, "index.html"))
+        self.assertListEqual(self.build(), [os.path.join(self.content, "index.md")])
+
+    def test_removed_source_deletes_output(self):
+        self.build()
+        os.remove(os.path.join(self.content, "blog", "b", "index.md"))
+        os.rmdir(os.path.join(self.content, "blog", "b"))
+        self.assertListEqual(self.build(), [])
+        self.assertFalse(os.path.exists(os.path.join(self.public, "blog", "b")))
+        self.assertTrue(os.path.exists(os.path.join(self.public, "blog", "a")))
+
+    def test_outdated_manifest_is_ignored(self):
+        self.build()
+        manifest = BuildManifest.load(self.manifest)
+        self.assertEqual(len(manifest.pages), 3)
+        write_file(self.manifest, '{"version": "0", "pages": {}}')
+        self.assertEqual(BuildManifest.load(self.manifest).pages, {})
+
+    def test_page_record(self):
+        record = page_record("a.md", hash_file(self.template), "t", "/")
+        self.assertEqual(record["source_hash"], hash_file(self.template))
+        self.assertEqual(record["base_path"], "/")
+
+
+class TestStaticSync(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        root = self.temp_dir.name
+        self.static = os.path.join(root, "static")
+        self.public = os.path.join(root, "public")
+        self.manifest = os.path.join(root, "manifest.json")
+        write_file(os.path.join(self.static, "index.css"), "body {}")
+        write_file(os.path.join(self.static, "images", "a.png"), "a")
+        write_file(os.path.join(self.static, "images", "b.png"), "b")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def sync(self, use_hash=False, minify_css=False):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return sync_contents(
+                self.static,
+                self.public,
+                self.manifest,
+                use_hash,
+                minify_css=minify_css,
+            )
+
+    def test_unchanged_files_are_untouched(self):
+        self.assertEqual(self.sync(), (3, 0, 0))
+        output = os.path.join(self.public, "images", "a.png")
+        mtime = os.stat(output).st_mtime_ns
+        self.assertEqual(self.sync(), (0, 3, 0))
+        self.assertEqual(os.stat(output).st_mtime_ns, mtime)
+
+    def test_minified_stylesheet_is_synced_once(self):
+        output = os.path.join(self.public, "index.css")
+        write_file(os.path.join(self.static, "index.css"), "body {\n  margin: 0;\n}\n")
+        self.assertEqual(self.sync(minify_css=True), (3, 0, 0))
+        with open(output) as file:
+            self.assertEqual(file.read(), "body{margin:0}")
+        mtime = os.stat(output).st_mtime_ns
+        self.assertEqual(self.sync(minify_css=True), (0, 3, 0))
+        self.assertEqual(os.stat(output).st_mtime_ns, mtime)
+        # turning minification off copies the stylesheet as it is again
+        self.assertEqual(self.sync(), (1, 2, 0))
+        with open(output) as file:
+            self.assertEqual(file.read(), "body {\n  margin: 0;\n}\n")
+
+    def test_changed_file_is_copied(self):
+        self.sync()
+        write_file(os.path.join(self.static, "images", "a.png"), "changed")
+        self.assertEqual(self.sync(), (1, 2, 0))
+        with open(os.path.join(self.public, "images", "a.png")) as file:
+            self.assertEqual(file.read(), "changed")
+
+    def test_hash_ignores_touched_files(self):
+        self.sync()
+        os.utime(os.path.join(self.static, "index.css"), (0, 0))
+        self.assertEqual(self.sync(use_hash=True), (0, 3, 0))
+        self.assertEqual(self.sync(), (1, 2, 0))
+
+    def test_stale_files_are_removed(self):
+        self.sync()
+        page = os.path.join(self.public, "images", "page.html")
+        write_file(page, "generated")
+        os.remove(os.path.join(self.static, "images", "a.png"))
+        os.remove(os.path.join(self.static, "images", "b.png"))
+        self.assertEqual(self.sync(), (0, 1, 2))
+        # files the sync never copied are left alone
+        self.assertTrue(os.path.exists(page))
+        self.assertFalse(os.path.exists(os.path.join(self.public, "images", "a.png")))
+
+    def test_pages_and_static_share_the_manifest(self):
+        self.sync()
+        manifest = BuildManifest.load(self.manifest)
+        manifest.pages = {"index.html": {}}
+        manifest.save()
+        self.sync()
+        manifest = BuildManifest.load(self.manifest)
+        self.assertEqual(manifest.pages, {"index.html": {}})
+        self.assertEqual(len(manifest.static), 3)
+
+
+class TestFullBuild(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        root = self.temp_dir.name
+        write_file(os.path.join(root, "template.html"), '<link href="/index.css">')
+        write_file(os.path.join(root, "content", "index.md"), "# Home\n\nhello")
+        write_file(os.path.join(root, "static", "index.css"), "body {}")
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(root)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def build(self, *argv):
+        with contextlib.redirect_stdout(io.StringIO()):
+            main.build(main.parse_args(list(argv)))
+        with open(os.path.join("docs", "index.html")) as file:
+            return file.read()
+
+    def test_full_build_resets_the_manifest(self):
+        self.build("--incremental")
+        self.assertIn('href="/site/index.css"', self.build("/site/"))
+        self.assertFalse(os.path.exists(main.manifest_path))
+        self.assertIn('href="/index.css"', self.build("--incremental"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+import os
+import tempfile
+import unittest
+
+from minify import (
+    HTMLMinifier,
+    iter_minified,
+    minify_css,
+    minify_html,
+    minify_stylesheets,
+)
+from template import CompiledTemplate
+
+
+class TestMinifyHTML(unittest.TestCase):
+    def test_whitespace_between_block_tags_is_dropped(self):
+        html = (
+            "<!doctype html>\n<html>\n  <head>\n"
+            "    <title> Home </title>\n  </head>\n</html>\n"
+        )
+        self.assertEqual(
+            minify_html(html),
+            "<!doctype html><html><head><title>Home</title></head></html>",
+        )
+
+    def test_whitespace_in_text_is_collapsed(self):
+        self.assertEqual(
+            minify_html("<p>a  <b>b</b>\n <i>c</i>\t d</p>"),
+            "<p>a <b>b</b> <i>c</i> d</p>",
+        )
+
+    def test_non_breaking_spaces_are_kept(self):
+        html = "<p>a\u00a0 \u00a0 b</p>"
+        self.assertEqual(minify_html(html), html)
+
+    def test_comments_are_stripped(self):
+        self.assertEqual(
+            minify_html("<div> <!-- a <p> note --> <p>x</p></div>"),
+            "<div><p>x</p></div>",
+        )
+        self.assertEqual(
+            minify_html("<!--[if IE]><p>ie</p><![endif]-->"),
+            "<!--[if IE]><p>ie</p><![endif]-->",
+        )
+
+    def test_preserved_content(self):
+        code = "<pre><code>def f():\n    return  1\n</code></pre>"
+        self.assertEqual(minify_html(f"<div>\n  {code}\n</div>"), f"<div>{code}</div>")
+        self.assertEqual(
+            minify_html("<p>run <code>a  =  1</code> now</p>"),
+            "<p>run <code>a  =  1</code> now</p>",
+        )
+        for tag in ("textarea", "script", "style"):
+            html = f"<{tag}>a\n\n  <!-- b -->  <p>\n</{tag.upper()}>"
+            self.assertEqual(minify_html(html), html)
+
+    def test_attributes_are_kept(self):
+        html = '<a href="/x" title="a > b">link</a>'
+        self.assertEqual(minify_html(html), html)
+
+    def test_lone_less_than(self):
+        self.assertEqual(minify_html("<p>1 < 2  and 3 <4</p>"), "<p>1 < 2 and 3 <4</p>")
+
+    def test_streaming_matches_whole_page(self):
+        html = (
+            "<!doctype html>\n<html>\n  <body>\n    <article><div><h1>T</h1>"
+            "<p>a  <b>b</b> c</p><!-- x --><pre><code>x  =\n  1</code></pre>"
+            '<p><a href="/a b">l</a>\n</p></div></article>\n  </body>\n</html>\n'
+        )
+        whole = minify_html(html)
+        for size in (1, 2, 3, 7):
+            fragments = [html[i : i + size] for i in range(0, len(html), size)]
+            self.assertEqual("".join(iter_minified(fragments)), whole, size)
+
+    def test_feed_holds_back_only_unfinished_markup(self):
+        minifier = HTMLMinifier()
+        self.assertEqual(minifier.feed("<p>ab"), "<p>ab")
+        self.assertEqual(minifier.feed("c</"), "c")
+        self.assertEqual(minifier.feed("p>"), "</p>")
+        self.assertEqual(minifier.close(), "")
+
+    def test_template_minifies_while_rendering(self):
+        source = (
+            "<html>\n  <title>{{ Title }}</title>\n"
+            "  <body>{{ Content }}</body>\n</html>"
+        )
+        template = CompiledTemplate(source, minify=True)
+        self.assertEqual(
+            template.render("T", "<p>a\n  b</p>"),
+            "<html><title>T</title><body><p>a b</p></body></html>",
+        )
+
+
+class TestMinifyCSS(unittest.TestCase):
+    def test_minify_css(self):
+        css = (
+            "/* note */\nh1,\nh2 {\n  color: #fff;\n  margin: 0 auto;\n}\n"
+            "\na > b { x: 1 }\n"
+        )
+        self.assertEqual(minify_css(css), "h1,h2{color:#fff;margin:0 auto}a>b{x:1}")
+
+    def test_strings_and_selectors_are_kept(self):
+        css = 'a :hover { content: "/* ;  } */"; font-family: "A  B", serif; }'
+        self.assertEqual(
+            minify_css(css), 'a :hover{content:"/* ;  } */";font-family:"A  B",serif}'
+        )
+
+    def test_minify_stylesheets(self):
+        with tempfile.TemporaryDirectory() as root:
+            os.makedirs(os.path.join(root, "css"))
+            with open(os.path.join(root, "css", "a.css"), "w") as file:
+                file.write("b {\n  font-weight: 900;\n}\n")
+            with open(os.path.join(root, "a.txt"), "w") as file:
+                file.write("b {\n}\n")
+            self.assertEqual(minify_stylesheets(root), 1)
+            with open(os.path.join(root, "css", "a.css")) as file:
+                self.assertEqual(file.read(), "b{font-weight:900}")
+
+    def test_hardlinked_source_is_left_alone(self):
+        with tempfile.TemporaryDirectory() as root:
+            source = os.path.join(root, "static.css")
+            os.makedirs(os.path.join(root, "public"))
+            with open(source, "w") as file:
+                file.write("b {\n  font-weight: 900;\n}\n")
+            os.link(source, os.path.join(root, "public", "a.css"))
+            self.assertEqual(minify_stylesheets(os.path.join(root, "public")), 1)
+            with open(source) as file:
+                self.assertEqual(file.read(), "b {\n  font-weight: 900;\n}\n")
+            self.assertEqual(os.stat(source).st_nlink, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
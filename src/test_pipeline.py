@@ -0,0 +1,73 @@
+import contextlib
+import io
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import pipeline
+from generate_content import build_pages, discover_pages
+from pipeline import build_pages_async
+
+
+class TestPipeline(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        root = self.temp_dir.name
+        self.content = os.path.join(root, "content")
+        self.template = os.path.join(root, "template.html")
+        with open(self.template, "w") as file:
+            file.write('<title>{{ Title }}</title><a href="/">{{ Content }}</a>')
+        for n in range(40):
+            os.makedirs(os.path.join(self.content, f"page{n}"))
+            with open(os.path.join(self.content, f"page{n}", "index.md"), "w") as file:
+                file.write(f"# Page {n}\n\nSome **text** [here](/page{n})\n")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def build(self, name, build, *args):
+        public = os.path.join(self.temp_dir.name, name)
+        pages = discover_pages(self.content, public)
+        log = io.StringIO()
+        with contextlib.redirect_stdout(log):
+            build(pages, self.template, "/site/", *args)
+        outputs = {}
+        for _, dest in pages:
+            with open(dest) as file:
+                outputs[os.path.relpath(dest, public)] = file.read()
+        return outputs, log.getvalue()
+
+    def test_matches_serial_build(self):
+        expected, _ = self.build("serial", build_pages)
+        for workers in (1, 3):
+            outputs, log = self.build(f"async{workers}", build_pages_async, 4, workers)
+            self.assertEqual(outputs, expected)
+            self.assertEqual(log.count("Generated Page"), 40)
+
+    def test_reads_overlap(self):
+        read_file = pipeline.read_file
+
+        def slow_read(path):
+            time.sleep(0.02)
+            return read_file(path)
+
+        with mock.patch("pipeline.read_file", slow_read):
+            started = time.perf_counter()
+            self.build("async", build_pages_async, 10)
+            elapsed = time.perf_counter() - started
+        # 40 reads of 20ms each, ten at a time
+        self.assertLess(elapsed, 40 * 0.02 / 2)
+
+    def test_error_stops_the_pipeline(self):
+        with open(os.path.join(self.content, "page5", "index.md"), "w") as file:
+            file.write("no title here\n")
+        for workers in (1, 2):
+            with self.assertRaises(ValueError) as error:
+                self.build("async", build_pages_async, 2, workers)
+            self.assertEqual(str(error.exception), "No title found")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import gzip
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import precompress
+from precompress import gzip_data, precompress_tree
+from testutil import read_bytes, write_file
+
+
+class TestPrecompress(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = self.temp_dir.name
+        self.path = lambda *parts: os.path.join(self.root, *parts)
+        self.page = b"<p>hello</p>\n" * 50
+        write_file(self.path("index.html"), self.page)
+        write_file(self.path("blog", "index.html"), self.page * 2)
+        write_file(self.path("index.css"), b"body { color: red; }\n" * 20)
+        write_file(self.path("images", "tolkien.png"), b"\x89PNG" * 100)
+        self.encoders = {".gz": gzip_data}
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def run_precompress(self):
+        return precompress_tree(self.root, workers=2, encoders=self.encoders)
+
+    def test_text_files_get_siblings(self):
+        stats = self.run_precompress()
+        self.assertEqual((stats.files, stats.unchanged, stats.removed), (3, 0, 0))
+        compressed = read_bytes(self.path("index.html.gz"))
+        self.assertEqual(gzip.decompress(compressed), self.page)
+        self.assertTrue(os.path.exists(self.path("blog", "index.html.gz")))
+        self.assertTrue(os.path.exists(self.path("index.css.gz")))
+        self.assertFalse(os.path.exists(self.path("images", "tolkien.png.gz")))
+        self.assertIn("Compressed 3 files", stats.summary())
+
+    def test_output_is_reproducible(self):
+        self.run_precompress()
+        first = read_bytes(self.path("index.html.gz"))
+        os.remove(self.path("index.html.gz"))
+        self.run_precompress()
+        self.assertEqual(read_bytes(self.path("index.html.gz")), first)
+
+    def test_up_to_date_siblings_are_skipped(self):
+        self.run_precompress()
+        with mock.patch("precompress.compress_file") as compress_file:
+            stats = self.run_precompress()
+        compress_file.assert_not_called()
+        self.assertEqual((stats.files, stats.unchanged), (0, 3))
+
+    def test_changed_file_is_compressed_again(self):
+        self.run_precompress()
+        write_file(self.path("index.html"), b"<p>bye</p>" * 50)
+        stat = os.stat(self.path("index.html"))
+        os.utime(self.path("index.html"), ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+        stats = self.run_precompress()
+        self.assertEqual((stats.files, stats.unchanged), (1, 2))
+        self.assertEqual(
+            gzip.decompress(read_bytes(self.path("index.html.gz"))), b"<p>bye</p>" * 50
+        )
+
+    def test_orphans_are_removed(self):
+        self.run_precompress()
+        write_file(self.path("archive.tar.gz"), b"not ours")
+        os.remove(self.path("blog", "index.html"))
+        stats = self.run_precompress()
+        self.assertEqual(stats.removed, 1)
+        self.assertFalse(os.path.exists(self.path("blog", "index.html.gz")))
+        self.assertTrue(os.path.exists(self.path("archive.tar.gz")))
+
+    def test_sibling_not_smaller_is_not_kept(self):
+        write_file(self.path("tiny.txt"), b"a")
+        stats = self.run_precompress()
+        self.assertFalse(os.path.exists(self.path("tiny.txt.gz")))
+        self.assertEqual((stats.files, stats.unchanged), (3, 0))
+        self.assertEqual(stats.size, len(self.page) * 3 + 420)
+
+        # known to be not worth compressing until it changes
+        with mock.patch("precompress.compress_file") as compress_file:
+            stats = self.run_precompress()
+        compress_file.assert_not_called()
+        self.assertEqual((stats.files, stats.unchanged), (0, 4))
+        write_file(self.path("tiny.txt"), b"b")
+        stat = os.stat(self.path("tiny.txt"))
+        os.utime(self.path("tiny.txt"), ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+        with mock.patch(
+            "precompress.compress_file", wraps=precompress.compress_file
+        ) as compress_file:
+            stats = self.run_precompress()
+        compress_file.assert_called_once()
+        self.assertEqual((stats.files, stats.unchanged), (0, 3))
+
+    def test_every_encoder_is_used(self):
+        self.encoders[".zz"] = lambda data: b"z"
+        self.run_precompress()
+        self.assertEqual(read_bytes(self.path("index.css.zz")), b"z")
+        self.assertTrue(os.path.exists(self.path("index.css.gz")))
+
+    def test_brotli_only_when_installed(self):
+        with mock.patch.object(precompress, "brotli", None):
+            self.assertEqual(list(precompress.available_encoders()), [".gz"])
+        with mock.patch.object(precompress, "brotli", mock.Mock()):
+            self.assertEqual(list(precompress.available_encoders()), [".gz", ".br"])
+
+
+if __name__ == "__main__":
+    unittest.main()
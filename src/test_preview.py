@@ -0,0 +1,158 @@
+import gzip
+import http.client
+import os
+import tempfile
+import threading
+import unittest
+
+from preview import accepts_gzip, make_server, parse_range
+from testutil import write_file
+
+
+class TestHelpers(unittest.TestCase):
+    def test_parse_range(self):
+        self.assertEqual(parse_range("bytes=0-9", 100), (0, 9))
+        self.assertEqual(parse_range("bytes=90-", 100), (90, 99))
+        self.assertEqual(parse_range("bytes=-10", 100), (90, 99))
+        self.assertEqual(parse_range("bytes=-500", 100), (0, 99))
+        self.assertEqual(parse_range("bytes=50-500", 100), (50, 99))
+
+    def test_parse_range_whole_file(self):
+        for header in ("bytes=0-1,5-6", "items=0-1", "bytes=5-1", "bytes=x-", "0-1"):
+            self.assertIsNone(parse_range(header, 100), header)
+
+    def test_parse_range_not_satisfiable(self):
+        for header in ("bytes=100-", "bytes=-0"):
+            with self.assertRaises(ValueError):
+                parse_range(header, 100)
+
+    def test_accepts_gzip(self):
+        self.assertTrue(accepts_gzip("gzip, deflate, br"))
+        self.assertTrue(accepts_gzip("br;q=1.0, gzip;q=0.5"))
+        self.assertTrue(accepts_gzip("*"))
+        self.assertFalse(accepts_gzip("gzip;q=0"))
+        self.assertFalse(accepts_gzip("br"))
+        self.assertFalse(accepts_gzip(None))
+
+
+class TestPreviewServer(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        root = self.temp_dir.name
+        self.page = b"<h1>Home</h1>" * 100
+        write_file(os.path.join(root, "index.html"), self.page)
+        write_file(os.path.join(root, "index.html.gz"), gzip.compress(self.page))
+        self.match_mtime(
+            os.path.join(root, "index.html.gz"), os.path.join(root, "index.html")
+        )
+        self.root = root
+        write_file(os.path.join(root, "blog", "index.html"), b"<h1>Blog</h1>")
+        write_file(os.path.join(root, "index.css"), b"body {}")
+        self.server = make_server(root, port=0, threads=4)
+        self.server.RequestHandlerClass.quiet = True
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+        self.connection = http.client.HTTPConnection(
+            "127.0.0.1", self.server.server_port, timeout=5
+        )
+
+    def tearDown(self):
+        self.connection.close()
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        self.temp_dir.cleanup()
+
+    def match_mtime(self, compressed, path):
+        # as precompress leaves a sibling
+        stat = os.stat(path)
+        os.utime(compressed, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    def request(self, path, method="GET", **headers):
+        self.connection.request(method, path, headers=headers)
+        response = self.connection.getresponse()
+        return response, response.read()
+
+    def test_keep_alive(self):
+        first, body = self.request("/")
+        self.assertEqual((first.status, body), (200, self.page))
+        sock = self.connection.sock
+        second, body = self.request("/index.css")
+        self.assertEqual((second.status, body), (200, b"body {}"))
+        self.assertIs(self.connection.sock, sock)
+        self.assertEqual(second.headers["Content-Type"], "text/css; charset=utf-8")
+
+    def test_etag_and_not_modified(self):
+        response, _ = self.request("/")
+        etag = response.headers["ETag"]
+        self.assertTrue(etag.startswith('"'))
+        response, body = self.request("/", **{"If-None-Match": etag})
+        self.assertEqual((response.status, body), (304, b""))
+        response, _ = self.request("/", **{"If-None-Match": '"other"'})
+        self.assertEqual(response.status, 200)
+
+    def test_if_modified_since(self):
+        response, _ = self.request("/index.css")
+        modified = response.headers["Last-Modified"]
+        response, _ = self.request("/index.css", **{"If-Modified-Since": modified})
+        self.assertEqual(response.status, 304)
+
+    def test_range(self):
+        response, body = self.request("/", Range="bytes=0-12")
+        self.assertEqual((response.status, body), (206, b"<h1>Home</h1>"))
+        self.assertEqual(
+            response.headers["Content-Range"], f"bytes 0-12/{len(self.page)}"
+        )
+        response, body = self.request("/", Range="bytes=-5")
+        self.assertEqual((response.status, body), (206, b"</h1>"))
+
+    def test_range_not_satisfiable(self):
+        response, _ = self.request("/index.css", Range="bytes=100-")
+        self.assertEqual(response.status, 416)
+        self.assertEqual(response.headers["Content-Range"], "bytes */7")
+        # the connection stays usable
+        self.assertEqual(self.request("/index.css")[0].status, 200)
+
+    def test_if_range_mismatch_sends_whole_file(self):
+        response, body = self.request(
+            "/index.css", Range="bytes=0-1", **{"If-Range": '"old"'}
+        )
+        self.assertEqual((response.status, body), (200, b"body {}"))
+
+    def test_gzip_sibling(self):
+        response, body = self.request("/", **{"Accept-Encoding": "gzip"})
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertEqual(response.headers["Vary"], "Accept-Encoding")
+        self.assertEqual(gzip.decompress(body), self.page)
+        plain, _ = self.request("/")
+        self.assertIsNone(plain.headers["Content-Encoding"])
+        self.assertNotEqual(plain.headers["ETag"], response.headers["ETag"])
+
+    def test_stale_gzip_sibling_is_not_served(self):
+        page = os.path.join(self.root, "index.html")
+        write_file(page, b"<h1>New</h1>")
+        stat = os.stat(page)
+        os.utime(page, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        response, body = self.request("/", **{"Accept-Encoding": "gzip"})
+        self.assertEqual(body, b"<h1>New</h1>")
+        self.assertIsNone(response.headers["Content-Encoding"])
+        self.assertIsNone(response.headers["Vary"])
+
+    def test_head(self):
+        response, body = self.request("/index.css", method="HEAD")
+        self.assertEqual((response.status, body), (200, b""))
+        self.assertEqual(response.headers["Content-Length"], "7")
+
+    def test_directory(self):
+        response, _ = self.request("/blog")
+        self.assertEqual(response.status, 301)
+        self.assertEqual(response.headers["Location"], "/blog/")
+        self.assertEqual(self.request("/blog/")[1], b"<h1>Blog</h1>")
+
+    def test_not_found(self):
+        self.assertEqual(self.request("/missing")[0].status, 404)
+        self.assertEqual(self.request("/../index.html")[0].status, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
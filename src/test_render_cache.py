@@ -0,0 +1,115 @@
+import contextlib
+import io
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import generate_content
+from generate_content import build_pages, discover_pages
+from render_cache import RenderCache, render_key
+from testutil import read_file, write_file
+
+template = "<title>{{ Title }}</title><article>{{ Content }}</article>"
+
+
+class TestRenderCache(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache = RenderCache(os.path.join(self.temp_dir.name, "cache"))
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_put_get(self):
+        self.assertIsNone(self.cache.get("# Home"))
+        self.cache.put("# Home", "Home", "<div><h1>Home</h1></div>")
+        self.assertEqual(self.cache.get("# Home"), ("Home", "<div><h1>Home</h1></div>"))
+        self.assertIsNone(self.cache.get("# Home\n"))
+
+    def test_version_is_part_of_the_key(self):
+        key = render_key("# Home")
+        with mock.patch("render_cache.GENERATOR_VERSION", "changed"):
+            self.assertNotEqual(render_key("# Home"), key)
+
+    def test_broken_entry_is_a_miss(self):
+        write_file(self.cache.entry_path(render_key("# Home")), '{"title": ')
+        self.assertIsNone(self.cache.get("# Home"))
+
+    def test_incomplete_entry_is_a_miss(self):
+        self.cache.put("# Home", "Home", "<div><h1>Home</h1></div>")
+        path = self.cache.entry_path(render_key("# Home"))
+        entry = read_file(path).replace(', "html": "<div><h1>Home</h1></div>"', "")
+        write_file(path, entry)
+        self.assertNotIn("html", entry)
+        self.assertIsNone(self.cache.get("# Home"))
+
+    def test_prune_removes_least_recently_used(self):
+        for n in range(3):
+            self.cache.put(f"# Page {n}", f"Page {n}", "x" * 1000)
+            path = self.cache.entry_path(render_key(f"# Page {n}"))
+            os.utime(path, (time.time() - 100 + n, time.time() - 100 + n))
+        # reading the oldest entry makes it the most recently used
+        self.cache.get("# Page 0")
+
+        self.cache.max_bytes = self.cache.size() - 1
+        self.assertEqual(self.cache.prune(), 1)
+        self.assertIsNone(self.cache.get("# Page 1"))
+        self.assertIsNotNone(self.cache.get("# Page 0"))
+        self.assertIsNotNone(self.cache.get("# Page 2"))
+
+
+class TestCachedBuild(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        root = self.temp_dir.name
+        self.content = os.path.join(root, "content")
+        self.template = os.path.join(root, "template.html")
+        self.cache = RenderCache(os.path.join(root, "cache"))
+        write_file(self.template, template)
+        for n in range(4):
+            write_file(
+                os.path.join(self.content, str(n), "index.md"),
+                f"# Page {n}\n\n[home](/) and **bold** text",
+            )
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def build(self, name, workers=1, cache=None, base_path="/"):
+        pages = discover_pages(self.content, os.path.join(self.temp_dir.name, name))
+        with mock.patch(
+            "generate_content.markdown_to_html_node",
+            wraps=generate_content.markdown_to_html_node,
+        ) as parse:
+            with contextlib.redirect_stdout(io.StringIO()):
+                build_pages(pages, self.template, base_path, workers, cache=cache)
+        return {dest: read_file(dest) for _, dest in pages}, parse.call_count
+
+    def test_cache_hits_skip_parsing(self):
+        expected, _ = self.build("plain")
+        first, parsed = self.build("first", cache=self.cache)
+        second, reparsed = self.build("second", cache=self.cache)
+        self.assertEqual(parsed, 4)
+        self.assertEqual(reparsed, 0)
+        self.assertListEqual(list(first.values()), list(expected.values()))
+        self.assertListEqual(list(second.values()), list(expected.values()))
+
+    def test_cached_html_is_independent_of_base_path(self):
+        self.build("first", cache=self.cache)
+        expected, _ = self.build("plain", base_path="/site/")
+        cached, parsed = self.build("cached", cache=self.cache, base_path="/site/")
+        self.assertEqual(parsed, 0)
+        self.assertListEqual(list(cached.values()), list(expected.values()))
+
+    def test_parallel_build_fills_the_cache(self):
+        expected, _ = self.build("plain")
+        self.build("parallel", workers=3, cache=self.cache)
+        cached, parsed = self.build("cached", cache=self.cache)
+        self.assertEqual(parsed, 0)
+        self.assertListEqual(list(cached.values()), list(expected.values()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import io
+import unittest
+
+from htmlnode import LeafNode, ParentNode
+from template import CompiledTemplate, rewrite_root_urls
+
+source = """<html>
+  <head><title>{{ Title }}</title><link href="/index.css" rel="stylesheet" /></head>
+  <body><article>{{ Content }}</article><footer>{{ Title }}</footer></body>
+</html>"""
+
+
+def render_with_replace(template, title, content, base_path):
+    # the chained replaces generate_page used to apply to every page
+    return (
+        template.replace("{{ Title }}", title)
+        .replace("{{ Content }}", content)
+        .replace('href="/', f'href="{base_path}')
+        .replace('src="/', f'src="{base_path}')
+    )
+
+
+class TestCompiledTemplate(unittest.TestCase):
+    def test_slots(self):
+        template = CompiledTemplate(source)
+        self.assertListEqual(
+            [name for _, name in template.slots], ["Title", "Content", "Title"]
+        )
+        self.assertEqual(len(template.parts), 7)
+
+    def test_matches_chained_replace(self):
+        content = (
+            '<p><a href="/blog">blog</a><img src="/images/a.png" alt="a"></img></p>'
+        )
+        for base_path in ["/", "/static-site-generator/"]:
+            template = CompiledTemplate(source, base_path)
+            self.assertEqual(
+                template.render("Home", content),
+                render_with_replace(source, "Home", content, base_path),
+            )
+
+    def test_write_node(self):
+        node = ParentNode(
+            "p", [LeafNode("a", "blog", {"href": "/blog"}), LeafNode(None, " end")]
+        )
+        template = CompiledTemplate(source, "/site/")
+        stream = io.StringIO()
+        template.write(stream, "Home", node)
+        self.assertEqual(stream.getvalue(), template.render("Home", node.to_html()))
+        self.assertIn('<a href="/site/blog">', stream.getvalue())
+
+    def test_content_is_not_a_template(self):
+        template = CompiledTemplate(source)
+        html = template.render("Home", "<p>{{ Title }}</p>")
+        self.assertIn("<article><p>{{ Title }}</p></article>", html)
+
+    def test_no_slots(self):
+        template = CompiledTemplate('<a href="/">home</a>', "/site/")
+        self.assertEqual(template.render("t", "c"), '<a href="/site/">home</a>')
+
+    def test_rewrite_root_urls(self):
+        self.assertEqual(rewrite_root_urls('src="/a"', "/"), 'src="/a"')
+        self.assertEqual(
+            rewrite_root_urls('src="/a" href="https://x/"', "/b/"),
+            'src="/b/a" href="https://x/"',
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
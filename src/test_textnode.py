@@ -122,6 +122,19 @@ class TestTextNodeToHTMLNode(unittest.TestCase):
         with self.assertRaises(ValueError):
             text_node_to_html_node(node)
 
+    def test_nested_emphasis(self):
+        node = TextNode(
+            "italic bold",
+            TextType.ITALIC,
+            children=[
+                TextNode("italic ", TextType.TEXT),
+                TextNode("bold", TextType.BOLD),
+            ],
+        )
+        self.assertEqual(
+            text_node_to_html_node(node).to_html(), "<i>italic <b>bold</b></i>"
+        )
+
     def test_invalid_text_type(self):
         # Assumption "InvalidType" is not part of the TextType enum
         node = TextNode(text="Invalid type test", text_type="InvalidType")
@@ -0,0 +1,209 @@
+import contextlib
+import io
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+import block_markdown
+import watch
+from testutil import read_file, write_file
+from watch import SiteWatcher, open_inotify, wait_for_changes
+
+
+class TestSiteWatcher(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = self.temp_dir.name
+        self.path = lambda *parts: os.path.join(self.root, *parts)
+        write_file(
+            self.path("template.html"), "<title>{{ Title }}</title>{{ Content }}"
+        )
+        write_file(self.path("content", "index.md"), "# Home\n\nhello")
+        write_file(self.path("content", "blog", "a.md"), "# A\n\n**a**")
+        write_file(self.path("static", "index.css"), "body {}")
+        self.watcher = SiteWatcher(
+            self.path("content"),
+            self.path("static"),
+            self.path("template.html"),
+            self.path("public"),
+        )
+        self.assertEqual(self.watcher.build_all(), 3)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def rebuild(self):
+        with mock.patch("watch.render_content", wraps=watch.render_content) as render:
+            count = self.watcher.apply(*self.watcher.changes())
+        return count, render.call_count
+
+    def touch(self, *parts):
+        path = self.path(*parts)
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    def test_initial_build(self):
+        self.assertEqual(
+            read_file(self.path("public", "blog", "a.html")),
+            "<title>A</title><div><h1>A</h1><p><b>a</b></p></div>\n",
+        )
+        self.assertTrue(os.path.exists(self.path("public", "index.css")))
+
+    def test_nothing_changed(self):
+        self.assertEqual(self.rebuild(), (0, 0))
+
+    def test_markdown_edit_renders_one_page(self):
+        write_file(self.path("content", "blog", "a.md"), "# A\n\nedited")
+        self.touch("content", "blog", "a.md")
+        self.assertEqual(self.rebuild(), (1, 1))
+        self.assertIn("<p>edited</p>", read_file(self.path("public", "blog", "a.html")))
+
+    def test_new_and_removed_pages(self):
+        write_file(self.path("content", "blog", "b.md"), "# B")
+        os.remove(self.path("content", "index.md"))
+        self.assertEqual(self.rebuild(), (2, 1))
+        self.assertTrue(os.path.exists(self.path("public", "blog", "b.html")))
+        self.assertFalse(os.path.exists(self.path("public", "index.html")))
+
+    def test_static_edit_copies_one_file(self):
+        write_file(self.path("static", "index.css"), "body { margin: 0 }")
+        self.touch("static", "index.css")
+        self.assertEqual(self.rebuild(), (1, 0))
+        self.assertEqual(
+            read_file(self.path("public", "index.css")), "body { margin: 0 }"
+        )
+
+    def test_template_edit_skips_parsing(self):
+        write_file(self.path("template.html"), "<h1>{{ Title }}</h1>{{ Content }}")
+        self.touch("template.html")
+        self.assertEqual(self.rebuild(), (2, 0))
+        self.assertTrue(
+            read_file(self.path("public", "index.html")).startswith("<h1>Home</h1>")
+        )
+
+    def test_failed_page_does_not_stop_the_batch(self):
+        write_file(self.path("content", "blog", "a.md"), "no title")
+        write_file(self.path("content", "index.md"), "# Home\n\nedited")
+        self.touch("content", "blog", "a.md")
+        self.touch("content", "index.md")
+        self.assertEqual(self.rebuild(), (1, 2))
+        self.assertIn("<p>edited</p>", read_file(self.path("public", "index.html")))
+        [(key, error)] = self.watcher.errors
+        self.assertEqual(key, ("content", "blog/a.md"))
+        self.assertIsInstance(error, ValueError)
+
+        # the failed page is left alone until it is saved again
+        self.assertEqual(self.rebuild(), (0, 0))
+        write_file(self.path("content", "blog", "a.md"), "# A\n\nfixed")
+        self.assertEqual(self.rebuild(), (1, 1))
+        self.assertEqual(self.watcher.errors, [])
+        self.assertIn("<p>fixed</p>", read_file(self.path("public", "blog", "a.html")))
+
+    def test_failed_page_removed(self):
+        write_file(self.path("content", "blog", "a.md"), "no title")
+        self.touch("content", "blog", "a.md")
+        self.rebuild()
+        os.remove(self.path("content", "blog", "a.md"))
+        self.assertEqual(self.rebuild(), (1, 0))
+        self.assertFalse(os.path.exists(self.path("public", "blog", "a.html")))
+
+    def test_failed_page_does_not_stop_the_first_build(self):
+        write_file(self.path("content", "draft.md"), "no title")
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            watch.watch(self.watcher, rounds=0)
+        self.assertIn(
+            f"Build failed: {self.path('content', 'draft.md')}: No title found",
+            output.getvalue(),
+        )
+        self.assertIn("Built 3 outputs", output.getvalue())
+        self.assertFalse(os.path.exists(self.path("public", "draft.html")))
+
+        write_file(self.path("content", "draft.md"), "# Draft\n\ndone")
+        self.assertEqual(self.rebuild(), (1, 1))
+        self.assertTrue(os.path.exists(self.path("public", "draft.html")))
+
+    def test_failed_copy_does_not_stop_the_first_build(self):
+        write_file(self.path("static", "a.css"), "a {}")
+        error = PermissionError(13, "Permission denied")
+        real_copy_file = watch.copy_file
+
+        def copy_file(source, output):
+            if source.endswith("a.css"):
+                raise error
+            return real_copy_file(source, output)
+
+        with mock.patch("watch.copy_tree", side_effect=error):
+            with mock.patch("watch.copy_file", side_effect=copy_file):
+                self.assertEqual(self.watcher.build_all(), 3)
+        self.assertTrue(os.path.exists(self.path("public", "index.css")))
+        [(key, error)] = self.watcher.errors
+        self.assertEqual(key, ("static", "a.css"))
+        self.assertIsInstance(error, PermissionError)
+
+    def test_edit_renders_only_the_changed_block(self):
+        block_markdown.enable_block_cache(64)
+        self.addCleanup(block_markdown.enable_block_cache, 0)
+        write_file(self.path("content", "blog", "a.md"), "# A\n\n**a**\n\nmore")
+        self.touch("content", "blog", "a.md")
+        self.rebuild()
+        write_file(self.path("content", "blog", "a.md"), "# A\n\n**a**\n\nedited")
+        self.touch("content", "blog", "a.md")
+        with mock.patch(
+            "block_markdown.block_to_html_node",
+            wraps=block_markdown.block_to_html_node,
+        ) as parse:
+            self.rebuild()
+        self.assertEqual(parse.call_count, 1)
+
+    def test_main_enables_the_block_cache(self):
+        self.addCleanup(block_markdown.enable_block_cache, 0)
+        with mock.patch("watch.watch"), mock.patch("watch.SiteWatcher"):
+            watch.main(["--block-cache", "10"])
+        self.assertEqual(block_markdown.block_cache.max_size, 10)
+
+    def test_debounce_collects_a_burst(self):
+        def burst():
+            for n in range(3):
+                time.sleep(0.01)
+                write_file(self.path("content", f"new{n}.md"), f"# New {n}")
+
+        thread = threading.Thread(target=burst)
+        thread.start()
+        changed, removed = wait_for_changes(self.watcher, None, 0.005, 0.1)
+        thread.join()
+        self.assertEqual(len(changed), 3)
+        self.assertListEqual(removed, [])
+
+    @unittest.skipIf(open_inotify() is None, "inotify is not available")
+    def test_inotify_wakes_up(self):
+        waker = open_inotify()
+        try:
+            waker.watch([self.path("content")])
+            self.assertFalse(waker.wait(0))
+            write_file(self.path("content", "c.md"), "# C")
+            self.assertTrue(waker.wait(1))
+            self.assertFalse(waker.wait(0))
+        finally:
+            waker.close()
+
+    def test_watch_loop(self):
+        def edit():
+            time.sleep(0.05)
+            write_file(self.path("content", "blog", "a.md"), "# A\n\nwatched")
+
+        thread = threading.Thread(target=edit)
+        thread.start()
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            watch.watch(self.watcher, interval=0.01, debounce=0.02, rounds=1)
+        thread.join()
+        self.assertIn("Rebuilt 1 outputs", output.getvalue())
+        self.assertIn("watched", read_file(self.path("public", "blog", "a.html")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,22 @@
+"""
+File helpers shared by the tests.
+"""
+
+import os
+
+
+def write_file(path, data=""):
+    # text is written as text, bytes as they are
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb" if isinstance(data, bytes) else "w") as file:
+        file.write(data)
+
+
+def read_file(path):
+    with open(path, "r") as file:
+        return file.read()
+
+
+def read_bytes(path):
+    with open(path, "rb") as file:
+        return file.read()
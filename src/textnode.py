@@ -1,6 +1,6 @@
 from enum import Enum
 
-from htmlnode import LeafNode
+from htmlnode import LeafNode, ParentNode
 
 
 class TextType(Enum):
@@ -13,19 +13,26 @@ class TextType(Enum):
 
 
 class TextNode:
-    def __init__(self, text, text_type, url=None):
+    __slots__ = ("text", "text_type", "url", "children")
+
+    def __init__(self, text, text_type, url=None, children=None):
         self.text = text
         self.text_type = text_type
         self.url = url
+        # nested emphasis, e.g. bold text inside an italic span
+        self.children = children
 
     def __eq__(self, other):
         return (
             self.text_type == other.text_type
             and self.text == other.text
             and self.url == other.url
+            and self.children == other.children
         )
 
     def __repr__(self):
+        if self.children:
+            return f"TextNode({self.text}, {self.text_type.value}, {self.url}, {self.children})"
         return f"TextNode({self.text}, {self.text_type.value}, {self.url})"
 
 
@@ -33,9 +40,9 @@ def text_node_to_html_node(text_node):
     if text_node.text_type == TextType.TEXT:
         return LeafNode(None, text_node.text)
     if text_node.text_type == TextType.BOLD:
-        return LeafNode("b", text_node.text)
+        return emphasis_to_html_node("b", text_node)
     if text_node.text_type == TextType.ITALIC:
-        return LeafNode("i", text_node.text)
+        return emphasis_to_html_node("i", text_node)
     if text_node.text_type == TextType.CODE:
         return LeafNode("code", text_node.text)
     if text_node.text_type == TextType.LINK:
@@ -49,3 +56,9 @@ def text_node_to_html_node(text_node):
             raise ValueError("Node requires alt text")
         return LeafNode("img", "", props={"src": text_node.url, "alt": text_node.text})
     raise ValueError(f"Invalid text type: {text_node.text_type}")
+
+
+def emphasis_to_html_node(tag, text_node):
+    if text_node.children:
+        return ParentNode(tag, list(map(text_node_to_html_node, text_node.children)))
+    return LeafNode(tag, text_node.text)
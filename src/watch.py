@@ -0,0 +1,377 @@
+"""
+Rebuilds the site as its sources change. Only the outputs a change
+affects are rebuilt: an edited page is rendered again, an edited static
+file copied again, and an edited template re-applied to the content html
+kept from the last render of every page, without parsing any markdown.
+
+    python3 src/watch.py [base_path]
+"""
+
+import argparse
+import ctypes
+import ctypes.util
+import os
+import select
+import sys
+import time
+
+from block_markdown import enable_block_cache, enable_inline_cache
+from fastcopy import copy_file, copy_tree
+from generate_content import remove_output, render_content
+from ignore import build_matcher
+from inventory import kind_dir, kind_file, scan
+from pipeline import read_file, write_file
+from render_cache import RenderCache
+from template import load_template
+
+content_tree = "content"
+static_tree = "static"
+template_tree = "template"
+
+
+class Inotify:
+    """
+    Wakes the watcher up as soon as something changes in the watched
+    directories, instead of at the next poll. Only a wake up call: what
+    changed is still found by comparing snapshots.
+    """
+
+    # IN_MODIFY, IN_ATTRIB, IN_CLOSE_WRITE, IN_MOVED_FROM, IN_MOVED_TO,
+    # IN_CREATE, IN_DELETE, IN_DELETE_SELF
+    mask = 0x002 | 0x004 | 0x008 | 0x040 | 0x080 | 0x100 | 0x200 | 0x400
+
+    def __init__(self):
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watched = set()
+
+    def watch(self, directories):
+        for directory in directories:
+            if directory in self.watched:
+                continue
+            path = os.fsencode(directory)
+            if self.libc.inotify_add_watch(self.fd, path, self.mask) >= 0:
+                self.watched.add(directory)
+
+    def wait(self, timeout):
+        # returns True when there were events, after draining them all
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return False
+        try:
+            while os.read(self.fd, 1 << 16):
+                pass
+        except BlockingIOError:
+            pass
+        return True
+
+    def close(self):
+        os.close(self.fd)
+
+
+def open_inotify():
+    # None where inotify is not available, polling is used then
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        return Inotify()
+    except (OSError, AttributeError):
+        return None
+
+
+class SiteWatcher:
+    def __init__(
+        self,
+        content,
+        static,
+        template_path,
+        destination,
+        base_path="/",
+        ignore_list=None,
+        cache=None,
+    ):
+        self.trees = {content_tree: content, static_tree: static}
+        self.template_path = template_path
+        self.destination = destination
+        self.base_path = base_path
+        self.ignore_list = ignore_list
+        self.cache = cache
+        self.template = None
+        # title and content html of every page, by source path
+        self.pages = {}
+        # (key, error) of every output the last apply failed to build
+        self.errors = []
+        # sizes and mtimes the failed sources had, until they change
+        self.failed = {}
+        self.snapshot = {}
+        self.directories = []
+
+    def take_snapshot(self):
+        """
+        Maps (tree, relative path) of every source file to its size and
+        mtime, and lists the directories they are in.
+        """
+        snapshot = {}
+        directories = [os.path.dirname(os.path.abspath(self.template_path))]
+        for tree, root in self.trees.items():
+            inventory = scan(root)
+            matcher = build_matcher(root, self.ignore_list, inventory)
+            directories.append(root)
+            for entry in inventory.walk(matcher.skip if matcher else None):
+                if entry.kind == kind_dir:
+                    directories.append(entry.path)
+                elif entry.kind == kind_file:
+                    if tree == content_tree and not entry.name.endswith(".md"):
+                        continue
+                    snapshot[tree, entry.relpath] = (entry.size, entry.mtime_ns)
+        try:
+            stat = os.stat(self.template_path)
+        except FileNotFoundError:
+            # in the middle of being saved, it shows up again next time
+            return snapshot, directories
+        snapshot[template_tree, ""] = (stat.st_size, stat.st_mtime_ns)
+        return snapshot, directories
+
+    def source_path(self, tree, relpath):
+        if tree == template_tree:
+            return self.template_path
+        return os.path.join(self.trees[tree], relpath)
+
+    def output_path(self, tree, relpath):
+        if tree == content_tree:
+            relpath = relpath[:-3] + ".html"
+        return os.path.join(self.destination, relpath)
+
+    def build_all(self):
+        """
+        Builds the whole site once and remembers the content html of
+        every page. Returns the number of outputs written. Outputs that
+        fail are handled as in apply.
+        """
+        self.errors = []
+        self.snapshot, self.directories = self.take_snapshot()
+        self.load_template()
+        os.makedirs(self.destination, exist_ok=True)
+        static = self.trees[static_tree]
+        inventory = scan(static)
+        matcher = build_matcher(static, self.ignore_list, inventory)
+        try:
+            count = copy_tree(
+                static,
+                self.destination,
+                inventory=inventory,
+                skip=matcher.skip if matcher else None,
+            ).files
+        except OSError:
+            # copied again one by one to find the files that fail
+            count = 0
+            for tree, relpath in list(self.snapshot):
+                if tree == static_tree:
+                    count += self.attempt((tree, relpath), self.copy_static, relpath)
+        for tree, relpath in list(self.snapshot):
+            if tree == content_tree:
+                count += self.attempt((tree, relpath), self.render_page, relpath)
+        return count
+
+    def render_page(self, relpath):
+        source = self.source_path(content_tree, relpath)
+        title, content = render_content(read_file(source), self.cache)
+        self.pages[source] = (title, content)
+        self.write_page(relpath)
+
+    def write_page(self, relpath):
+        title, content = self.pages[self.source_path(content_tree, relpath)]
+        output = self.output_path(content_tree, relpath)
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+        write_file(output, self.template.render(title, content))
+
+    def changes(self):
+        """
+        Returns the (tree, relative path) keys of the sources changed or
+        added since the last snapshot, and those removed.
+        """
+        snapshot, directories = self.take_snapshot()
+        changed = [
+            key
+            for key, stat in snapshot.items()
+            if self.snapshot.get(key) != stat and self.failed.get(key) != stat
+        ]
+        removed = [key for key in {*self.snapshot, *self.failed} if key not in snapshot]
+        for key in removed:
+            self.failed.pop(key, None)
+        self.snapshot, self.directories = snapshot, directories
+        return sorted(changed), sorted(removed)
+
+    def apply(self, changed, removed):
+        """
+        Rebuilds the outputs affected by the given changes, returns the
+        number of outputs written or removed. An output that fails does
+        not stop the others: its error is kept in self.errors and its
+        source left out of the snapshot, to be tried again once it is
+        saved again.
+        """
+        self.errors = []
+        count = 0
+        for tree, relpath in removed:
+            if tree == template_tree:
+                continue
+            self.pages.pop(self.source_path(tree, relpath), None)
+            output = self.output_path(tree, relpath)
+            count += self.attempt(
+                (tree, relpath), remove_output, output, self.destination
+            )
+
+        template_changed = (template_tree, "") in changed and self.attempt(
+            (template_tree, ""), self.load_template
+        )
+
+        for tree, relpath in changed:
+            if tree == content_tree:
+                count += self.attempt((tree, relpath), self.render_page, relpath)
+            elif tree == static_tree:
+                count += self.attempt((tree, relpath), self.copy_static, relpath)
+
+        if template_changed:
+            rendered = {relpath for tree, relpath in changed if tree == content_tree}
+            for tree, relpath in list(self.snapshot):
+                if tree == content_tree and relpath not in rendered:
+                    count += self.attempt((tree, relpath), self.write_page, relpath)
+        return count
+
+    def attempt(self, key, function, *args):
+        # 1 when the output was built, 0 when it failed and is retried
+        try:
+            function(*args)
+        except (OSError, ValueError) as error:
+            self.errors.append((key, error))
+            self.failed[key] = self.snapshot.pop(key, None)
+            return 0
+        self.failed.pop(key, None)
+        return 1
+
+    def load_template(self):
+        self.template = load_template(self.template_path, self.base_path)
+
+    def copy_static(self, relpath):
+        output = self.output_path(static_tree, relpath)
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+        copy_file(self.source_path(static_tree, relpath), output)
+
+
+def wait_for_changes(watcher, waker, interval, debounce):
+    """
+    Blocks until sources changed, then until they have stopped changing
+    for debounce seconds, so a burst of saves leads to one rebuild.
+    Returns the changed and removed keys.
+    """
+    changed, removed = set(), set()
+    quiet_since = None
+    while True:
+        if waker is not None:
+            waker.watch(watcher.directories)
+            woken = waker.wait(debounce if changed or removed else interval)
+        else:
+            time.sleep(debounce if changed or removed else interval)
+            woken = True
+
+        new_changed, new_removed = watcher.changes() if woken else ([], [])
+        if new_changed or new_removed:
+            # a file removed then written again counts as changed
+            changed.update(new_changed)
+            removed.difference_update(new_changed)
+            removed.update(new_removed)
+            changed.difference_update(new_removed)
+            quiet_since = time.monotonic()
+        elif changed or removed:
+            if time.monotonic() - quiet_since >= debounce:
+                return sorted(changed), sorted(removed)
+
+
+def print_errors(watcher, action):
+    # a broken or half saved file must not end the session
+    for (tree, relpath), error in watcher.errors:
+        print(f"{action} failed: {watcher.source_path(tree, relpath)}: {error}")
+
+
+def watch(watcher, interval=0.5, debounce=0.05, rounds=None):
+    """
+    Builds the site, then rebuilds what changes until interrupted,
+    or for the given number of rebuilds.
+    """
+    started = time.perf_counter()
+    count = watcher.build_all()
+    print_errors(watcher, "Build")
+    print(f"Built {count} outputs in {time.perf_counter() - started:.2f}s")
+
+    waker = open_inotify()
+    mode = "inotify" if waker is not None else f"polling every {interval}s"
+    print(f"Watching for changes ({mode}), press Ctrl+C to stop")
+    try:
+        while rounds is None or rounds > 0:
+            changed, removed = wait_for_changes(watcher, waker, interval, debounce)
+            started = time.perf_counter()
+            count = watcher.apply(changed, removed)
+            if rounds is not None:
+                rounds -= 1
+            print_errors(watcher, "Rebuild")
+            elapsed = (time.perf_counter() - started) * 1000
+            print(f"Rebuilt {count} outputs in {elapsed:.1f}ms")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if waker is not None:
+            waker.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rebuild the site on changes.")
+    parser.add_argument(
+        "base_path", nargs="?", default="/", help="path the site is served from"
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=0.5,
+        help="seconds between polls without inotify (default: 0.5)",
+    )
+    parser.add_argument(
+        "--debounce",
+        type=float,
+        default=0.05,
+        help="seconds without changes before rebuilding (default: 0.05)",
+    )
+    parser.add_argument("--cache-dir", metavar="DIR", help="persistent render cache")
+    parser.add_argument(
+        "--block-cache",
+        type=int,
+        default=4096,
+        metavar="N",
+        help="reuse the html of the last N distinct blocks, so an edit only "
+        "renders the blocks it touched (default: 4096, 0 to turn off)",
+    )
+    parser.add_argument(
+        "--inline-cache",
+        type=int,
+        default=0,
+        metavar="N",
+        help="reuse the html of the last N distinct inline texts (default: off)",
+    )
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+
+    enable_block_cache(args.block_cache)
+    enable_inline_cache(args.inline_cache)
+    watcher = SiteWatcher(
+        "./content",
+        "./static",
+        "./template.html",
+        "./docs",
+        args.base_path,
+        cache=RenderCache(args.cache_dir) if args.cache_dir else None,
+    )
+    watch(watcher, args.interval, args.debounce)
+
+
+if __name__ == "__main__":
+    main()